@@ -0,0 +1,142 @@
+import os
+import logging
+from pathlib import Path
+from utils import wait_stats_summary, reset_wait_stats
+from resource_router import ResourceRouter
+from diagnostics import Diagnostics
+from selector_registry import SelectorRegistry
+from tracing import traced
+from session_inspector import inspect_session_file, log_check
+from session_store import SessionStore
+from twitter_flows import PageFlows, is_headless, launch_options, context_options
+
+logger = logging.getLogger(__name__)
+
+
+class LoginRequiredError(Exception):
+    """The saved session is missing or no longer logged in"""
+
+
+class AsyncTwitterClient:
+    """async_playwright version of TwitterClient for the asyncio orchestrator.
+
+    Timeline reads run on their own read-only page (heavy resources
+    blocked), writes on the main page, so a profile can load while a comment
+    or tweet is being generated and posted. Login only works from the saved
+    session; when it is missing or expired LoginRequiredError is raised and
+    the sync TwitterClient (auto/manual login) has to refresh it. The page
+    logic itself lives in twitter_flows.PageFlows, shared with TwitterClient.
+    """
+
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.read_page = None
+        self.router = None
+        self.selectors = SelectorRegistry()
+        self.diagnostics = Diagnostics()
+        self.session_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "twitter_session.json")
+        self.session_store = SessionStore(self.session_file)
+        self.is_logged_in = False
+        self.timeline_mode = os.getenv("TIMELINE_MODE", "network")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    @property
+    def flows(self):
+        """The shared page flows (twitter_flows.PageFlows) on the main page"""
+        return PageFlows(self.page, self.selectors, self.diagnostics)
+
+    async def start(self):
+        """Launch the browser from the saved session and verify the login"""
+        storage_path = Path(self.session_file)
+        # Expired or missing auth cookies never reach the browser launch
+        session_check = inspect_session_file(storage_path)
+        log_check(session_check, storage_path.name)
+        if session_check.status != "valid":
+            raise LoginRequiredError(f"Session file {storage_path} is {session_check.status}: {session_check.reason}")
+
+        try:
+            await self._launch(storage_path)
+        except BaseException:
+            # Do not leave the browser running when the login check (or anything after the launch) fails
+            await self.close()
+            raise
+
+    async def _launch(self, storage_path):
+        logger.info("Setting up async browser")
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(**launch_options(is_headless()))
+        self.context = await self.browser.new_context(**context_options(str(storage_path)))
+        self.router = ResourceRouter(self.context).attach()
+        self.page = await self.context.new_page()
+        self.page.set_default_timeout(120000)
+        self.read_page = await self.context.new_page()
+        if self.router.enabled:
+            # The read page never writes, so it blocks heavy resources for its whole lifetime
+            await self.read_page.route("**/*", self._handle_read_route)
+
+        if os.getenv("SESSION_VERIFY", "0") != "1":
+            self.is_logged_in = True
+            logger.info("Async session cookies valid, skipped the home page login check")
+            return
+        selector = await self.flows.verify_session()
+        self.is_logged_in = selector is not None
+        if not self.is_logged_in:
+            await self.diagnostics.capture_failure_async(self.page, "async_login_check")
+            raise LoginRequiredError("Session file did not log in")
+        logger.info(f"Async session login ok (found '{selector}')")
+
+    async def _handle_read_route(self, route):
+        if self.router.block_reason(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @traced("account_visit", args=("username",), falsy="empty")
+    async def get_recent_tweets(self, username, hours=23, max_tweets=5, known_ids=None):
+        """Tweets from a user newer than `hours` hours, read on the read-only page"""
+        return await self.flows.read_recent_tweets(self.read_page, username, hours, max_tweets, known_ids,
+                                                   self.timeline_mode, client="async")
+
+    @traced("post", kind="tweet")
+    async def post_tweet(self, content):
+        """Post a tweet, or a thread when content is longer than 280 characters"""
+        return await self.flows.post_tweet(content)
+
+    @traced("post", kind="comment")
+    async def post_comment(self, tweet_url, comment):
+        """Post a comment on a tweet"""
+        return await self.flows.post_comment(tweet_url, comment)
+
+    async def close(self):
+        """Save the session and shut the browser down"""
+        try:
+            if self.router:
+                self.router.log_summary()
+            logger.info(f"Page waits this run: {wait_stats_summary()}")
+            reset_wait_stats()
+            self.selectors.save()
+            if self.context and self.is_logged_in:
+                self.session_store.save_state(await self.context.storage_state())
+            try:
+                if self.browser:
+                    await self.browser.close()
+                if self.playwright:
+                    await self.playwright.stop()
+            finally:
+                # A failed start() already closed; a second close() finds nothing left to shut down
+                self.browser = self.context = self.playwright = None
+            logger.info("Async browser and Playwright closed")
+            self.diagnostics.close()
+        except Exception as e:
+            logger.error(f"Error closing async browser: {str(e)}")
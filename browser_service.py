@@ -0,0 +1,104 @@
+import os
+import time
+import logging
+from collections import Counter
+from twitter_client import TwitterClient
+from metrics import get_metrics, process_memory
+from session_inspector import inspect_cookies, log_check
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserService:
+    """Keeps one logged-in TwitterClient warm across the runs of a long-running process.
+
+    acquire() hands out the running client after a cheap health probe
+    (browser connected, page answering within probe_timeout, auth cookies
+    in the context and not about to expire) and launches a fresh one when
+    there is none, the probe fails, Chromium's RSS is over
+    BROWSER_MAX_RSS_MB or the client has served BROWSER_MAX_RUNS runs. release() ends the run with
+    TwitterClient.end_run() and leaves the browser open.
+
+    Sync Playwright objects belong to the thread that created them, so the
+    service must only be used from one thread (web_main's bot loop).
+    """
+
+    def __init__(self, max_runs=None, max_rss_mb=None, probe_timeout=5):
+        self.max_runs = max_runs or int(os.getenv("BROWSER_MAX_RUNS", "12"))
+        self.max_rss_bytes = (max_rss_mb or float(os.getenv("BROWSER_MAX_RSS_MB", "1500"))) * 1_000_000
+        self.probe_timeout = probe_timeout
+        self.client = None
+        self.runs = 0
+        self.stats = Counter()
+
+    def _launch(self, reason):
+        logger.info(f"Launching browser ({reason})")
+        started = time.monotonic()
+        client = TwitterClient()
+        try:
+            client._setup_browser()
+        except Exception:
+            client.close()
+            raise
+        self.client, self.runs = client, 0
+        self.stats["launches"] += 1
+        get_metrics().inc("browser_launches_total", reason=reason)
+        logger.info(f"Browser ready in {time.monotonic() - started:.1f}s")
+
+    def _shutdown(self):
+        client, self.client = self.client, None
+        if client:
+            client.close()
+
+    def probe(self):
+        """Reason the warm client cannot be reused, or None when it is healthy"""
+        client = self.client
+        try:
+            if not client.browser.is_connected() or client.page.is_closed():
+                return "disconnected"
+            # Runs in the page, so a hung renderer fails here instead of in the middle of a run
+            client.page.wait_for_function("() => true", timeout=self.probe_timeout * 1000)
+            check = inspect_cookies(client.context.cookies(["https://x.com", "https://twitter.com"]))
+            if check.status != "valid":
+                log_check(check, "warm browser")
+                return "logged_out"
+        except Exception as e:
+            logger.warning(f"Browser health probe failed: {str(e)}")
+            return "probe_failed"
+        return None
+
+    def _restart_reason(self):
+        if self.runs >= self.max_runs:
+            return "max_runs"
+        memory = process_memory()
+        if memory["chromium"] > self.max_rss_bytes:
+            logger.info(f"Chromium RSS {memory['chromium'] / 1_000_000:.0f} MB is over the limit")
+            return "rss"
+        return self.probe()
+
+    def acquire(self):
+        """A logged-in TwitterClient for the next run, reusing the warm one when it is healthy"""
+        started = time.monotonic()
+        if self.client is None:
+            self._launch("cold_start")
+        else:
+            reason = self._restart_reason()
+            if reason:
+                self.stats[f"restart_{reason}"] += 1
+                self._shutdown()
+                self._launch(reason)
+            else:
+                self.stats["reused"] += 1
+                logger.info(f"Reusing warm browser (run {self.runs + 1}/{self.max_runs}, "
+                            f"checked in {time.monotonic() - started:.2f}s)")
+        self.runs += 1
+        return self.client
+
+    def release(self):
+        """End the current run; the browser stays open for the next acquire()"""
+        if self.client:
+            self.client.end_run()
+        logger.info(f"Browser service: {dict(self.stats)}")
+
+    def close(self):
+        self._shutdown()
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_state.db")
+
+
+class DedupStore:
+    """In-memory set of tweet IDs with O(1) membership, persisted to a SQLite table.
+
+    IDs are kept in insertion/touch order so the oldest entries can be evicted
+    by size (LRU) or by age. Every add is a single-row INSERT, the table is
+    never rewritten as a whole.
+    """
+
+    def __init__(self, table, db_path=DEFAULT_DB_FILE, max_entries=1000, max_age_days=30, legacy_file=None,
+                 conn=None, lock=None):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.table = table
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        # A shared connection/lock lets several stores live in one state database
+        self._owns_conn = conn is None
+        self._conn = conn or sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = lock or threading.RLock()
+        self._ids = OrderedDict()  # tweet_id -> unix time it was added / last touched
+
+        with self._lock:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (tweet_id TEXT PRIMARY KEY, added_at REAL NOT NULL)"
+            )
+            self._load(legacy_file)
+
+    def _load(self, legacy_file):
+        rows = self._conn.execute(f"SELECT tweet_id, added_at FROM {self.table} ORDER BY added_at").fetchall()
+        if not rows and legacy_file and os.path.exists(legacy_file):
+            rows = self._import_legacy(legacy_file)
+        for tweet_id, added_at in rows:
+            self._ids[tweet_id] = added_at
+        evicted = self._evict(time.time())
+        if evicted:
+            self._delete(evicted)
+        logger.info(f"Loaded {len(self._ids)} IDs from {self.table}")
+
+    def _import_legacy(self, legacy_file):
+        """One-time migration from the old JSON list files"""
+        try:
+            with open(legacy_file, 'r') as f:
+                legacy_ids = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read legacy file {legacy_file}: {str(e)}")
+            return []
+        # Preserve the old list order by giving each ID a slightly increasing timestamp
+        base = time.time() - len(legacy_ids)
+        rows = [(str(tweet_id), base + i) for i, tweet_id in enumerate(legacy_ids)]
+        with self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?)", rows)
+        logger.info(f"Imported {len(rows)} IDs from {legacy_file} into {self.table}")
+        return rows
+
+    def _evict(self, now):
+        """Drop entries over the size cap or older than max_age, returns evicted IDs"""
+        evicted = []
+        while len(self._ids) > self.max_entries:
+            evicted.append(self._ids.popitem(last=False)[0])
+        if self.max_age:
+            cutoff = now - self.max_age
+            while self._ids:
+                oldest_id, added_at = next(iter(self._ids.items()))
+                if added_at >= cutoff:
+                    break
+                del self._ids[oldest_id]
+                evicted.append(oldest_id)
+        return evicted
+
+    def _delete(self, tweet_ids):
+        with self._conn:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE tweet_id = ?", [(i,) for i in tweet_ids])
+
+    def __contains__(self, tweet_id):
+        return tweet_id is not None and str(tweet_id) in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(list(self._ids))
+
+    def add(self, tweet_id):
+        """Add (or refresh) a tweet ID and persist it"""
+        self.add_many([tweet_id])
+
+    def add_many(self, tweet_ids):
+        """Add several tweet IDs in a single transaction"""
+        now = time.time()
+        with self._lock:
+            rows = []
+            for tweet_id in tweet_ids:
+                if tweet_id is None:
+                    continue
+                tweet_id = str(tweet_id)
+                self._ids[tweet_id] = now
+                self._ids.move_to_end(tweet_id)
+                rows.append((tweet_id, now))
+            evicted = self._evict(now)
+            with self._conn:
+                self._conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?)", rows)
+                if evicted:
+                    self._conn.executemany(f"DELETE FROM {self.table} WHERE tweet_id = ?", [(i,) for i in evicted])
+
+    def close(self):
+        if self._owns_conn:
+            self._conn.close()
+
+
+def _benchmark():
+    """Micro-benchmark: DedupStore vs the old JSON list approach"""
+    import random
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (1_000, 100_000, 1_000_000):
+            ids = [str(1940000000000000000 + random.randrange(10**15)) for _ in range(size)]
+            probes = random.sample(ids, 1000) + [str(i) for i in range(1000)]
+
+            db_path = os.path.join(tmp, f"bench_{size}.db")
+            start = time.perf_counter()
+            store = DedupStore("bench_ids", db_path=db_path, max_entries=size, max_age_days=None)
+            store.add_many(ids)
+            bulk_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for tweet_id in probes:
+                tweet_id in store
+            lookup = (time.perf_counter() - start) / len(probes)
+
+            start = time.perf_counter()
+            for i in range(100):
+                store.add(f"new{i}")
+            add_one = (time.perf_counter() - start) / 100
+            store.close()
+
+            start = time.perf_counter()
+            DedupStore("bench_ids", db_path=db_path, max_entries=size, max_age_days=None).close()
+            reopen = time.perf_counter() - start
+
+            # Old approach: list membership + full JSON rewrite per save
+            json_path = os.path.join(tmp, f"bench_{size}.json")
+            list_probes = probes[:50]
+            start = time.perf_counter()
+            for tweet_id in list_probes:
+                tweet_id in ids
+            list_lookup = (time.perf_counter() - start) / len(list_probes)
+            start = time.perf_counter()
+            with open(json_path, 'w') as f:
+                json.dump(ids, f)
+            list_save = time.perf_counter() - start
+
+            print(f"{size:>9} IDs | store: bulk load {bulk_load:.3f}s, lookup {lookup * 1e6:.2f}us, "
+                  f"add {add_one * 1e3:.2f}ms, reopen {reopen:.3f}s | "
+                  f"json list: lookup {list_lookup * 1e6:.1f}us, save {list_save * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from page_adapter import adapt, run_sync
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIAGNOSTICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "diagnostics")
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+class Diagnostics:
+    """Failure-only debugging artifacts for the browser flows.
+
+    record() keeps a rolling in-memory log of recent actions at no I/O cost.
+    capture_failure() grabs a screenshot (and optionally the HTML) of the page
+    and hands the bytes to a background thread, which writes them together
+    with the recent actions into diagnostics/<run>/ and deletes the oldest run
+    folders once the directory grows past its size cap.
+    """
+
+    def __init__(self, root=None, max_bytes=None, history=200):
+        self.root = root or os.getenv("DIAGNOSTICS_DIR", DEFAULT_DIAGNOSTICS_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("DIAGNOSTICS_MAX_MB", "50")) * 1_000_000)
+        self.max_bytes = max_bytes
+        self.run_dir = os.path.join(self.root, time.strftime("%Y%m%d_%H%M%S"))
+        self._actions = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diagnostics")
+
+    def record(self, action, **details):
+        """Remember an action in the rolling history (nothing is written to disk)"""
+        with self._lock:
+            self._actions.append({"time": time.time(), "action": action, **details})
+
+    def recent_actions(self):
+        with self._lock:
+            return list(self._actions)
+
+    def capture_failure(self, page, name, html=False, error=None):
+        """capture_failure_async() for sync Playwright pages"""
+        run_sync(self.capture_failure_async(adapt(page), name, html=html, error=error))
+
+    async def capture_failure_async(self, page, name, html=False, error=None):
+        """Capture the page state for a failed operation; disk writes happen off the main thread"""
+        self.record("failure", name=name, error=str(error) if error else None)
+        screenshot = content = url = None
+        # Playwright objects must be used from the calling thread, so only the bytes are handed off
+        try:
+            url = page.url
+            screenshot = await page.screenshot(timeout=10000)
+        except Exception as e:
+            logger.warning(f"Could not take failure screenshot '{name}': {str(e)}")
+        if html:
+            try:
+                content = await page.content()
+            except Exception as e:
+                logger.warning(f"Could not read page HTML for '{name}': {str(e)}")
+        self._submit(name, url, screenshot, content)
+
+    def new_run(self):
+        """Start a new run folder, for a client that is kept open across runs"""
+        with self._lock:
+            self.run_dir = os.path.join(self.root, time.strftime("%Y%m%d_%H%M%S"))
+            self._seq = 0
+            self._actions.clear()
+
+    def _submit(self, name, url, screenshot, content):
+        with self._lock:
+            self._seq += 1
+            prefix = f"{self._seq:03d}_{name}"
+            run_dir = self.run_dir
+        self._executor.submit(self._write, run_dir, prefix, url, screenshot, content, self.recent_actions())
+
+    def _write(self, run_dir, prefix, url, screenshot, content, actions):
+        try:
+            os.makedirs(run_dir, exist_ok=True)
+            base = os.path.join(run_dir, prefix)
+            if screenshot:
+                with open(base + ".png", "wb") as f:
+                    f.write(screenshot)
+            if content:
+                with open(base + ".html", "w", encoding="utf-8") as f:
+                    f.write(content)
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump({"url": url, "actions": actions}, f, ensure_ascii=False, indent=1)
+            logger.info(f"Saved failure diagnostics to {base}.*")
+            self._prune()
+        except Exception as e:
+            logger.error(f"Could not write diagnostics '{prefix}': {str(e)}")
+
+    def _prune(self):
+        """Delete the oldest run folders until the ring directory fits in max_bytes"""
+        runs = sorted(
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+        sizes = {run: _dir_size(run) for run in runs}
+        total = sum(sizes.values())
+        for run in runs:
+            if total <= self.max_bytes or run == self.run_dir:
+                break
+            shutil.rmtree(run, ignore_errors=True)
+            total -= sizes[run]
+            logger.info(f"Removed old diagnostics folder {run}")
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
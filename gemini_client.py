@@ -1,17 +1,100 @@
 import os
+import json
 import time
 import random
 import logging
-import google.generativeai as genai
+import functools
 from dotenv import load_dotenv
+from response_cache import get_cache, fingerprint
+from rate_limiter import GeminiRateLimiter, GeminiUnavailable
+from prompt_library import get_prompt_library, PromptBudgetExceeded
+from metrics import MetricsRegistry, get_metrics, TOKEN_BUCKETS
+from tracing import span
 
-# Configure logging for better visibility
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Daha detaylı ve özgün persona'lar
+COMMENT_PERSONAS = [
+    "veteran Web3 architect with a focus on decentralization and scalability",
+    "DeFi researcher specializing in yield strategies and risk management",
+    "NFT historian and digital culture critic, analyzing market trends and artistic value",
+    "tokenomics design expert, evaluating incentive models and sustainability",
+    "blockchain security auditor, looking for potential vulnerabilities and robust solutions",
+    "cross-chain interoperability evangelist, exploring seamless asset transfers and communication",
+    "Web3 gaming economist, dissecting play-to-earn models and virtual economies",
+    "privacy-preserving tech advocate, focusing on ZK-proofs and secure multi-party computation",
+    "DAO governance specialist, analyzing decision-making frameworks and community engagement",
+    "sustainable blockchain initiatives proponent, examining energy efficiency and environmental impact"
+]
+
+# Daha spesifik ve yaratıcı yazı stilleri
+COMMENT_WRITING_STYLES = [
+    "incisive and critical, but always constructive",
+    "thought-provoking and philosophical, exploring underlying principles",
+    "data-driven and evidence-based, citing potential metrics or trends",
+    "comparative and contrastive, drawing parallels or distinctions with other concepts",
+    "forward-looking and speculative, discussing future implications",
+    "problem-solution oriented, identifying challenges and potential remedies",
+    "question-driven, posing insightful queries that encourage deeper thought",
+    "narrative-focused, framing the topic within a broader story of Web3 evolution",
+    "strategically minded, evaluating market positioning and adoption pathways",
+    "conceptually dense, breaking down complex ideas into understandable components"
+]
+
+# Yorum yapılarını daha esnek hale getiriyoruz
+COMMENT_STRATEGIES = [
+    "Acknowledge the tweet, then present a nuanced counter-argument or an alternative perspective, concluding with a question about long-term viability.",
+    "Identify a key assumption in the tweet and challenge it with an alternative insight, supported by a brief observation on market dynamics.",
+    "Connect the tweet's content to a broader, less obvious Web3 trend or technological advancement, then ask how this connection might evolve.",
+    "Analyze the tweet's subject through the lens of economic incentives or game theory, highlighting potential outcomes and posing a 'what if' scenario.",
+    "Provide a brief historical context or evolution of the tweet's topic within Web3, then speculate on its next phase of development.",
+    "Focus on a specific technical aspect mentioned or implied in the tweet, elaborate on its complexity or innovation, and ask about adoption challenges.",
+    "Evaluate the tweet's implications for user experience or accessibility in Web3, suggesting improvements or discussing trade-offs.",
+    "Draw a parallel between the tweet's subject and a concept from traditional finance or technology, then explore how Web3 diverges or improves upon it.",
+    "Discuss the regulatory or governance implications of the tweet's topic, posing a question about future frameworks or community consensus.",
+    "Highlight an often-overlooked risk or opportunity associated with the tweet's subject, offering a cautionary thought or an optimistic outlook."
+]
+
+# Tonlar yorumun genel hissini belirleyecek
+COMMENT_TONES = [
+    "academically rigorous yet accessible",
+    "pragmatically optimistic with a hint of realism",
+    "skeptical but open-minded, seeking verifiable facts",
+    "visionary and inspiring, focusing on potential breakthroughs",
+    "critically constructive, aiming to improve understanding",
+    "deeply contemplative, exploring ethical and societal impacts",
+    "strategically analytical, assessing market fit and timing",
+    "innovatively curious, exploring uncharted territories",
+    "user-centric, focusing on how this impacts the end-user",
+    "community-focused, considering collective impact and collaboration"
+]
+
+
+def _tracked(method):
+    """Count calls of a generate method and the ones that came back empty (None) as fallbacks"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            result = func(self, *args, **kwargs)
+            self.metrics.inc("gemini_calls_total", method=method)
+            if result is None:
+                self.metrics.inc("gemini_fallbacks_total", method=method)
+            return result
+        return wrapper
+    return decorator
+
+
+def _finish_reason(response):
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return "unknown"
+    return getattr(reason, "name", str(reason))
+
+
 class GeminiClient:
     def __init__(self):
         # Configure Gemini API
@@ -20,12 +103,105 @@ class GeminiClient:
             logger.error("GEMINI_API_KEY environment variable not set. Please set it in your .env file.")
             raise ValueError("GEMINI_API_KEY environment variable not set")
         
+        # google.generativeai takes about a second to import; only pay for it when a client is built
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
         # Using gemini-2.5-flash for more sophisticated content generation
         # It offers a larger context window and better reasoning capabilities than Flash, crucial for analytical tasks.
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
+        self.model = genai.GenerativeModel(self.model_name)
         logger.info("Initialized Gemini 2.5 Flash model for enhanced content generation.")
+        self.prompts = get_prompt_library()
+        # Client-side quota: token bucket, 429-aware retries and a per-run error budget
+        self.limiter = GeminiRateLimiter()
+        # Generations survive a crash between generating and posting; see mark_posted()
+        self.cache = get_cache()
+        self._cache_keys = {}
+        # Per-run latency/token histograms, also added to the process-wide registry
+        self.metrics = MetricsRegistry(parent=get_metrics())
+
+    def _timed_generate_content(self, method, *args, **kwargs):
+        # Timed inside the limiter, so throttling and retry sleeps are not counted as API latency
+        start = time.monotonic()
+        try:
+            return self.model.generate_content(*args, **kwargs)
+        except Exception as e:
+            self.metrics.inc("gemini_api_errors_total", method=method, error=type(e).__name__)
+            raise
+        finally:
+            self.metrics.observe("gemini_latency_seconds", time.monotonic() - start, method=method)
 
+    def _generate(self, prompt, what="Gemini call", **kwargs):
+        """One generate_content call for a rendered prompt, through the rate limiter; returns the stripped text"""
+        method = prompt.name
+        with span("gemini", method=method, template_version=prompt.version) as current:
+            response = self.limiter.call(self._timed_generate_content, method, prompt.text, what=what, **kwargs)
+            finish_reason = _finish_reason(response)
+            current.set(finish_reason=finish_reason)
+            # Recorded before .text, which raises when the candidate was blocked
+            self.metrics.inc("gemini_finish_reason_total", method=method, reason=finish_reason)
+            text = response.text.strip()
+            # usage_metadata needs google-generativeai >= 0.8 (requirements.txt); without it the
+            # token numbers are character estimates, counted as estimated_calls in prompts.report()
+            usage = getattr(response, "usage_metadata", None)
+            prompt_tokens = getattr(usage, "prompt_token_count", None)
+            output_tokens = getattr(usage, "candidates_token_count", None)
+            total_tokens = getattr(usage, "total_token_count", None)
+            current.set(prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+        for name, tokens in (("gemini_prompt_tokens", prompt_tokens), ("gemini_output_tokens", output_tokens),
+                             ("gemini_total_tokens", total_tokens)):
+            if tokens is not None:
+                self.metrics.observe(name, tokens, buckets=TOKEN_BUCKETS, method=method)
+        self.prompts.record_usage(prompt, text, prompt_tokens=prompt_tokens, response_tokens=output_tokens)
+        return text
+
+    def usage_report(self):
+        """Per-method calls, fallback rate, latency and token percentiles for this client's run"""
+        report = {}
+        for (name, labels), value in list(self.metrics.counters.items()):
+            labels = dict(labels)
+            if name in ("gemini_calls_total", "gemini_fallbacks_total"):
+                row = report.setdefault(labels["method"], {})
+                row[name[len("gemini_"):-len("_total")]] = value
+        for row in report.values():
+            row.setdefault("fallbacks", 0)
+            row["fallback_rate"] = round(row["fallbacks"] / row["calls"], 3) if row.get("calls") else None
+        for (name, labels), histogram in list(self.metrics.histograms.items()):
+            row = report.setdefault(dict(labels)["method"], {})
+            field = name[len("gemini_"):]
+            if field == "latency_seconds":
+                row["latency_p50"], row["latency_p90"] = histogram.quantile(0.5), histogram.quantile(0.9)
+                row["api_calls"] = histogram.count
+            else:
+                row[field] = histogram.sum
+        return report
+
+    def write_run_metrics(self, run_id):
+        """Append this run's metrics snapshot to metrics/gemini_runs.jsonl"""
+        return self.metrics.write("gemini_runs.jsonl", run_id=run_id, model=self.model_name)
+
+    def _cached(self, template, inputs, generate):
+        """Return the cached text for (model, template version, inputs), or generate() and store it.
+
+        Exceptions from generate() propagate, so fallback texts never end up in the cache.
+        """
+        key = fingerprint(self.model_name, template, self.prompts.version(template), inputs)
+        text = self.cache.get(key)
+        if text is not None:
+            logger.info(f"Using cached {template} generation {key[:12]} (no API call)")
+        else:
+            text = generate()
+            self.cache.put(key, template, text)
+        self._cache_keys[text] = key
+        return text
+
+    def mark_posted(self, text):
+        """Drop a posted generation from the cache so it is never posted twice"""
+        key = self._cache_keys.pop(text, None)
+        if key:
+            self.cache.invalidate(key)
+
+    @_tracked("project_tweet")
     def generate_project_tweet(self, project):
         """
         Belirli bir proje hakkında analitik ve özgün bir tweet içeriği üretir.
@@ -34,46 +210,34 @@ class GeminiClient:
         try:
             logger.info(f"Generating tweet content for project: {project.get('name', 'Unknown')}")
             
-            # Daha zengin ve yönlendirici bir prompt oluşturuyoruz.
-            # Analitik derinliği artırmak için spesifik yönergeler ekliyoruz.
-            prompt = f"""
-            You are a highly analytical and insightful Web3 and blockchain expert. Your goal is to generate an authentic, unique, and deeply analytical tweet (or thread) about the following project. Avoid generic statements and focus on providing real value and unique perspective.
-
-            Project Details:
-            - Project Name: {project.get('name', 'N/A')}
-            - Twitter Handle: {project.get('twitter', 'N/A')}
-            - Website: {project.get('website', 'N/A')}
-            - Category: {project.get('category', 'N/A')}
-            - Key Features/Description (if available, otherwise infer from category): {project.get('description', 'This project operates in the ' + project.get('category', 'blockchain') + ' space.')}
-
-            Your tweet MUST adhere to these critical rules for authenticity and depth:
-            1.  **Authenticity & Uniqueness**: The content must be entirely original, sound genuinely human-written, and reflect deep thought. No copy-paste sentences or generic phrases.
-            2.  **Analytical & Interpretive**: Go beyond mere promotion. Analyze the project's potential impact, its unique selling proposition, challenges it addresses, or its position within the broader Web3 ecosystem. Compare it (briefly, implicitly, or explicitly) with other trends or projects if relevant.
-            3.  **Insightful Questions/Highlights**: Include 1-2 thought-provoking questions or highlight a nuanced aspect that most people might miss. This shows depth of understanding.
-            4.  **Web3 Trend Connection**: Relate the project to current or emerging Web3, blockchain, or crypto trends (e.g., modular blockchains, ZK-proofs, RWA tokenization, DePIN, account abstraction, specific L2 solutions, sustainable crypto, decentralized AI).
-            5.  **Value Proposition**: Articulate what unique value this project brings or what problem it solves in an innovative way.
-            6.  **Tone**: Professional, analytical, slightly inquisitive, and forward-looking. Avoid hype or overly promotional language.
-            7.  **Length**: If the content exceeds 280 characters, it's encouraged to structure it as a natural Twitter thread (implying continuation, e.g., "1/N", but you don't need to add the numbers, just flow). Focus on content quality over strict character count for a single tweet.
-            8.  **Emoji Use**: Limit to a maximum of 1 relevant emoji, used sparingly and effectively to enhance meaning, not decorate.
-            9.  **Format**: Start with an insightful observation or analytical point, develop the thought, include a unique question or highlight, and end with the project's Twitter handle and/or website. Ensure smooth, coherent transitions if it's thread-like.
-
-            Example structure for a single tweet (adapt for threads):
-            "Deep dive into [Project Name]'s approach to [specific problem/area]. Their [unique feature/method] presents an interesting shift. How will this impact [related Web3 trend/area]? Check them out: {project.get('twitter', project.get('website'))}"
-
-            Generate ONLY the tweet content. Do not include any preambles or explanations.
-            """
+            # Template is loaded once from prompts/; render() enforces the per-call token budget
+            prompt = self.prompts.render(
+                "project_tweet",
+                name=project.get('name', 'N/A'),
+                twitter=project.get('twitter', 'N/A'),
+                website=project.get('website', 'N/A'),
+                category=project.get('category', 'N/A'),
+                description=project.get('description', 'This project operates in the ' + project.get('category', 'blockchain') + ' space.'),
+                handle=project.get('twitter', project.get('website')),
+            )
             
-            response = self.model.generate_content(prompt)
-            tweet_content = response.text.strip()
+            tweet_content = self._cached("project_tweet", project, lambda: self._generate(prompt, what=f"Tweet for {project.get('name', 'Unknown')}"))
             
             logger.info(f"Successfully generated tweet content for {project.get('name', 'Unknown')}.")
             return tweet_content
             
+        except PromptBudgetExceeded as e:
+            logger.error(f"Skipping tweet for {project.get('name', 'Unknown')}, prompt over its token budget: {e}")
+            return None
+        except GeminiUnavailable as e:
+            logger.error(f"Skipping tweet for {project.get('name', 'Unknown')}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error generating tweet for {project.get('name', 'Unknown')}: {e}", exc_info=True)
-            # Daha bilgilendirici bir fallback tweet.
-            return f"Exploring the innovative work of {project.get('name', 'this project')} in the {project.get('category', 'Web3')} space. Their developments at {project.get('website', 'their website')} are worth a look! #Web3"
+            # No generic fallback text: the caller skips this project instead of posting filler
+            return None
             
+    @_tracked("comment")
     def generate_comment(self, username, tweet_data):
         """
         Belirli bir tweet'e analitik, benzersiz ve insan benzeri bir yorum üretir.
@@ -81,110 +245,182 @@ class GeminiClient:
         """
         logger.info(f"Generating comment for @{username}'s tweet: {tweet_data.get('text', 'No text provided')[:50]}...")
 
-        # Daha detaylı ve özgün persona'lar
-        personas = [
-            "veteran Web3 architect with a focus on decentralization and scalability",
-            "DeFi researcher specializing in yield strategies and risk management",
-            "NFT historian and digital culture critic, analyzing market trends and artistic value",
-            "tokenomics design expert, evaluating incentive models and sustainability",
-            "blockchain security auditor, looking for potential vulnerabilities and robust solutions",
-            "cross-chain interoperability evangelist, exploring seamless asset transfers and communication",
-            "Web3 gaming economist, dissecting play-to-earn models and virtual economies",
-            "privacy-preserving tech advocate, focusing on ZK-proofs and secure multi-party computation",
-            "DAO governance specialist, analyzing decision-making frameworks and community engagement",
-            "sustainable blockchain initiatives proponent, examining energy efficiency and environmental impact"
-        ]
-        
-        # Daha spesifik ve yaratıcı yazı stilleri
-        writing_styles = [
-            "incisive and critical, but always constructive",
-            "thought-provoking and philosophical, exploring underlying principles",
-            "data-driven and evidence-based, citing potential metrics or trends",
-            "comparative and contrastive, drawing parallels or distinctions with other concepts",
-            "forward-looking and speculative, discussing future implications",
-            "problem-solution oriented, identifying challenges and potential remedies",
-            "question-driven, posing insightful queries that encourage deeper thought",
-            "narrative-focused, framing the topic within a broader story of Web3 evolution",
-            "strategically minded, evaluating market positioning and adoption pathways",
-            "conceptually dense, breaking down complex ideas into understandable components"
-        ]
-
-        # Yorum yapılarını daha esnek hale getiriyoruz
-        comment_strategies = [
-            "Acknowledge the tweet, then present a nuanced counter-argument or an alternative perspective, concluding with a question about long-term viability.",
-            "Identify a key assumption in the tweet and challenge it with an alternative insight, supported by a brief observation on market dynamics.",
-            "Connect the tweet's content to a broader, less obvious Web3 trend or technological advancement, then ask how this connection might evolve.",
-            "Analyze the tweet's subject through the lens of economic incentives or game theory, highlighting potential outcomes and posing a 'what if' scenario.",
-            "Provide a brief historical context or evolution of the tweet's topic within Web3, then speculate on its next phase of development.",
-            "Focus on a specific technical aspect mentioned or implied in the tweet, elaborate on its complexity or innovation, and ask about adoption challenges.",
-            "Evaluate the tweet's implications for user experience or accessibility in Web3, suggesting improvements or discussing trade-offs.",
-            "Draw a parallel between the tweet's subject and a concept from traditional finance or technology, then explore how Web3 diverges or improves upon it.",
-            "Discuss the regulatory or governance implications of the tweet's topic, posing a question about future frameworks or community consensus.",
-            "Highlight an often-overlooked risk or opportunity associated with the tweet's subject, offering a cautionary thought or an optimistic outlook."
-        ]
-        
-        # Tonlar yorumun genel hissini belirleyecek
-        response_tones = [
-            "academically rigorous yet accessible",
-            "pragmatically optimistic with a hint of realism",
-            "skeptical but open-minded, seeking verifiable facts",
-            "visionary and inspiring, focusing on potential breakthroughs",
-            "critically constructive, aiming to improve understanding",
-            "deeply contemplative, exploring ethical and societal impacts",
-            "strategically analytical, assessing market fit and timing",
-            "innovatively curious, exploring uncharted territories",
-            "user-centric, focusing on how this impacts the end-user",
-            "community-focused, considering collective impact and collaboration"
-        ]
-        
         # Random seçimler
-        persona = random.choice(personas)
-        style = random.choice(writing_styles)
-        strategy = random.choice(comment_strategies)
-        tone = random.choice(response_tones)
+        persona = random.choice(COMMENT_PERSONAS)
+        style = random.choice(COMMENT_WRITING_STYLES)
+        strategy = random.choice(COMMENT_STRATEGIES)
+        tone = random.choice(COMMENT_TONES)
         
-        # Yorumun derinliğini ve alaka düzeyini artırmak için prompt'u geliştiriyoruz.
-        prompt = f"""
-        You are a {persona} with a {style} writing style. Your task is to generate an insightful, unique, and genuinely analytical comment on the following tweet by @{username}. The comment should reflect your expertise and chosen style, aiming to add significant value to the conversation.
-
-        Tweet Content: "{tweet_data.get('text', '')}"
-        Tweet Author: @{username}
-
-        Your comment MUST follow these instructions precisely:
-        1.  **Perspective**: Adopt the viewpoint of the assigned persona, demonstrating genuine expertise.
-        2.  **Originality**: Be completely unique and unplagiarized. Avoid any generic phrases.
-        3.  **Depth**: Provide analytical depth. This means offering an insight, making a comparison, asking a truly penetrating question, or highlighting a non-obvious implication.
-        4.  **Relevance**: Directly respond to the content of the tweet, showing you've understood it deeply.
-        5.  **Conciseness**: Keep the comment under 280 characters. Every word must count.
-        6.  **Engagement**: Formulate the comment according to this strategy: "{strategy}".
-        7.  **Tone**: Maintain a {tone} tone.
-        8.  **Emoji Use**: Use at most ONE highly relevant emoji if it adds significant value or clarity, otherwise omit. Place it thoughtfully.
-        9.  **No Placeholders**: Do not include "[...]" or similar placeholders. Write the full, coherent comment.
-
-        Generate ONLY the comment text. No other text, preambles, or explanations.
-        """
-
         try:
-            response = self.model.generate_content(prompt)
-            comment = response.text.strip()
-            
-            # Yorumun Twitter karakter limitine uyduğundan emin ol
-            if len(comment) > 280:
-                # Akıllıca kısaltma yapmaya çalış, cümlenin ortasından kesmek yerine.
-                # Genellikle son cümleden başlamak iyi bir stratejidir.
-                truncated_comment = comment[:277] + "..."
-                comment = truncated_comment
+            prompt = self.prompts.render(
+                "comment", persona=persona, style=style, strategy=strategy, tone=tone,
+                username=username, text=tweet_data.get('text', ''),
+            )
+            comment = self._cached("comment", self._comment_inputs(username, tweet_data),
+                                   lambda: self._fit_comment(self._generate(prompt, what=f"Comment for @{username}")))
             
             logger.info(f"Successfully generated comment: {comment}")
             return comment
+        except PromptBudgetExceeded as e:
+            logger.error(f"Skipping comment for @{username}, prompt over its token budget: {e}")
+            return None
+        except GeminiUnavailable as e:
+            logger.error(f"Skipping comment for @{username}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error generating comment for @{username}'s tweet: {e}", exc_info=True)
-            # Daha özgün ve genel bir fallback yorum
-            return f"The points @{username} raises are crucial for Web3's future. It sparks thought on how [mention a general relevant concept like 'scalability' or 'user adoption'] will evolve. Appreciate the insight!"
+            # No generic fallback comment: the caller skips this tweet instead of posting filler
+            return None
+
+    @_tracked("rewrite_tweet")
+    def rewrite_tweet(self, tweet_text):
+        """Rewrite someone else's tweet in different words as a new tweet (None on failure)"""
+        try:
+            prompt = self.prompts.render("rewrite_tweet", text=tweet_text)
+            return self._cached("rewrite_tweet", {"text": tweet_text}, lambda: self._generate(prompt, what="Tweet rewrite"))
+        except PromptBudgetExceeded as e:
+            logger.error(f"Skipping tweet rewrite, prompt over its token budget: {e}")
+            return None
+        except GeminiUnavailable as e:
+            logger.error(f"Skipping tweet rewrite: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error rewriting tweet: {e}", exc_info=True)
+            return None
+
+    def generate_comments_batch(self, items):
+        """Comments for several (username, tweet_data) pairs with a single request, in input order.
+
+        Cached comments are reused, and a batch over the comment_batch token
+        budget is sent in halves. The model answers with a JSON array of
+        {"index", "comment"} objects; only the items whose entry is missing,
+        empty, over 280 characters or contains a placeholder are generated
+        again with generate_comment(), one call each.
+        """
+        comments = [None] * len(items)
+        pending = []
+        for index, (username, tweet_data) in enumerate(items):
+            key = fingerprint(self.model_name, "comment", self.prompts.version("comment"), self._comment_inputs(username, tweet_data))
+            cached = self.cache.get(key)
+            if cached is not None:
+                comments[index] = cached
+                self._cache_keys[cached] = key
+            else:
+                pending.append((index, key))
+        if not pending:
+            return comments
+
+        generated = self._request_comment_batch(items, [index for index, _ in pending])
+
+        failed = []
+        for index, key in pending:
+            comment = generated.get(index)
+            if comment:
+                self.cache.put(key, "comment", comment)
+                self._cache_keys[comment] = key
+                comments[index] = comment
+            else:
+                failed.append(index)
+        logger.info(
+            f"Batch request produced {len(pending) - len(failed)}/{len(pending)} comments "
+            f"({len(items) - len(pending)} cached, {len(failed)} retried one by one)"
+        )
+        self.metrics.inc("gemini_calls_total", len(pending), method="comment_batch")
+        self.metrics.inc("gemini_fallbacks_total", len(failed), method="comment_batch")
+        for index in failed:
+            comments[index] = self.generate_comment(*items[index])
+        return comments
+
+    def _request_comment_batch(self, items, indexes):
+        """{item index: comment} from one batched request for items[indexes].
+
+        A batch whose prompt is over the comment_batch token budget is split
+        in half and each half requested on its own, down to single items.
+        """
+        sections = []
+        for number, index in enumerate(indexes):
+            username, tweet_data = items[index]
+            sections.append(
+                f"Item {number}:\n"
+                f"- Tweet author: @{username}\n"
+                f"- Tweet content: \"{tweet_data.get('text', '')}\"\n"
+                f"- Persona: {random.choice(COMMENT_PERSONAS)}\n"
+                f"- Writing style: {random.choice(COMMENT_WRITING_STYLES)}\n"
+                f"- Strategy: {random.choice(COMMENT_STRATEGIES)}\n"
+                f"- Tone: {random.choice(COMMENT_TONES)}"
+            )
+        try:
+            prompt = self.prompts.render("comment_batch", count=len(indexes), items="\n\n".join(sections))
+        except PromptBudgetExceeded as e:
+            if len(indexes) == 1:
+                logger.error(f"Batch comment prompt over its token budget even for one tweet: {e}")
+                return {}
+            half = len(indexes) // 2
+            logger.warning(f"Batch comment prompt over its token budget, splitting {len(indexes)} items in two: {e}")
+            generated = self._request_comment_batch(items, indexes[:half])
+            generated.update(self._request_comment_batch(items, indexes[half:]))
+            return generated
+        try:
+            text = self._generate(prompt, what=f"Batch of {len(indexes)} comments",
+                                  generation_config={"response_mime_type": "application/json"})
+            generated = self._parse_comment_batch(text, len(indexes))
+        except Exception as e:
+            logger.error(f"Batch comment generation failed: {e}")
+            return {}
+        return {indexes[number]: comment for number, comment in generated.items()}
+
+    @staticmethod
+    def _parse_comment_batch(text, count):
+        """Valid comments from a batch response as {item number: comment}"""
+        text = text.strip()
+        if text.startswith("```"):
+            text = text.strip("`").split("\n", 1)[-1]
+        try:
+            entries = json.loads(text)
+        except ValueError as e:
+            logger.warning(f"Batch response is not valid JSON: {e}")
+            return {}
+        if not isinstance(entries, list):
+            logger.warning("Batch response is not a JSON array")
+            return {}
+        comments = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            number, comment = entry.get("index"), entry.get("comment")
+            # bool is an int subclass; "index": true must not count as item 1
+            if type(number) is not int or not 0 <= number < count or number in comments:
+                continue
+            if not isinstance(comment, str) or not comment.strip():
+                continue
+            comment = comment.strip()
+            if len(comment) > 280:
+                logger.info(f"Batch comment {number} is {len(comment)} characters, over the limit")
+                continue
+            if "[" in comment and "]" in comment:
+                logger.info(f"Batch comment {number} contains a placeholder")
+                continue
+            comments[number] = comment
+        return comments
+
+    @staticmethod
+    def _comment_inputs(username, tweet_data):
+        # Cache key inputs: the tweet itself, not the randomly picked persona/style
+        return {"username": username, "tweet_id": tweet_data.get("id"), "text": tweet_data.get("text", "")}
+
+    @staticmethod
+    def _fit_comment(comment):
+        # Yorumun Twitter karakter limitine uyduğundan emin ol
+        if len(comment) > 280:
+            # Akıllıca kısaltma yapmaya çalış, cümlenin ortasından kesmek yerine.
+            # Genellikle son cümleden başlamak iyi bir stratejidir.
+            comment = comment[:277] + "..."
+        return comment
 
 # Example Usage (for testing purposes)
 if __name__ == "__main__":
     # Bu kısmı test için kullanabiliriz. Gerçek bir Twitter entegrasyonu botunuzda olmalı.
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     
     # Dummy project data for tweet generation
     sample_project = {
@@ -1,9 +1,13 @@
 import os
 import re
-import imaplib
+import time
 import email
+import imaplib
+import threading
 import logging
-from email.header import decode_header
+from datetime import datetime, timedelta, timezone
+from email.header import decode_header, make_header
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -11,52 +15,181 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+CODE_SUBJECT = "X doğrulama kodun"
+CODE_PATTERN = re.compile(r"X doğrulama kodun (\w+)")
+HEADER_FIELDS = "BODY.PEEK[HEADER.FIELDS (SUBJECT DATE)]"
+_FETCH_UID = re.compile(rb"UID (\d+)")
+
+# imaplib only knows IDLE from Python 3.14 on; _command() refuses commands missing from this table
+imaplib.Commands.setdefault("IDLE", ("AUTH", "SELECTED"))
+
+
 class GmailReader:
-    def __init__(self):
+    """Reads X verification codes from the subject line of recent mails over IMAP.
+
+    One UID SEARCH by SUBJECT (UTF-8 literal) and SINCE finds the
+    candidates on the server, and one UID FETCH of only their Subject and
+    Date headers picks the newest; message bodies are never downloaded.
+    wait_for_twitter_code() waits on IMAP IDLE for the mail to arrive
+    instead of polling. IMAP_HOST/IMAP_PORT/IMAP_SSL point it at another
+    server, e.g. a local plain-text stand-in.
+    """
+
+    def __init__(self, host=None, port=None, use_ssl=None, timeout=30):
         self.email_address = os.getenv("EMAIL_ADDRESS")
         self.password = os.getenv("GMAIL_APP_PASSWORD")
-        
+
         if not self.email_address or not self.password:
             raise ValueError("EMAIL_ADDRESS or GMAIL_APP_PASSWORD environment variables not set")
-    
-    def get_latest_twitter_code(self):
-        """Gmail'de konu başlığı 'X doğrulama kodun <kod>' olan en son mailden kodu döndürür."""
+        self.host = host or os.getenv("IMAP_HOST", "imap.gmail.com")
+        self.use_ssl = use_ssl if use_ssl is not None else os.getenv("IMAP_SSL", "1") != "0"
+        self.port = port or int(os.getenv("IMAP_PORT", "993" if self.use_ssl else "143"))
+        self.timeout = timeout
+
+    def _connect(self):
+        imap_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+        mail = imap_class(self.host, self.port, timeout=self.timeout)
+        mail.login(self.email_address, self.password)
+        mail.select("INBOX")
+        return mail
+
+    @staticmethod
+    def _logout(mail):
         try:
-            logger.info("Connecting to Gmail to get X doğrulama kodu")
-            mail = imaplib.IMAP4_SSL("imap.gmail.com")
-            mail.login(self.email_address, self.password)
-            mail.select("inbox")
-            # Son 20 maili kontrol et
-            status, data = mail.search(None, 'ALL')
-            if status != "OK":
-                logger.error("Gmail arama başarısız!")
-                mail.close()
-                mail.logout()
-                return None
-            email_ids = data[0].split()
-            for eid in reversed(email_ids[-20:]):
-                status, email_data = mail.fetch(eid, "(RFC822)")
-                if status != "OK":
-                    continue
-                raw_email = email_data[0][1]
-                msg = email.message_from_bytes(raw_email)
-                subject = decode_header(msg["Subject"])[0][0]
-                if isinstance(subject, bytes):
-                    subject = subject.decode()
-                logger.info(f"Email subject: {subject}")
-                match = re.match(r"X doğrulama kodun (\w+)", subject)
-                if match:
-                    code = match.group(1)
-                    logger.info(f"Konu başlığından doğrulama kodu bulundu: {code}")
-                    mail.store(eid, "+FLAGS", "\\Seen")
-                    mail.close()
-                    mail.logout()
-                    return code
             mail.close()
             mail.logout()
+        except Exception:
+            pass
+
+    def _find_code(self, mail, newer_than=None):
+        """(uid, code) of the newest verification mail, or None; two round trips at most"""
+        if newer_than is not None and newer_than.tzinfo is None:
+            newer_than = newer_than.astimezone()
+        # SINCE only has day granularity; newer_than filters on the Date header below
+        since = (newer_than or datetime.now(timezone.utc)) - timedelta(days=1)
+        mail.literal = CODE_SUBJECT.encode("utf-8")
+        status, data = mail.uid("SEARCH", "CHARSET", "UTF-8", "SINCE", since.strftime("%d-%b-%Y"), "SUBJECT")
+        if status != "OK":
+            logger.error("Gmail arama başarısız!")
+            return None
+        uids = data[0].split() if data and data[0] else []
+        if not uids:
+            return None
+        status, data = mail.uid("FETCH", b",".join(uids), f"({HEADER_FIELDS})")
+        if status != "OK":
+            logger.error("Gmail header fetch başarısız!")
+            return None
+
+        candidates = []
+        for part in data:
+            if not isinstance(part, tuple):
+                continue
+            uid = _FETCH_UID.search(part[0])
+            headers = email.message_from_bytes(part[1])
+            subject = str(make_header(decode_header(headers.get("Subject", ""))))
+            match = CODE_PATTERN.search(subject)
+            if not uid or not match:
+                continue
+            try:
+                sent = parsedate_to_datetime(headers.get("Date"))
+                if sent.tzinfo is None:
+                    sent = sent.replace(tzinfo=timezone.utc)
+            except (TypeError, ValueError):
+                sent = None
+            if newer_than is not None and (sent is None or sent < newer_than):
+                continue
+            candidates.append((sent or datetime.min.replace(tzinfo=timezone.utc), int(uid.group(1)), match.group(1)))
+        logger.info(f"{len(uids)} mails matched the subject search, {len(candidates)} usable codes")
+        if not candidates:
+            return None
+        _, uid, code = max(candidates)
+        return uid, code
+
+    def _take_code(self, mail, found):
+        uid, code = found
+        logger.info(f"Konu başlığından doğrulama kodu bulundu: {code}")
+        mail.uid("STORE", str(uid), "+FLAGS", "(\\Seen)")
+        return code
+
+    def get_latest_twitter_code(self, newer_than=None):
+        """Gmail'de konu başlığı 'X doğrulama kodun <kod>' olan en son mailden kodu döndürür."""
+        mail = None
+        try:
+            logger.info("Connecting to Gmail to get X doğrulama kodu")
+            mail = self._connect()
+            found = self._find_code(mail, newer_than)
+            if found:
+                return self._take_code(mail, found)
             logger.warning("Uygun X doğrulama kodu başlıklı mail bulunamadı!")
             return None
         except Exception as e:
             logger.error(f"Gmail'den doğrulama kodu alınırken hata: {str(e)}")
             return None
-            return None
\ No newline at end of file
+        finally:
+            if mail is not None:
+                self._logout(mail)
+
+    def _idle(self, mail, deadline):
+        """Block in IDLE until the mailbox reports new mail (True) or the deadline passes (False)"""
+        # Gmail ends an IDLE after ~29 minutes; leave after 25 so the caller can search and re-issue it
+        idle_until = min(deadline, time.monotonic() + 25 * 60)
+        done_lock = threading.Lock()
+        done_sent = False
+
+        def send_done():
+            nonlocal done_sent
+            with done_lock:
+                if not done_sent:
+                    done_sent = True
+                    mail.send(b"DONE\r\n")
+
+        # Reads go through imaplib's own parser; DONE from the timer wakes the blocked read at the deadline.
+        # A read that still times out (dead connection) aborts the session instead of hanging.
+        mail.untagged_responses.pop("EXISTS", None)
+        mail.socket().settimeout(max(0.0, idle_until - time.monotonic()) + self.timeout)
+        tag = mail._command("IDLE")
+        timer = threading.Timer(max(0.0, idle_until - time.monotonic()), send_done)
+        timer.daemon = True
+        timer.start()
+        try:
+            while mail.tagged_commands[tag] is None:
+                mail._get_response()
+                if "EXISTS" in mail.untagged_responses:
+                    send_done()
+        finally:
+            timer.cancel()
+            mail.socket().settimeout(self.timeout)
+        status, data = mail.tagged_commands.pop(tag)
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"IDLE refused: {data!r}")
+        return mail.untagged_responses.pop("EXISTS", None) is not None
+
+    def wait_for_twitter_code(self, timeout=120, newer_than=None, poll_interval=10):
+        """Wait up to `timeout` seconds for a verification mail newer than `newer_than`, using IDLE when available"""
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        mail = None
+        try:
+            mail = self._connect()
+            idle = "IDLE" in mail.capabilities
+            logger.info(f"Waiting up to {timeout}s for X doğrulama kodu ({'IDLE' if idle else 'polling'})")
+            while True:
+                found = self._find_code(mail, newer_than)
+                if found:
+                    code = self._take_code(mail, found)
+                    logger.info(f"Verification code arrived after {time.monotonic() - started:.1f}s")
+                    return code
+                if time.monotonic() >= deadline:
+                    logger.warning(f"No X doğrulama kodu within {timeout}s")
+                    return None
+                if idle:
+                    self._idle(mail, deadline)
+                else:
+                    time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+                    mail.noop()
+        except Exception as e:
+            logger.error(f"Gmail'den doğrulama kodu beklenirken hata: {str(e)}")
+            return None
+        finally:
+            if mail is not None:
+                self._logout(mail)
@@ -0,0 +1,93 @@
+"""Cold import time of the entry points, each in a fresh interpreter.
+
+    python import_benchmark.py [--runs N] [--budget module=ms ...]
+
+Exits with 1 when the median import time of an entry point is over its
+budget, so it can run in CI or before a deploy. web_main is imported with
+BOT_THREAD=0: what matters there is how long it takes until Flask can bind
+the port, not the bot thread that starts afterwards.
+"""
+import os
+import re
+import sys
+import statistics
+import subprocess
+
+# Median cold import time per entry point, in milliseconds
+DEFAULT_BUDGETS = {
+    "web_main": 500,
+    "main": 500,
+    "twitter_client": 300,
+    "gemini_client": 200,
+}
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module, runs=5):
+    """Wall-clock import times in ms over `runs` fresh interpreters, and the slowest imports of the last one"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - started) * 1000)"
+    )
+    env = dict(os.environ, BOT_THREAD="0", PYTHONDONTWRITEBYTECODE="1")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    timings, slowest = [], []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True,
+                                text=True, env=env, cwd=cwd)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+        slowest = direct_imports(result.stderr, module)
+    return timings, slowest[:5]
+
+
+def direct_imports(importtime_output, module):
+    """(cumulative ms, name) of the modules `module` imports itself, slowest first"""
+    children, result = [], []
+    # -X importtime prints children before their parent, indented two more spaces per level
+    for line in importtime_output.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3))
+        if depth == 3:
+            children.append((int(match.group(2)) / 1000, match.group(4)))
+        elif depth == 1:
+            if match.group(4) == module:
+                result = children
+            children = []
+    return sorted(result, reverse=True)
+
+
+def main(argv):
+    runs = 5
+    budgets = dict(DEFAULT_BUDGETS)
+    args = iter(argv)
+    for arg in args:
+        if arg == "--runs":
+            runs = int(next(args))
+        elif arg == "--budget":
+            module, _, ms = next(args).partition("=")
+            budgets[module] = float(ms)
+        else:
+            raise SystemExit(__doc__)
+
+    over = []
+    for module, budget in budgets.items():
+        timings, slowest = measure(module, runs)
+        median = statistics.median(timings)
+        status = "ok" if median <= budget else "OVER BUDGET"
+        print(f"{module:<16} median {median:7.0f} ms  min {min(timings):7.0f} ms  budget {budget:5.0f} ms  {status}")
+        print("    " + ", ".join(f"{name} {ms:.0f} ms" for ms, name in slowest))
+        if median > budget:
+            over.append(module)
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,165 @@
+import re
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+KeywordMatch = namedtuple("KeywordMatch", ["keyword", "start", "end"])
+
+# A keyword only matches as a whole token: "Near" must not hit "nearly", "IQ" must not hit "unique".
+# Punctuation such as "$", "#", "@" or "." is still allowed around it ("#Monad", "$NEAR.").
+_BOUNDARY_BEFORE = r"(?<![0-9A-Za-z_])"
+_BOUNDARY_AFTER = r"(?![0-9A-Za-z_])"
+
+
+def _trie_regex(terms):
+    """Build a prefix-factored alternation ("sol(?:ana|ayer)") from lowercase terms.
+
+    A flat "a|b|c|..." makes the regex engine retry every alternative at every
+    position; factoring shared prefixes turns it into a walk down a trie.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of term
+
+    def build(node):
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            # Longer terms first: the greedy optional group prefers "humanity protocol" over "humanity"
+            return "(?:" + body + ")?" if len(branches) > 1 or len(body) > 1 else body + "?"
+        return body
+
+    return "(?:" + build(trie) + ")"
+
+
+class KeywordMatcher:
+    """Case-insensitive whole-word matcher for a fixed list of terms, compiled once.
+
+    All terms are folded into a single prefix-factored regex (a trie, longest
+    match preferred), which scans the text in one pass and reports every match
+    with its position.
+    """
+
+    def __init__(self, terms):
+        self._canonical = {}
+        for term in terms:
+            term = term.strip()
+            if term:
+                # First spelling wins ("Near" and "NEAR" are the same keyword)
+                self._canonical.setdefault(term.lower(), term)
+        source = f"{_BOUNDARY_BEFORE}{_trie_regex(self._canonical)}{_BOUNDARY_AFTER}"
+        # Matching pre-lowercased text case-sensitively is about twice as fast as re.IGNORECASE
+        self._pattern = re.compile(source)
+        # ...but lower() can change the length of some non-ASCII text ("İ"), which would shift positions
+        self._pattern_ignorecase = re.compile(source, re.IGNORECASE)
+
+    def _scan_target(self, text):
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return self._pattern, lowered
+        return self._pattern_ignorecase, text
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def find_all(self, text):
+        """Return every keyword occurrence in text as KeywordMatch(keyword, start, end)"""
+        if not text:
+            return []
+        pattern, target = self._scan_target(text)
+        return [
+            KeywordMatch(self._canonical[m.group(0).lower()], m.start(), m.end())
+            for m in pattern.finditer(target)
+        ]
+
+    def matched_keywords(self, text):
+        """Distinct keywords found in text, in order of first appearance"""
+        return list(dict.fromkeys(match.keyword for match in self.find_all(text)))
+
+    def search(self, text):
+        """First KeywordMatch in text, or None"""
+        if not text:
+            return None
+        pattern, target = self._scan_target(text)
+        m = pattern.search(target)
+        if not m:
+            return None
+        return KeywordMatch(self._canonical[m.group(0).lower()], m.start(), m.end())
+
+
+# A fixed list the size and shape of the bot's KEYWORDS (shared prefixes, multi-word names, short
+# tickers), kept here so the benchmark neither depends on nor imports main
+_BENCHMARK_KEYWORDS = [
+    "0G", "Allora", "ANIME", "Aptos", "Arbitrum", "Berachain", "Boop", "Caldera", "Camp Network", "Corn",
+    "Defi App", "dYdX", "Eclipse", "Fogo", "Frax", "FUEL", "Huma", "Humanity Protocol", "Hyperbolic",
+    "Initia", "Injective", "Infinex", "IQ", "Irys", "Kaia", "Kaito", "MegaETH", "Mitosis", "Monad",
+    "Movement", "Multibank", "Multipli", "Near", "Newton", "Novastro", "OpenLedger", "PARADEX", "PENGU",
+    "Polkadot", "Portal to BTC", "PuffPaw", "Pyth", "QUAI", "SatLayer", "Sei", "Sidekick", "Skate",
+    "Somnia", "Soon", "Soph Protocol", "Soul Protocol", "Starknet", "Story", "Succinct", "Symphony",
+    "Theoriq", "Thrive Protocol", "Union", "Virtuals Protocol", "Wayfinder", "XION", "YEET", "Zcash",
+    "DeFi", "NFT", "Web3", "Layer2", "zkSync", "Ethereum", "Bitcoin", "Solana", "Polygon", "Avalanche",
+    "Cosmos", "Anoma", "Bless", "Boundless", "GOAT Network", "Hana", "Katana", "Lombard", "Lumiterra",
+    "MemeX", "Mira Network", "Noya.ai", "Surf", "Turtle Club", "Warden Protocol", "Overtake", "Peaq",
+    "UXLINK", "Maplestory Universe", "Sunrise",
+]
+
+
+def _benchmark():
+    """Compare the compiled matcher with the old per-keyword substring scan"""
+    import random
+    import time
+
+    keywords = _BENCHMARK_KEYWORDS
+
+    filler = (
+        "gm frens, just shipped a thread on market structure. liquidity is thin, funding is flat and "
+        "everyone is waiting for the next catalyst. nearly every chart looks the same, unique setups "
+        "are rare. what are you watching this week? bullish on builders, bearish on noise."
+    ).split()
+    random.seed(7)
+    corpus = []
+    for _ in range(20_000):
+        words = random.choices(filler, k=random.randint(15, 45))
+        if random.random() < 0.3:
+            words.insert(random.randrange(len(words)), random.choice(keywords))
+        corpus.append(" ".join(words))
+
+    def old_contains(text):
+        text_lower = text.lower()
+        for keyword in keywords:
+            if keyword.lower() in text_lower:
+                return True
+        return False
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    old_hits = sum(old_contains(text) for text in corpus)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_hits = sum(matcher.search(text) is not None for text in corpus)
+    search_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total_matches = sum(len(matcher.find_all(text)) for text in corpus)
+    find_all_time = time.perf_counter() - start
+
+    per_tweet = lambda t: t / len(corpus) * 1e6
+    print(f"{len(corpus)} tweets, {len(matcher)} keywords, compiled in {compile_time * 1e3:.2f}ms")
+    print(f"old substring scan : {per_tweet(old_time):6.2f}us/tweet, {old_hits} hits (incl. false positives)")
+    print(f"matcher.search     : {per_tweet(search_time):6.2f}us/tweet, {new_hits} hits")
+    print(f"matcher.find_all   : {per_tweet(find_all_time):6.2f}us/tweet, {total_matches} matches")
+
+
+if __name__ == "__main__":
+    _benchmark()
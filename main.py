@@ -1,13 +1,22 @@
 import os
 import random
+import asyncio
 import time
-import schedule
 import logging
-import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
 from twitter_client import TwitterClient
+from page_adapter import adapt, run_sync
+from async_twitter_client import AsyncTwitterClient, LoginRequiredError
 from gemini_client import GeminiClient
+from state_store import get_state
+from keyword_matcher import KeywordMatcher
+from tweet_time import RecencyFilter
+from metrics import get_metrics, PHASE_BUCKETS
+from tracing import span, start_trace, finish_trace
 
 # Configure logging with UTF-8 encoding
 logging.basicConfig(
@@ -46,89 +55,62 @@ KEYWORDS = [
     "NEAR", "Overtake", "Peaq", "UXLINK", "Maplestory Universe", "Sunrise"
 ]
 
+# Compiled once at import; contains_keywords only runs a single regex pass per tweet
+KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
+
+# Only tweets newer than this are commented on / regenerated
+RECENT_TWEET_HOURS = float(os.getenv("RECENT_TWEET_HOURS", "2"))
+RECENCY_FILTER = RecencyFilter(RECENT_TWEET_HOURS)
+
 def load_commented_tweets():
-    """Load list of already commented tweet IDs"""
-    commented_file = "commented_tweets.json"
-    if os.path.exists(commented_file):
-        with open(commented_file, 'r') as f:
-            return json.load(f)
-    return []
+    """Return the in-memory set of already commented tweet IDs (shared bot state)"""
+    return get_state().commented
 
 def save_commented_tweet(tweet_id):
     """Save a tweet ID as commented"""
-    commented_file = "commented_tweets.json"
-    commented_tweets = load_commented_tweets()
-    
-    # Add new tweet ID
-    if tweet_id not in commented_tweets:
-        commented_tweets.append(tweet_id)
-    
-    # Keep only last 1000 tweets to prevent file from growing too large
-    if len(commented_tweets) > 1000:
-        commented_tweets = commented_tweets[-1000:]
-    
-    with open(commented_file, 'w') as f:
-        json.dump(commented_tweets, f)
+    # Old IDs are evicted by the store (last 1000 / 30 days), no full-file rewrite
+    load_commented_tweets().add(tweet_id)
 
-def is_tweet_recent(tweet_timestamp):
-    """Check if tweet is from last 23 hours"""
+def is_tweet_recent(tweet_timestamp, hours=None):
+    """Check if tweet is from the last RECENT_TWEET_HOURS hours (compared in UTC)"""
+    recency = RECENCY_FILTER if hours is None else RecencyFilter(hours)
     try:
-        if not tweet_timestamp:
-            return False
-        
-        # Parse tweet timestamp (Twitter format: "Mon Jan 01 00:00:00 +0000 2024")
-        from datetime import datetime, timedelta
-        import re
-        
-        # Clean timestamp string
-        timestamp_str = str(tweet_timestamp).strip()
-        
-        # Try different timestamp formats
-        formats = [
-            "%a %b %d %H:%M:%S %z %Y",  # Twitter format
-            "%Y-%m-%d %H:%M:%S",        # Simple format
-            "%Y-%m-%dT%H:%M:%S.%fZ",    # ISO format
-        ]
-        
-        tweet_time = None
-        for fmt in formats:
-            try:
-                tweet_time = datetime.strptime(timestamp_str, fmt)
-                break
-            except:
-                continue
-        
-        if not tweet_time:
-            logger.warning(f"Could not parse timestamp: {timestamp_str}")
-            return False
-        
-        # Make timezone naive for comparison
-        if tweet_time.tzinfo:
-            tweet_time = tweet_time.replace(tzinfo=None)
-        
-        now = datetime.now()
-        twentythree_hours_ago = now - timedelta(hours=2)
-        
-        is_recent = tweet_time > twentythree_hours_ago
-        logger.info(f"Tweet time: {tweet_time}, Is recent (last 23h): {is_recent}")
+        is_recent = recency.is_recent(tweet_timestamp)
+        logger.info(f"Tweet time: {tweet_timestamp}, Is recent (last {recency.hours}h): {is_recent}")
         return is_recent
-        
     except Exception as e:
         logger.error(f"Error checking tweet timestamp: {str(e)}")
         return False
 
 def contains_keywords(text):
-    """Check if text contains any of the target keywords (case-insensitive)"""
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    for keyword in KEYWORDS:
-        if keyword.lower() in text_lower:
-            logger.info(f"Found keyword '{keyword}' in tweet text")
-            return True
+    """Check if text contains any of the target keywords (case-insensitive, whole words)"""
+    matched = KEYWORD_MATCHER.matched_keywords(text)
+    if matched:
+        logger.info(f"Found keywords {matched} in tweet text")
+        return True
     return False
 
+def pick_comment_target(username, recent_tweets, commented_tweets):
+    """First tweet worth a comment: not yet commented, recent and containing keywords"""
+    if not recent_tweets:
+        logger.info(f"No recent tweets found for @{username}")
+        return None
+    for tweet in recent_tweets:
+        tweet_id = tweet.get("id")
+        # Skip if already commented on this tweet
+        if tweet_id in commented_tweets:
+            logger.info(f"Already commented on tweet {tweet_id} by @{username}")
+            continue
+        # Skip if tweet is not recent (older than RECENT_TWEET_HOURS)
+        if not is_tweet_recent(tweet.get("timestamp")):
+            logger.info(f"Tweet by @{username} is older than {RECENT_TWEET_HOURS} hours, skipping")
+            continue
+        # Check if tweet contains keywords
+        if contains_keywords(tweet.get("text", "")):
+            return tweet
+        logger.info(f"Tweet by @{username} doesn't contain keywords, skipping")
+    return None
+
 PROJECTS = [
     {"name": "Allora", "twitter": "@AlloraNetwork", "website": "allora.network", "category": "AI + Blockchain"},
     {"name": "Spark", "twitter": "@sparkdotfi", "website": "spark.fi", "category": "Rollup Infrastructure"},
@@ -228,198 +210,545 @@ REGENERATION_ACCOUNTS = [
 ]
 
 def load_regenerated_tweets():
-    """Load list of already regenerated tweet IDs."""
-    regen_file = "regenerated_tweets.json"
-    if os.path.exists(regen_file):
-        with open(regen_file, 'r') as f:
-            return json.load(f)
-    return []
+    """Return the in-memory set of already regenerated tweet IDs (shared bot state)"""
+    return get_state().regenerated
 
 def save_regenerated_tweet(tweet_id):
     """Save a tweet ID as regenerated."""
-    regen_file = "regenerated_tweets.json"
-    regenerated = load_regenerated_tweets()
-    if tweet_id not in regenerated:
-        regenerated.append(tweet_id)
-    # Keep only last 1000 to avoid file growing too large
-    if len(regenerated) > 1000:
-        regenerated = regenerated[-1000:]
-    with open(regen_file, 'w') as f:
-        json.dump(regenerated, f)
-
-def regenerate_and_post_tweets(twitter_client, gemini_client):
-    """Fetch last tweet from specific accounts, rewrite with Gemini, and post."""
-    regenerated_tweets = load_regenerated_tweets()
-    for username in REGENERATION_ACCOUNTS:
-        try:
-            # Sadece son 2 saat içindeki tweetleri al
-            tweets = twitter_client.get_recent_tweets(username, hours=2, max_tweets=5)
-            if not tweets:
-                logger.info(f"No recent tweets found for @{username}")
-                continue
-            for tweet in tweets:
-                tweet_id = tweet.get("id")
-                tweet_text = tweet.get("text", "")
-                # RT olanları atla
-                if tweet.get("is_retweet") or tweet_text.strip().lower().startswith("rt "):
-                    logger.info(f"Skipping retweet by @{username}")
-                    continue
-                if tweet_id in regenerated_tweets:
-                    logger.info(f"Already regenerated tweet {tweet_id} by @{username}")
-                    continue
-                if not tweet_text or len(tweet_text) < 5:
-                    logger.info(f"Tweet by @{username} is too short or empty, skipping")
-                    continue
-                prompt = f"Rewrite the following tweet in different words, keeping the same meaning, as a new tweet:\n\n{tweet_text}"
-                new_tweet = gemini_client.generate_project_tweet({"text": prompt})
-                if not new_tweet or len(new_tweet.strip()) < 5:
-                    logger.info(f"Gemini did not return a valid tweet for @{username}")
-                    continue
-                success = twitter_client.post_tweet(new_tweet.strip())
-                if success:
-                    logger.info(f"Regenerated and posted tweet for @{username}")
-                    save_regenerated_tweet(tweet_id)
-                else:
-                    logger.error(f"Failed to post regenerated tweet for @{username}")
-                time.sleep(random.uniform(10, 20))  # Anti-spam delay
-        except Exception as e:
-            logger.error(f"Error processing regeneration for @{username}: {str(e)}")
-        time.sleep(random.uniform(10, 20))  # Spam koruması
+    load_regenerated_tweets().add(tweet_id)
 
-def run_bot():
-    """Main function to run the bot tasks"""
-    try:
-        logger.info("Starting bot run")
-        
-        # Load current state
-        state_file = "bot_state.json"
-        if os.path.exists(state_file):
-            with open(state_file, 'r') as f:
-                state = json.load(f)
-        else:
-            state = {"project_index": 0, "twitter_account_index": 0}
-        
-        project_index = state["project_index"]
-        twitter_account_index = state["twitter_account_index"]
-          # Initialize clients
-        twitter_client = TwitterClient()
-        twitter_client._setup_browser()
-        gemini_client = GeminiClient()
+def is_regeneration_candidate(username, tweet, regenerated_tweets):
+    """Original, not yet regenerated tweets with some text"""
+    tweet_id = tweet.get("id")
+    tweet_text = tweet.get("text", "")
+    # RT olanları atla
+    if tweet.get("is_retweet") or tweet_text.strip().lower().startswith("rt "):
+        logger.info(f"Skipping retweet by @{username}")
+        return False
+    if tweet_id in regenerated_tweets:
+        logger.info(f"Already regenerated tweet {tweet_id} by @{username}")
+        return False
+    if not tweet_text or len(tweet_text) < 5:
+        logger.info(f"Tweet by @{username} is too short or empty, skipping")
+        return False
+    return True
 
-        # --- NEW TASK: Regenerate and post tweets from specific accounts ---
-        regenerate_and_post_tweets(twitter_client, gemini_client)
-        # --- END NEW TASK ---
+# Comment targets per batched Gemini request
+COMMENT_BATCH_SIZE = max(1, int(os.getenv("COMMENT_BATCH_SIZE", "8")))
 
-        # Post project tweets - Select 3 projects sequentially
-        selected_projects = []
-        for _ in range(5):
-            selected_projects.append(PROJECTS[project_index])
-            project_index = (project_index + 1) % len(PROJECTS)
-          # Post all tweets with one login session
-        for project in selected_projects:
+# Project tweets are generated up front, this many Gemini calls at a time
+PROJECT_GENERATION_WORKERS = int(os.getenv("PROJECT_GENERATION_WORKERS", "3"))
+PROJECT_GENERATION_TIMEOUT = float(os.getenv("PROJECT_GENERATION_TIMEOUT", "90"))
+
+class ProjectTweetBatch:
+    """Generates the tweets for the selected projects concurrently in a bounded thread pool.
+
+    All calls are submitted as soon as the batch is created, so posting only
+    waits for results that are not ready yet. result(i) gives up
+    `timeout` seconds after that project's own call started; time spent
+    queued behind the worker cap does not count.
+    """
+
+    def __init__(self, gemini_client, projects, workers=None, timeout=None):
+        self.projects = projects
+        self.workers = workers or PROJECT_GENERATION_WORKERS
+        self.timeout = timeout or PROJECT_GENERATION_TIMEOUT
+        self.created = time.monotonic()
+        self.started = {}
+        self.finished = {}
+        # Timed-out calls keep running after close() and still record their finish time
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="project-tweets")
+        self._futures = [
+            self._executor.submit(self._generate, gemini_client, index, project)
+            for index, project in enumerate(projects)
+        ]
+
+    def _generate(self, gemini_client, index, project):
+        with self._lock:
+            self.started[index] = time.monotonic()
+        try:
+            return gemini_client.generate_project_tweet(project)
+        finally:
+            with self._lock:
+                self.finished[index] = time.monotonic()
+
+    def result(self, index):
+        """Tweet text for projects[index], or None if generation failed or timed out"""
+        future = self._futures[index]
+        name = self.projects[index]['name']
+        while True:
+            started = self.started.get(index)
+            # Still queued: check back shortly, the timeout has not started yet
+            wait = 0.5 if started is None else started + self.timeout - time.monotonic()
             try:
-                tweet_content = gemini_client.generate_project_tweet(project)
-                success = twitter_client.post_tweet(tweet_content)
-                
-                if success:
-                    logger.info(f"Posted tweet about {project['name']}")
-                else:
-                    logger.error(f"Failed to post tweet about {project['name']}")
-                    
-                time.sleep(random.uniform(10, 15))  # Daha uzun bekleme
+                return future.result(timeout=max(0, wait))
+            except FutureTimeout:
+                if started is not None:
+                    logger.error(f"Generating tweet for {name} timed out after {self.timeout:.0f}s")
+                    return None
             except Exception as e:
-                logger.error(f"Error posting tweet for {project['name']}: {str(e)}")
-                # Screenshot for debugging
-                try:
-                    twitter_client.page.screenshot(path=f"error_{project['name']}.png")
-                except:
-                    pass
-        
-        # Comment on tweets - Select 15 accounts sequentially
-        selected_accounts = []
-        for _ in range(15):
-            selected_accounts.append(TWITTER_ACCOUNTS[twitter_account_index])
-            twitter_account_index = (twitter_account_index + 1) % len(TWITTER_ACCOUNTS)
-        
-        # Load already commented tweets
-        commented_tweets = load_commented_tweets()
-        
-        # Comment on all tweets with same login session
-        for username in selected_accounts:
+                logger.error(f"Generating tweet for {name} failed: {str(e)}")
+                return None
+
+    def summary(self):
+        with self._lock:
+            started, finished = dict(self.started), dict(self.finished)
+        calls = [finished[i] - started[i] for i in finished]
+        return {
+            "projects": len(self.projects),
+            "completed": len(calls),
+            "workers": self.workers,
+            "wall_seconds": round(max(finished.values()) - self.created, 2) if calls else None,
+            "call_seconds": round(sum(calls), 2),
+        }
+
+    def close(self):
+        # Don't wait for calls that timed out; their results are simply dropped
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def record_post(kind, success):
+    """Count a post attempt (kind: tweet, regenerated, comment) and whether it went through"""
+    get_metrics().inc("bot_posts_attempted_total", kind=kind)
+    if success:
+        get_metrics().inc("bot_posts_succeeded_total", kind=kind)
+
+
+def record_run(status, started):
+    get_metrics().inc("bot_runs_total", status=status)
+    get_metrics().observe("bot_run_duration_seconds", time.monotonic() - started, PHASE_BUCKETS, status=status)
+
+
+@contextmanager
+def run_phase(phase):
+    """Time a run phase in the metrics and as a trace span"""
+    with span("phase", phase=phase), get_metrics().timer("bot_phase_duration_seconds", PHASE_BUCKETS, phase=phase):
+        yield
+
+
+def report_gemini_usage(gemini_client, run_id):
+    """Log the run's Gemini cache/limiter/token reports and append its metrics to metrics/gemini_runs.jsonl"""
+    logger.info(f"Gemini response cache: {gemini_client.cache.summary()}")
+    logger.info(f"Gemini rate limiter: {gemini_client.limiter.summary()}")
+    logger.info(f"Prompt tokens per template: {gemini_client.prompts.report()}")
+    logger.info(f"Gemini usage per method: {gemini_client.usage_report()}")
+    gemini_client.write_run_metrics(run_id)
+
+
+class SyncSteps:
+    """The browser, Gemini and pacing steps of a run on the sync TwitterClient.
+
+    The run itself (_run_tasks and the phases below it) is written once as
+    coroutines against these steps. Every step here finishes before it
+    returns, so those coroutines never suspend and run_sync() drives them
+    on the calling thread. AsyncSteps is the asyncio twin.
+    """
+
+    def __init__(self, twitter_client):
+        self.client = twitter_client
+
+    @property
+    def page(self):
+        return adapt(self.client.page)
+
+    async def reads(self, usernames, known_ids):
+        """(username, tweets) for each account in order, one profile at a time"""
+        for username in usernames:
+            yield username, self.client.get_recent_tweets(username, hours=RECENT_TWEET_HOURS, max_tweets=5,
+                                                          known_ids=known_ids)
+            time.sleep(random.uniform(10, 20))  # Spam koruması
+
+    async def timelines(self, usernames, known_ids):
+        """(username, tweets) as each profile finishes loading on the pooled read-only pages"""
+        for item in self.client.iter_recent_tweets(usernames, hours=RECENT_TWEET_HOURS, max_tweets=5,
+                                                   known_ids=known_ids):
+            yield item
+
+    async def generate(self, func, *args, what, calls=1):
+        return func(*args)
+
+    async def project_tweet(self, project_tweets, index):
+        return project_tweets.result(index)
+
+    async def post_tweet(self, content, what):
+        return self.client.post_tweet(content)
+
+    async def post_comment(self, tweet_url, comment, what):
+        return self.client.post_comment(tweet_url, comment)
+
+    async def sleep(self, low, high):
+        time.sleep(random.uniform(low, high))
+
+
+# asyncio orchestrator (BOT_ASYNC=1): per-task timeouts in seconds
+ASYNC_READ_TIMEOUT = float(os.getenv("ASYNC_READ_TIMEOUT", "45"))
+ASYNC_GENERATE_TIMEOUT = float(os.getenv("ASYNC_GENERATE_TIMEOUT", "90"))
+ASYNC_POST_TIMEOUT = float(os.getenv("ASYNC_POST_TIMEOUT", "240"))
+
+async def _bounded(awaitable, timeout, what):
+    """Await with a timeout; a timeout or error only fails this task (logged, returns None)"""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"{what} timed out after {timeout:.0f}s")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"{what} failed: {str(e)}")
+    return None
+
+class AsyncSteps:
+    """SyncSteps for the AsyncTwitterClient.
+
+    The next profile is already loading while the caller works on the
+    current one, Gemini calls run in worker threads so the browser keeps
+    going, and every read, generation and post has its own timeout, so one
+    stuck task only skips that item.
+    """
+
+    def __init__(self, twitter_client):
+        self.client = twitter_client
+
+    @property
+    def page(self):
+        return self.client.page
+
+    async def _read_ahead(self, usernames, known_ids, pause=None):
+        """Yield (username, tweets) in order; the next profile is already loading while the caller works on this one.
+
+        With pause=(low, high) each read starts that many seconds (random)
+        after the previous one finished, so the spacing holds while the
+        caller works on the current profile.
+        """
+        async def read(username, delay):
+            if delay:
+                await asyncio.sleep(delay)
+            return await _bounded(
+                self.client.get_recent_tweets(username, hours=RECENT_TWEET_HOURS, max_tweets=5, known_ids=known_ids),
+                ASYNC_READ_TIMEOUT, f"Reading @{username}")
+
+        def start(i):
+            delay = random.uniform(*pause) if pause and i else 0
+            return asyncio.create_task(read(usernames[i], delay))
+
+        pending = start(0) if usernames else None
+        try:
+            for i, username in enumerate(usernames):
+                tweets = await pending
+                pending = start(i + 1) if i + 1 < len(usernames) else None
+                yield username, tweets or []
+        finally:
+            if pending and not pending.done():
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+
+    def reads(self, usernames, known_ids):
+        """(username, tweets) one account after another, 10-20s apart like SyncSteps.reads"""
+        return self._read_ahead(usernames, known_ids, pause=(10, 20))  # Spam koruması
+
+    def timelines(self, usernames, known_ids):
+        """(username, tweets) with the next profile loading ahead; no per-account pause, like the sync page pool"""
+        return self._read_ahead(usernames, known_ids)
+
+    async def generate(self, func, *args, what, calls=1):
+        # Gemini's client is blocking; on timeout the thread finishes in the background and its result is dropped
+        return await _bounded(asyncio.to_thread(func, *args), ASYNC_GENERATE_TIMEOUT * calls, what)
+
+    async def project_tweet(self, project_tweets, index):
+        return await asyncio.to_thread(project_tweets.result, index)
+
+    async def post_tweet(self, content, what):
+        return await _bounded(self.client.post_tweet(content), ASYNC_POST_TIMEOUT, what)
+
+    async def post_comment(self, tweet_url, comment, what):
+        return await _bounded(self.client.post_comment(tweet_url, comment), ASYNC_POST_TIMEOUT, what)
+
+    async def sleep(self, low, high):
+        await asyncio.sleep(random.uniform(low, high))
+
+
+async def _regenerate(steps, gemini_client, run_id=None):
+    regenerated_tweets = load_regenerated_tweets()
+    reads = steps.reads(REGENERATION_ACCOUNTS, regenerated_tweets)
+    try:
+        # Sadece son RECENT_TWEET_HOURS saat içindeki tweetler okunur
+        async for username, tweets in reads:
             try:
-                # Get recent tweets (not just latest) to avoid pin tweets
-                recent_tweets = twitter_client.get_recent_tweets(username, hours=2, max_tweets=5)
-                
-                if not recent_tweets:
+                if not tweets:
                     logger.info(f"No recent tweets found for @{username}")
                     continue
-                
-                # Process each recent tweet
-                for tweet in recent_tweets:
-                    tweet_id = tweet.get("id")
-                    tweet_text = tweet.get("text", "")
-                    tweet_timestamp = tweet.get("timestamp")
-                    
-                    # Skip if already commented on this tweet
-                    if tweet_id in commented_tweets:
-                        logger.info(f"Already commented on tweet {tweet_id} by @{username}")
+                for tweet in tweets:
+                    if not is_regeneration_candidate(username, tweet, regenerated_tweets):
                         continue
-                    
-                    # Skip if tweet is not recent (older than 23 hours)
-                    if not is_tweet_recent(tweet_timestamp):
-                        logger.info(f"Tweet by @{username} is older than 23 hours, skipping")
+                    new_tweet = await steps.generate(gemini_client.rewrite_tweet, tweet.get("text", ""),
+                                                     what=f"Rewriting tweet {tweet.get('id')}")
+                    if not new_tweet or len(new_tweet.strip()) < 5:
+                        logger.info(f"Gemini did not return a valid tweet for @{username}")
                         continue
-                    
-                    # Check if tweet contains keywords
-                    if contains_keywords(tweet_text):
-                        comment = gemini_client.generate_comment(username, tweet)
-                        success = twitter_client.post_comment(tweet.get("url"), comment)
-                        
-                        if success:
-                            # Save tweet ID as commented
-                            save_commented_tweet(tweet_id)
-                            logger.info(f"Commented on recent tweet by @{username} (contained keywords)")
-                        else:
-                            logger.error(f"Failed to comment on tweet by @{username}")
-                        
-                        # Only comment on one tweet per user to avoid spam
-                        break
+                    success = await steps.post_tweet(new_tweet.strip(), f"Posting regenerated tweet for @{username}")
+                    record_post("regenerated", success)
+                    if success:
+                        logger.info(f"Regenerated and posted tweet for @{username}")
+                        save_regenerated_tweet(tweet.get("id"))
+                        gemini_client.mark_posted(new_tweet)
+                        if run_id is not None:
+                            get_state().increment_run(run_id, "tweets_regenerated")
                     else:
-                        logger.info(f"Tweet by @{username} doesn't contain keywords, skipping")
-                
-                time.sleep(random.uniform(3, 7))
-                
+                        logger.error(f"Failed to post regenerated tweet for @{username}")
+                    await steps.sleep(10, 20)  # Anti-spam delay
+            except Exception as e:
+                logger.error(f"Error processing regeneration for @{username}: {str(e)}")
+    finally:
+        await reads.aclose()
+
+def regenerate_and_post_tweets(twitter_client, gemini_client, run_id=None):
+    """Fetch last tweet from specific accounts, rewrite with Gemini, and post."""
+    run_sync(_regenerate(SyncSteps(twitter_client), gemini_client, run_id))
+
+async def regenerate_and_post_tweets_async(twitter_client, gemini_client, run_id=None):
+    """regenerate_and_post_tweets with the next profile read overlapping the rewrite and post"""
+    await _regenerate(AsyncSteps(twitter_client), gemini_client, run_id)
+
+async def _post_projects(steps, gemini_client, state, run_id, selected_projects, project_tweets, project_index):
+    posting_started = time.monotonic()
+    for index, project in enumerate(selected_projects):
+        try:
+            tweet_content = await steps.project_tweet(project_tweets, index)
+            if not tweet_content:
+                logger.error(f"No tweet generated for {project['name']}, skipping")
+                continue
+            success = await steps.post_tweet(tweet_content, f"Posting tweet about {project['name']}")
+            record_post("tweet", success)
+
+            if success:
+                logger.info(f"Posted tweet about {project['name']}")
+                state.increment_run(run_id, "projects_posted")
+                gemini_client.mark_posted(tweet_content)
+            else:
+                logger.error(f"Failed to post tweet about {project['name']}")
+
+            await steps.sleep(10, 15)  # Daha uzun bekleme
+        except Exception as e:
+            logger.error(f"Error posting tweet for {project['name']}: {str(e)}")
+            # Screenshot for debugging
+            try:
+                await steps.client.diagnostics.capture_failure_async(steps.page, f"error_{project['name']}", error=e)
+            except Exception:
+                pass
+        finally:
+            # Advance the rotation as soon as the project is handled so a restart resumes here
+            project_index = (project_index + 1) % len(PROJECTS)
+            state.set_rotation_index("project_index", project_index)
+    logger.info(
+        f"Project tweets: generation {project_tweets.summary()}, "
+        f"posting took {time.monotonic() - posting_started:.1f}s"
+    )
+
+async def _comment_on_accounts(steps, gemini_client, state, run_id, twitter_account_index):
+    # Comment on tweets - Select 15 accounts sequentially
+    selected_accounts = [TWITTER_ACCOUNTS[(twitter_account_index + i) % len(TWITTER_ACCOUNTS)] for i in range(15)]
+
+    # Load already commented tweets
+    commented_tweets = load_commented_tweets()
+
+    # The timelines load ahead of the caller (pooled or read-ahead pages); the comment targets found
+    # there are written in batched Gemini requests and then posted one at a time on the main page
+    targets = {}
+    timelines = steps.timelines(selected_accounts, commented_tweets)
+    try:
+        async for username, recent_tweets in timelines:
+            # Only comment on one tweet per user to avoid spam
+            tweet = pick_comment_target(username, recent_tweets, commented_tweets)
+            if tweet:
+                targets[username] = tweet
+    finally:
+        await timelines.aclose()
+
+    # Batches follow account order, so comments line up with the posting loop below
+    ordered_targets = [(username, targets[username]) for username in selected_accounts if username in targets]
+    comments = {}
+    for start in range(0, len(ordered_targets), COMMENT_BATCH_SIZE):
+        batch = ordered_targets[start:start + COMMENT_BATCH_SIZE]
+        try:
+            batch_comments = await steps.generate(gemini_client.generate_comments_batch, batch,
+                                                  what=f"Generating {len(batch)} comments", calls=len(batch))
+        except Exception as e:
+            logger.error(f"Generating {len(batch)} comments failed: {str(e)}")
+            batch_comments = None
+        for (username, _), comment in zip(batch, batch_comments or []):
+            comments[username] = comment
+
+    # The rotation index only moves here, in account order, so it always points at the first
+    # account whose comment has not been handled yet and a restart resumes there
+    for username in selected_accounts:
+        tweet = targets.get(username)
+        if tweet is not None:
+            comment = comments.get(username)
+            try:
+                if not comment:
+                    # Generation gave up (error budget, rate limit); better no comment than a canned one
+                    logger.error(f"No comment generated for @{username}, skipping")
+                    success = None
+                else:
+                    success = await steps.post_comment(tweet.get("url"), comment, f"Commenting on @{username}")
+                    record_post("comment", success)
+
+                if success:
+                    # Save tweet ID as commented
+                    save_commented_tweet(tweet.get("id"))
+                    gemini_client.mark_posted(comment)
+                    state.increment_run(run_id, "comments_posted")
+                    logger.info(f"Commented on recent tweet by @{username} (contained keywords)")
+                elif success is not None:
+                    logger.error(f"Failed to comment on tweet by @{username}")
+
+                # Pace the writes; profile reads are throttled by the page pool / read-ahead instead
+                if success is not None:
+                    await steps.sleep(3, 7)
+
             except Exception as e:
                 logger.error(f"Error processing tweets for @{username}: {str(e)}")
+        twitter_account_index = (twitter_account_index + 1) % len(TWITTER_ACCOUNTS)
+        state.set_rotation_index("twitter_account_index", twitter_account_index)
+
+async def _run_tasks(steps, gemini_client, state, run_id):
+    """The tasks of one bot run, shared by run_bot and run_bot_async"""
+    rotation = state.get_rotation()
+
+    # Post project tweets - Select 5 projects sequentially
+    selected_projects = [PROJECTS[(rotation.project_index + i) % len(PROJECTS)] for i in range(5)]
+    # Start generating them right away; they are ready by the time regeneration is done
+    project_tweets = ProjectTweetBatch(gemini_client, selected_projects)
+    try:
+        # --- NEW TASK: Regenerate and post tweets from specific accounts ---
+        with run_phase("regenerate"):
+            await _regenerate(steps, gemini_client, run_id)
+        # --- END NEW TASK ---
+
+        # Post all tweets with one login session
+        with run_phase("projects"):
+            await _post_projects(steps, gemini_client, state, run_id, selected_projects, project_tweets,
+                                 rotation.project_index)
+    finally:
+        project_tweets.close()
+
+    with run_phase("comments"):
+        await _comment_on_accounts(steps, gemini_client, state, run_id, rotation.twitter_account_index)
+
+    # --- YENİ GÖREV: Belirli hesapların tweetlerini yeniden üret ve paylaş ---
+    with run_phase("regenerate"):
+        await _regenerate(steps, gemini_client, run_id)
+    # --- YENİ GÖREV SONU ---
+
+def run_bot(twitter_client=None):
+    """Main function to run the bot tasks.
+
+    A twitter_client passed in (e.g. from BrowserService) is already set up;
+    it is left open and its owner ends the run with end_run().
+    """
+    run_started = time.monotonic()
+    owns_client = twitter_client is None
+    try:
+        logger.info("Starting bot run")
         
-        # --- YENİ GÖREV: Belirli hesapların tweetlerini yeniden üret ve paylaş ---
-        regenerate_and_post_tweets(twitter_client, gemini_client)
-        # --- YENİ GÖREV SONU ---
-
-        # Save updated state
-        state = {"project_index": project_index, "twitter_account_index": twitter_account_index}
-        with open(state_file, 'w') as f:
-            json.dump(state, f)
+        # Load current state
+        state = get_state()
+        run_id = state.start_run()
+        start_trace(run_id)
+        # Initialize clients
+        if owns_client:
+            twitter_client = TwitterClient()
+            with span("browser_setup"):
+                twitter_client._setup_browser()
+        gemini_client = GeminiClient()
+
+        run_sync(_run_tasks(SyncSteps(twitter_client), gemini_client, state, run_id))
+
+        state.finish_run(run_id, "success")
+        record_run("success", run_started)
+        report_gemini_usage(gemini_client, run_id)
             
         # Close client
-        twitter_client.close()
+        if owns_client:
+            with span("browser_teardown"):
+                twitter_client.close()
+        finish_trace("ok")
         logger.info("Bot run completed successfully")
     
     except Exception as e:
         logger.error(f"Bot run failed with error: {str(e)}")
+        record_run("failed", run_started)
+        # Open spans are closed as unfinished, so the trace shows where the run stopped
+        finish_trace("error")
+        if 'run_id' in locals():
+            state.finish_run(run_id, "failed", str(e))
+            if 'gemini_client' in locals():
+                gemini_client.write_run_metrics(run_id)
         # Try to close browser if it's open
         try:
-            if 'twitter_client' in locals():
+            if owns_client and twitter_client:
                 twitter_client.close()
         except:
             pass
 
+async def run_bot_async():
+    """asyncio version of run_bot, on AsyncTwitterClient and AsyncSteps.
+
+    Gemini calls run in worker threads while the browser loads the next
+    profile on its read-only page. Raises LoginRequiredError when the saved
+    session cannot be used; the client has already shut its browser down.
+    """
+    run_started = time.monotonic()
+    twitter_client = AsyncTwitterClient()
+    await twitter_client.start()
+
+    state = get_state()
+    run_id = state.start_run()
+    start_trace(run_id)
+    trace_outcome = "error"
+    try:
+        logger.info("Starting async bot run")
+        gemini_client = GeminiClient()
+        await _run_tasks(AsyncSteps(twitter_client), gemini_client, state, run_id)
+
+        state.finish_run(run_id, "success")
+        record_run("success", run_started)
+        report_gemini_usage(gemini_client, run_id)
+        logger.info("Async bot run completed successfully")
+        trace_outcome = "ok"
+    except asyncio.CancelledError:
+        state.finish_run(run_id, "cancelled")
+        record_run("cancelled", run_started)
+        trace_outcome = "cancelled"
+        raise
+    except Exception as e:
+        logger.error(f"Async bot run failed with error: {str(e)}")
+        record_run("failed", run_started)
+        state.finish_run(run_id, "failed", str(e))
+        if 'gemini_client' in locals():
+            gemini_client.write_run_metrics(run_id)
+    finally:
+        with span("browser_teardown"):
+            await twitter_client.close()
+        finish_trace(trace_outcome)
+
+def run_bot_with_asyncio():
+    """Blocking entry point for the asyncio orchestrator; uses the sync bot when a login is needed"""
+    try:
+        asyncio.run(run_bot_async())
+    except LoginRequiredError as e:
+        logger.warning(f"Async run needs a fresh login ({str(e)}), running the sync bot instead")
+        run_bot()
+
 def main():
     """Run the bot once when called by task scheduler"""
     logger.info("Bot started for a single run (managed by task scheduler)")
     
     # Run once and exit
-    run_bot()
+    if os.getenv("BOT_ASYNC", "0") == "1":
+        run_bot_with_asyncio()
+    else:
+        run_bot()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
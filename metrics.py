@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+# Run phases and whole runs take minutes (anti-spam sleeps included)
+PHASE_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative-bucket layout, like Prometheus)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (max for the +Inf bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self):
+        total, result = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """In-process counters and histograms keyed by name + labels.
+
+    A registry created with a parent forwards every update to it, so a
+    per-run registry and the process-wide one (get_metrics()) are filled by
+    the same calls.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        if self.parent:
+            self.parent.inc(name, value, **labels)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+        if self.parent:
+            self.parent.observe(name, value, buckets, **labels)
+
+    @contextmanager
+    def timer(self, name, buckets=LATENCY_BUCKETS, **labels):
+        """Observe the duration of the with-block in seconds, also when it raises"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, buckets, **labels)
+
+    def counter(self, name, **labels):
+        return self.counters.get(_key(name, labels), 0)
+
+    def histogram(self, name, **labels):
+        return self.histograms.get(_key(name, labels))
+
+    def snapshot(self):
+        """{"counters": {name: [{labels, value}]}, "histograms": {name: [{labels, ...stats}]}}"""
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                histograms.setdefault(name, []).append(dict(histogram.snapshot(), labels=dict(labels)))
+        return {"counters": counters, "histograms": histograms}
+
+    def write(self, filename, **extra):
+        """Append the snapshot as one JSON line to METRICS_DIR/filename"""
+        directory = os.getenv("METRICS_DIR", DEFAULT_METRICS_DIR)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, filename)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(extra, time=time.time(), **self.snapshot())) + "\n")
+            return path
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {filename}: {str(e)}")
+            return None
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(registry, gauges=()):
+    """Prometheus text exposition (version 0.0.4) of a registry plus (name, value, labels) gauges"""
+    lines = []
+    with registry._lock:
+        counters = sorted(registry.counters.items())
+        histograms = sorted(((key, h.cumulative(), h.sum, h.count) for key, h in registry.histograms.items()),
+                            key=lambda item: item[0])
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        declare(name, "counter")
+        lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(value)}")
+    for (name, labels), buckets, total, count in histograms:
+        declare(name, "histogram")
+        labels = dict(labels)
+        for bound, cumulative in buckets:
+            lines.append(f"{name}_bucket{_format_labels(dict(labels, le=_format_value(bound)))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    for name, value, labels in gauges:
+        declare(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def process_memory():
+    """RSS in bytes of this process, its Chromium descendants and the Playwright driver, from /proc.
+
+    Chromium's processes share memory, so their summed RSS overstates the
+    real footprint a bit; it is still the number that hits the container
+    limit first. Everything is 0 where /proc does not exist.
+    """
+    memory = {"python": _rss_bytes("self"), "chromium": 0, "chromium_processes": 0, "driver": 0}
+    children = {}
+    names = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return memory
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces and parentheses; the fields after the last ")" are fixed
+        end = stat.rfind(")")
+        pid, ppid = int(entry), int(stat[end + 2:].split()[1])
+        names[pid] = stat[stat.find("(") + 1:end]
+        children.setdefault(ppid, []).append(pid)
+
+    pending = list(children.get(os.getpid(), []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        name = names.get(pid, "")
+        if "chrom" in name or "headless" in name:
+            memory["chromium"] += _rss_bytes(pid)
+            memory["chromium_processes"] += 1
+        elif name == "node":
+            memory["driver"] += _rss_bytes(pid)
+    return memory
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """Process-wide registry, cumulative across runs"""
+    return _metrics
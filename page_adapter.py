@@ -0,0 +1,96 @@
+"""Run flows written against the async_playwright API on sync Playwright objects.
+
+A flow is a coroutine that awaits page methods (`await page.goto(...)`).
+Given an async page it runs on the event loop as usual; given a sync page
+wrapped in SyncAdapter, every awaited call has already finished by the time
+it is awaited, so run_sync() drives the whole coroutine with a single
+send() and no event loop.
+
+That only holds while the flow sticks to what the adapter can mirror:
+
+- Awaiting anything that really suspends (asyncio.sleep, a future, an
+  async page) inside a flow run by run_sync() raises RuntimeError. Awaiting
+  another flow coroutine is fine, as long as it follows the same rules.
+- Methods that are plain calls in the async API as well must be listed in
+  PLAIN_METHODS; any other method is treated as awaitable. Those returning
+  Locators or event context managers (UNSUPPORTED_METHODS) cannot be
+  mirrored and raise TypeError; shared flows use selector-based page
+  methods instead.
+"""
+
+# Methods that are plain (not awaited) calls in the async Playwright API as well
+PLAIN_METHODS = frozenset({
+    "on", "once", "remove_listener", "is_closed", "set_default_timeout", "set_default_navigation_timeout",
+})
+
+# Synchronous in the async API too, but returning objects (Locator, FrameLocator, event context
+# managers) whose own methods would need adapting; not available on a SyncAdapter
+UNSUPPORTED_METHODS = frozenset({
+    "locator", "frame_locator", "get_by_role", "get_by_text", "get_by_label", "get_by_placeholder",
+    "get_by_alt_text", "get_by_title", "get_by_test_id",
+    "expect_event", "expect_response", "expect_request", "expect_navigation", "expect_popup",
+})
+
+
+class _Done:
+    """Awaitable whose result is already there: awaiting it returns the value without suspending"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return self.value
+        yield  # makes __await__ a generator
+
+
+class SyncAdapter:
+    """Gives a sync Playwright object (page, response) the shape of its async_playwright twin.
+
+    Every method call runs the sync call right away and returns an already
+    finished awaitable, so a flow written against the async API can
+    `await page.goto(...)` on either kind of page. Properties (page.url)
+    pass through unchanged, as they do in the async API.
+    """
+
+    __slots__ = ("target",)
+
+    def __init__(self, target):
+        self.target = target
+
+    def __getattr__(self, name):
+        if name in UNSUPPORTED_METHODS:
+            raise TypeError(f"{name}() cannot be shared through SyncAdapter; use a selector-based page method")
+        attribute = getattr(self.target, name)
+        if not callable(attribute) or name in PLAIN_METHODS:
+            return attribute
+
+        def call(*args, **kwargs):
+            return _Done(attribute(*args, **kwargs))
+        return call
+
+
+def adapt(target):
+    """SyncAdapter around a sync Playwright object (returned as is when it already is one)"""
+    return target if isinstance(target, SyncAdapter) else SyncAdapter(target)
+
+
+def adapt_like(page, target):
+    """Wrap `target` the same way `page` is wrapped, e.g. a response delivered by page.on()"""
+    return SyncAdapter(target) if isinstance(page, SyncAdapter) else target
+
+
+def run_sync(coroutine):
+    """Run a flow coroutine whose awaits are all SyncAdapter calls and return its result.
+
+    Such a coroutine never suspends, so one send() runs it to the end on
+    the calling thread; no event loop is involved. Awaiting anything else
+    (asyncio.sleep, an async page) is a bug in the caller and raises.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError(f"{coroutine.__qualname__} awaited something that is not a sync Playwright call")
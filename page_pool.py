@@ -0,0 +1,134 @@
+import os
+import time
+import logging
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class NavigationRateLimiter:
+    """Spaces navigation starts at least 1/rate seconds apart, across all pages"""
+
+    def __init__(self, rate):
+        self.min_interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._last = 0.0
+
+    def delay(self):
+        """Seconds until the next navigation may start"""
+        return max(0.0, self._last + self.min_interval - time.monotonic())
+
+    def acquire(self):
+        self._last = max(time.monotonic(), self._last + self.min_interval)
+
+
+class PagePool:
+    """Bounded set of extra pages in a browser context for read-only work.
+
+    The sync Playwright API is single-threaded, but pages load on their own
+    once a navigation has started. run() starts up to `size` jobs (at most
+    `per_host` against the same host, navigations spaced by the global rate
+    limiter), then polls every in-flight page and yields each result as soon
+    as it is ready. Playwright events keep being dispatched while the pool
+    pumps with wait_for_timeout(), and also while the caller handles a
+    yielded result on another page, so write actions can stay serialized on
+    the client's main page.
+    """
+
+    def __init__(self, context, size=None, per_host=None, rate=None, poll_interval=0.05):
+        self.context = context
+        self.size = max(1, size or int(os.getenv("PAGE_POOL_SIZE", "3")))
+        # Every profile job targets twitter.com, so a cap equal to the pool size would never apply
+        self.per_host = max(1, per_host or int(os.getenv("PAGE_POOL_PER_HOST", "2")))
+        if rate is None:
+            rate = float(os.getenv("NAVIGATIONS_PER_SECOND", "1"))
+        self.limiter = NavigationRateLimiter(rate)
+        self.poll_interval = poll_interval
+        self._idle = []
+        self._pages = []
+        self.stats = Counter()
+
+    def _acquire_page(self):
+        if self._idle:
+            return self._idle.pop()
+        page = self.context.new_page()
+        self._pages.append(page)
+        return page
+
+    def _pump(self, seconds):
+        # Any page works: waiting on one dispatches the events of all of them
+        page = self._pages[0] if self._pages else None
+        if page is not None:
+            page.wait_for_timeout(max(1, int(seconds * 1000)))
+        else:
+            time.sleep(seconds)
+
+    def run(self, jobs, start, poll, timeout=20):
+        """Run jobs concurrently, yielding (item, result, error) in completion order.
+
+        jobs is an iterable of (url, item). start(page, url, item) begins the
+        navigation and returns a per-job state; poll(page, item, state,
+        timed_out) returns None while the job is still loading, otherwise its
+        result. With timed_out=True poll must return a final result. Errors
+        raised by start/poll end only that job.
+        """
+        pending = deque(jobs)
+        in_flight = []  # [page, url, item, state, deadline]
+        hosts = Counter()
+
+        while pending or in_flight:
+            # Start as many jobs as the pool, the host cap and the rate limiter allow
+            while pending and len(in_flight) < self.size and self.limiter.delay() == 0:
+                index = next((i for i, (url, _) in enumerate(pending)
+                              if hosts[urlsplit(url).hostname or ""] < self.per_host), None)
+                if index is None:
+                    break
+                url, item = pending[index]
+                del pending[index]
+                page = self._acquire_page()
+                self.limiter.acquire()
+                try:
+                    state = start(page, url, item)
+                except Exception as e:
+                    logger.error(f"Could not start {url}: {str(e)}")
+                    self._idle.append(page)
+                    self.stats["errors"] += 1
+                    yield item, None, e
+                    continue
+                hosts[urlsplit(url).hostname or ""] += 1
+                in_flight.append([page, url, item, state, time.monotonic() + timeout])
+                self.stats["started"] += 1
+                self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], len(in_flight))
+
+            finished = None
+            for job in in_flight:
+                page, url, item, state, deadline = job
+                timed_out = time.monotonic() >= deadline
+                try:
+                    result = poll(page, item, state, timed_out)
+                    error = None
+                except Exception as e:
+                    result, error = None, e
+                    logger.error(f"Error reading {url}: {str(e)}")
+                if result is not None or error is not None or timed_out:
+                    finished = (job, result, error)
+                    break
+
+            if finished is None:
+                self._pump(self.poll_interval if in_flight else max(self.poll_interval, self.limiter.delay()))
+                continue
+
+            job, result, error = finished
+            in_flight.remove(job)
+            hosts[urlsplit(job[1]).hostname or ""] -= 1
+            self._idle.append(job[0])
+            self.stats["errors" if error else "completed"] += 1
+            yield job[2], result, error
+
+    def close(self):
+        for page in self._pages:
+            try:
+                page.close()
+            except Exception as e:
+                logger.warning(f"Could not close pooled page: {str(e)}")
+        self._pages, self._idle = [], []
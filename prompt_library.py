@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import namedtuple, defaultdict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+# Rough estimate for English prose; good enough to budget and compare prompts before sending
+CHARS_PER_TOKEN = 4
+_TEMPLATE_FILE = re.compile(r"^(?P<name>[a-z0-9_]+)\.v(?P<version>\d+)\.txt$")
+
+# Per-template defaults over PROMPT_TOKEN_BUDGET: comment_batch carries up to COMMENT_BATCH_SIZE
+# tweets with their own persona/style/strategy/tone lines, several times a single comment prompt
+DEFAULT_BUDGETS = {"comment_batch": 8000}
+
+RenderedPrompt = namedtuple("RenderedPrompt", "name version text estimated_tokens")
+
+
+class PromptBudgetExceeded(Exception):
+    """A rendered prompt is larger than its per-call token budget"""
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class PromptLibrary:
+    """Versioned prompt templates from prompts/<name>.v<N>.txt, read once.
+
+    The highest version of each template is used unless PROMPT_VERSIONS pins
+    one ('{"comment": 1}'). render() fills a template with str.format,
+    estimates its token count and refuses prompts over the per-call budget
+    (PROMPT_TOKEN_BUDGET, or DEFAULT_BUDGETS / PROMPT_TOKEN_BUDGETS per
+    template).
+    record_usage() adds up prompt and response tokens per template for
+    report().
+    """
+
+    def __init__(self, directory=DEFAULT_PROMPT_DIR, budget=None, budgets=None, pinned=None):
+        self.directory = directory
+        self.budget = budget or int(os.getenv("PROMPT_TOKEN_BUDGET", "2000"))
+        self.budgets = dict(DEFAULT_BUDGETS, **(budgets if budgets is not None else self._env_json("PROMPT_TOKEN_BUDGETS")))
+        pinned = pinned if pinned is not None else self._env_json("PROMPT_VERSIONS")
+        self.templates = self._load(pinned)
+        self._lock = threading.Lock()
+        self.usage = defaultdict(lambda: {"calls": 0, "prompt_tokens": 0, "response_tokens": 0,
+                                          "estimated_prompt_tokens": 0, "estimated_calls": 0, "rejected": 0})
+
+    @staticmethod
+    def _env_json(name):
+        try:
+            return json.loads(os.getenv(name, "{}"))
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid {name}: {str(e)}")
+            return {}
+
+    def _load(self, pinned):
+        versions = defaultdict(dict)
+        for filename in os.listdir(self.directory):
+            match = _TEMPLATE_FILE.match(filename)
+            if match:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    versions[match["name"]][int(match["version"])] = f.read()
+        templates = {}
+        for name, available in versions.items():
+            version = int(pinned.get(name, max(available)))
+            if version not in available:
+                raise ValueError(f"Prompt template {name} has no version {version}")
+            templates[name] = (version, available[version])
+        logger.info(f"Loaded prompt templates: { {name: f'v{v}' for name, (v, _) in templates.items()} }")
+        return templates
+
+    def version(self, name):
+        return self.templates[name][0]
+
+    def render(self, template_name, **values):
+        version, template = self.templates[template_name]
+        text = template.format(**values)
+        tokens = estimate_tokens(text)
+        budget = self.budgets.get(template_name, self.budget)
+        if tokens > budget:
+            with self._lock:
+                self.usage[template_name]["rejected"] += 1
+            raise PromptBudgetExceeded(f"{template_name} v{version} prompt is ~{tokens} tokens, budget is {budget}")
+        return RenderedPrompt(template_name, version, text, tokens)
+
+    def record_usage(self, prompt, response_text, prompt_tokens=None, response_tokens=None):
+        """Count one call; token counts from the API win over the character estimate"""
+        with self._lock:
+            usage = self.usage[prompt.name]
+            usage["calls"] += 1
+            if prompt_tokens is None or response_tokens is None:
+                usage["estimated_calls"] += 1
+            usage["estimated_prompt_tokens"] += prompt.estimated_tokens
+            usage["prompt_tokens"] += prompt_tokens if prompt_tokens is not None else prompt.estimated_tokens
+            usage["response_tokens"] += response_tokens if response_tokens is not None else estimate_tokens(response_text or "")
+
+    def report(self):
+        """Per-template token totals, most expensive first"""
+        with self._lock:
+            rows = {name: dict(data, version=self.version(name)) for name, data in self.usage.items()}
+        return dict(sorted(rows.items(), key=lambda item: -(item[1]["prompt_tokens"] + item[1]["response_tokens"])))
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_prompt_library():
+    """Process-wide PromptLibrary (templates are read from disk once)"""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = PromptLibrary()
+        return _library
+
+
+if __name__ == "__main__":
+    # Size of every template with empty inputs: python prompt_library.py
+    library = PromptLibrary()
+    for name, (version, template) in sorted(library.templates.items()):
+        fields = {field: "" for field in re.findall(r"(?<!\{)\{(\w+)\}(?!\})", template)}
+        print(f"{name} v{version}: ~{estimate_tokens(template.format(**fields))} tokens before inputs")
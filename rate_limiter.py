@@ -0,0 +1,146 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes worth retrying: quota, server errors, gateway timeouts
+RETRYABLE_CODES = (429, 500, 502, 503, 504)
+_RETRY_DELAY_PATTERNS = (
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)"),
+    re.compile(r"retry in\s+([\d.]+)\s*s", re.IGNORECASE),
+)
+
+
+class GeminiUnavailable(Exception):
+    """A Gemini call gave up: retries exhausted, retry delay too long or error budget spent"""
+
+
+def error_status(error):
+    code = getattr(error, "code", None)
+    # google.api_core exceptions carry the HTTP status as .code
+    if isinstance(code, int):
+        return code
+    text = str(error)
+    if "429" in text or "quota" in text.lower() or "rate limit" in text.lower():
+        return 429
+    return None
+
+
+def retry_delay_from_error(error):
+    """Server-suggested wait in seconds from a 429 response, if it has one"""
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    text = str(error)
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate_per_minute` tokens refill continuously, up to `burst`"""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute // 6)))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class GeminiRateLimiter:
+    """Client-side throttling and retries for Gemini calls.
+
+    Every attempt first takes a token from a bucket sized to the quota
+    (GEMINI_RPM requests per minute). Retryable failures back off
+    exponentially with full jitter, never shorter than the retry delay the
+    429 response asks for. A suggested delay longer than max_wait is not
+    slept through; the call gives up instead. Each failed attempt spends
+    one unit of the run's error budget (GEMINI_ERROR_BUDGET). Once it is
+    spent, calls raise GeminiUnavailable immediately, so a rate-limited run
+    posts less instead of stalling or posting fallback text.
+    """
+
+    def __init__(self, rpm=None, burst=None, max_attempts=None, error_budget=None,
+                 base_delay=2.0, max_delay=60.0, max_wait=None):
+        rpm = rpm or float(os.getenv("GEMINI_RPM", "10"))
+        self.bucket = TokenBucket(rpm, burst or (int(os.getenv("GEMINI_BURST", "0")) or None))
+        self.max_attempts = max_attempts or int(os.getenv("GEMINI_MAX_ATTEMPTS", "4"))
+        self.error_budget = error_budget if error_budget is not None else int(os.getenv("GEMINI_ERROR_BUDGET", "8"))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("GEMINI_MAX_RETRY_WAIT", "90"))
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def budget_left(self):
+        return max(0, self.error_budget - self.stats["errors"])
+
+    def _spend(self, reason):
+        with self._lock:
+            self.stats["errors"] += 1
+            self.stats[reason] += 1
+            if self.stats["errors"] == self.error_budget:
+                logger.error(f"Gemini error budget of {self.error_budget} spent, skipping further calls this run")
+
+    def call(self, func, *args, what="Gemini call", **kwargs):
+        """func(*args, **kwargs) under the rate limit with retries; raises GeminiUnavailable when giving up"""
+        for attempt in range(self.max_attempts):
+            if not self.budget_left:
+                self.stats["skipped"] += 1
+                raise GeminiUnavailable(f"{what}: error budget spent")
+            waited = self.bucket.acquire()
+            if waited:
+                self.stats["throttled"] += 1
+                self.stats["throttled_ms"] += int(waited * 1000)
+            self.stats["attempts"] += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                status = error_status(e)
+                if status not in RETRYABLE_CODES:
+                    self._spend("failed")
+                    raise
+                self._spend("rate_limited" if status == 429 else "server_errors")
+                suggested = retry_delay_from_error(e)
+                if suggested is not None and suggested > self.max_wait:
+                    raise GeminiUnavailable(f"{what}: asked to retry in {suggested:.0f}s, over the {self.max_wait:.0f}s limit") from e
+                if attempt + 1 == self.max_attempts:
+                    raise GeminiUnavailable(f"{what}: gave up after {self.max_attempts} attempts ({status})") from e
+                backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                delay = max(backoff, suggested or 0)
+                self.stats["retries"] += 1
+                logger.warning(f"{what} failed with {status}, retry {attempt + 1} in {delay:.1f}s: {str(e).splitlines()[0]}")
+                time.sleep(delay)
+
+    def summary(self):
+        stats = dict(self.stats)
+        stats["budget_left"] = self.budget_left
+        return stats
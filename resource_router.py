@@ -0,0 +1,175 @@
+import os
+import asyncio
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from metrics import get_metrics
+from page_adapter import adapt, run_sync
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font")
+DEFAULT_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "ads-twitter.com",
+    "ads-api.twitter.com",
+    "analytics.twitter.com",
+    "static.ads-twitter.com",
+)
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return tuple(default)
+    return tuple(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+class ResourceRouter:
+    """Request-routing layer on a browser context that drops heavy resources on read-only pages.
+
+    Pages registered with read_only() get media, images, fonts and analytics
+    requests aborted; every other page (compose, reply, login) keeps the full
+    rendering profile. The route is only installed while at least one page is
+    reading, so write flows are never intercepted. Request and byte counts are
+    kept for every response so the savings can be measured per run, and
+    main-frame navigations (count and latency) go to the process metrics.
+    """
+
+    def __init__(self, context, blocked_types=None, blocked_hosts=None, enabled=None):
+        self.context = context
+        self.blocked_types = set(blocked_types or _env_list("BLOCK_RESOURCE_TYPES", DEFAULT_BLOCKED_TYPES))
+        self.blocked_hosts = tuple(blocked_hosts or _env_list("BLOCK_HOSTS", DEFAULT_BLOCKED_HOSTS))
+        if enabled is None:
+            enabled = os.getenv("RESOURCE_BLOCKING", "1") != "0"
+        self.enabled = enabled
+        self._read_only_pages = set()
+        self._routed = False
+        self._lock = threading.Lock()
+        self.stats = Counter()
+        # Body size lookups in flight on an async context, kept so they are not garbage collected
+        self._size_tasks = set()
+
+    def attach(self):
+        self.context.on("response", self._on_response)
+        self.context.on("requestfinished", self._on_request_finished)
+        self.context.on("requestfailed", self._on_request_failed)
+        return self
+
+    @contextmanager
+    def read_only(self, page):
+        """Block heavy resources for requests made by `page` inside this block"""
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            self._read_only_pages.add(page)
+            install = not self._routed
+            self._routed = True
+        if install:
+            self.context.route("**/*", self._handle_route)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._read_only_pages.discard(page)
+                uninstall = self._routed and not self._read_only_pages
+                if uninstall:
+                    self._routed = False
+            if uninstall:
+                try:
+                    self.context.unroute("**/*", self._handle_route)
+                except Exception as e:
+                    logger.warning(f"Could not remove resource route: {str(e)}")
+
+    def _is_blocked_host(self, url):
+        host = urlsplit(url).hostname or ""
+        return any(host == blocked or host.endswith("." + blocked) for blocked in self.blocked_hosts)
+
+    def _request_page(self, request):
+        try:
+            return request.frame.page
+        except Exception:
+            # Service worker requests have no frame
+            return None
+
+    def block_reason(self, request):
+        """Stats key if a read-only request should be dropped, else None (counted when blocked)"""
+        if request.resource_type in self.blocked_types:
+            reason = f"blocked_{request.resource_type}"
+        elif self._is_blocked_host(request.url):
+            reason = "blocked_analytics"
+        else:
+            return None
+        self.stats[reason] += 1
+        self.stats["blocked_requests"] += 1
+        return reason
+
+    def _handle_route(self, route):
+        request = route.request
+        if self._request_page(request) in self._read_only_pages and self.block_reason(request):
+            route.abort()
+            return
+        route.continue_()
+
+    def _on_response(self, response):
+        self.stats["requests"] += 1
+
+    def _count_body(self, request):
+        # content-length is missing on compressed/chunked responses (most of X's API traffic), so the
+        # size comes from request.sizes() once the body is in: the encoded bytes actually transferred
+        if asyncio.iscoroutinefunction(request.sizes):
+            task = asyncio.get_running_loop().create_task(self._add_body_size(request))
+            self._size_tasks.add(task)
+            task.add_done_callback(self._size_tasks.discard)
+        else:
+            run_sync(self._add_body_size(adapt(request)))
+
+    async def _add_body_size(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            # The page or context closed before the sizes could be read
+            self.stats["responses_without_size"] += 1
+            return
+        self.stats["bytes"] += max(0, sizes.get("responseBodySize", 0))
+
+    def _is_page_navigation(self, request):
+        try:
+            return request.is_navigation_request() and request.frame.parent_frame is None
+        except Exception:
+            return False
+
+    def _on_request_finished(self, request):
+        self._count_body(request)
+        if not self._is_page_navigation(request):
+            return
+        get_metrics().inc("browser_navigations_total", result="ok")
+        # Milliseconds relative to startTime; -1 when the browser did not report it
+        response_end = request.timing.get("responseEnd", -1)
+        if response_end >= 0:
+            get_metrics().observe("browser_navigation_seconds", response_end / 1000)
+
+    def _on_request_failed(self, request):
+        if self._is_page_navigation(request):
+            get_metrics().inc("browser_navigations_total", result="failed")
+
+    def reset(self):
+        self.stats.clear()
+
+    def summary(self):
+        stats = dict(self.stats)
+        stats["megabytes"] = round(self.stats["bytes"] / 1_000_000, 2)
+        return stats
+
+    def log_summary(self):
+        stats = self.summary()
+        logger.info(
+            f"Network usage: {stats.get('requests', 0)} responses, {stats['megabytes']} MB "
+            f"(response bodies), {stats.get('blocked_requests', 0)} requests blocked "
+            f"(blocking {'on' if self.enabled else 'off'}): {stats}"
+        )
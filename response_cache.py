@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_cache.db")
+
+
+def fingerprint(model, template, version, inputs):
+    """Stable content address for one generation request"""
+    payload = json.dumps([model, template, version, inputs], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Disk-backed cache of generated texts, keyed by fingerprint().
+
+    Entries expire after `ttl` seconds. When the stored text exceeds
+    `max_bytes`, the least recently used entries are evicted. A generation
+    that has been posted should be invalidate()d, otherwise the next visit to
+    the same project or tweet would reuse it. Hit, miss, store and eviction
+    counters are kept per process in `stats`.
+    """
+
+    def __init__(self, path=None, ttl=None, max_bytes=None, enabled=None):
+        self.path = path or os.getenv("GEMINI_CACHE_FILE", DEFAULT_CACHE_FILE)
+        self.ttl = ttl if ttl is not None else float(os.getenv("GEMINI_CACHE_TTL_HOURS", "12")) * 3600
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("GEMINI_CACHE_MAX_MB", "5")) * 1_000_000)
+        self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.getenv("GEMINI_CACHE", "1") != "0"
+        self.enabled = enabled
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, template TEXT NOT NULL, value TEXT NOT NULL, "
+                    "size INTEGER NOT NULL, created_at REAL NOT NULL, used_at REAL NOT NULL)"
+                )
+
+    def get(self, key):
+        """Cached text for key, or None (expired entries count as misses and are dropped)"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key, template, value):
+        if not self.enabled or not value:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, template, value, size, now, now),
+            )
+            self.stats["stores"] += 1
+            self._evict(now)
+
+    def invalidate(self, key):
+        """Forget an entry, e.g. once its text has been posted"""
+        if not self.enabled:
+            return
+        with self._lock, self._conn:
+            if self._conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount:
+                self.stats["invalidations"] += 1
+
+    def _evict(self, now):
+        # Caller holds the lock inside a transaction
+        expired = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)).rowcount
+        self.stats["expired"] += expired
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY used_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def summary(self):
+        stats = dict(self.stats)
+        lookups = self.stats["hits"] + self.stats["misses"]
+        stats["hit_rate"] = round(self.stats["hits"] / lookups, 3) if lookups else None
+        if self.enabled:
+            with self._lock:
+                stats["entries"], stats["bytes"] = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return stats
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide ResponseCache, so counters add up across runs of the web worker"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import logging
+import threading
+from page_adapter import adapt, run_sync
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_stats.json")
+
+# Candidate selectors per TwitterClient action, in their original priority order
+DEFAULT_SELECTORS = {
+    "logged_in_marker": [
+        '[data-testid="SideNav_AccountSwitcher_Button"]',  # Avatar button
+        '[data-testid="tweetTextarea_0"]',  # Compose box
+        'a[aria-label*="Profile"]',
+        'div[aria-label*="Account menu"]',
+    ],
+    "compose_button": [
+        'a[href="/compose/tweet"]',
+        'a[data-testid="SideNav_NewTweet_Button"]',
+        'a[aria-label="Post"]',
+        'a[aria-label="Tweet"]',
+        'div[aria-label="Tweet"]',
+        'div[aria-label="Post"]',
+    ],
+    "tweet_textarea": [
+        'div[role="textbox"][data-testid="tweetTextarea_0"]',
+        'div[contenteditable="true"][data-testid="tweetTextarea_0"]',
+        'div[role="textbox"]',
+        'div[contenteditable="true"]',
+    ],
+    "post_button": [
+        'div[data-testid="tweetButtonInline"]',
+        'div[data-testid="tweetButton"]',
+        'div[role="button"]:has-text("Tweet")',
+        'div[role="button"]:has-text("Post")',
+    ],
+    "thread_textarea": [
+        '[data-testid="tweetTextarea_0"]',
+        'div[role="textbox"][data-testid="tweetTextarea_0"]',
+        'div[contenteditable="true"][data-testid="tweetTextarea_0"]',
+        'div[role="textbox"]',
+        'div[contenteditable="true"]',
+    ],
+    "add_button": [
+        '[data-testid="addButton"]',
+        'div[aria-label="Add"]',
+        'div[aria-label="Add post"]',
+        'div[role="button"]:has-text("Add")',
+    ],
+    "tweet_article": [
+        'article[data-testid="tweet"]',
+        '[data-testid="tweet"]',
+        'article[role="article"]',
+    ],
+    "reply_button": [
+        '[data-testid="reply"]',
+        'div[aria-label="Reply"]',
+        'div[role="button"]:has-text("Reply")',
+    ],
+    "reply_textarea": [
+        '[data-testid="tweetTextarea_0"]',
+        'div[role="textbox"]',
+        'div[contenteditable="true"]',
+    ],
+    "reply_post_button": [
+        '[data-testid="tweetButton"]',
+        'div[data-testid="tweetButtonInline"]',
+        'div[role="button"]:has-text("Reply")',
+        'div[role="button"]:has-text("Post")',
+    ],
+}
+
+
+def _in_state(selector, state):
+    """selector narrowed to elements in `state`; query_selector alone also returns hidden matches"""
+    return f"{selector} >> visible=true" if state == "visible" else selector
+
+
+class SelectorRegistry:
+    """Central, self-tuning selector lookup for TwitterClient actions.
+
+    For each action the candidate that succeeded most recently (then the one
+    with the most hits) is tried first with a single query. Only when it
+    misses are all candidates resolved at once through one combined selector
+    list, after which the matching candidate is identified. Hit counts,
+    latencies and JS fallbacks are persisted across runs so dead candidates
+    show up in report().
+    """
+
+    def __init__(self, path=DEFAULT_STATS_FILE, selectors=None):
+        self.path = path
+        self.selectors = {action: list(candidates) for action, candidates in (selectors or DEFAULT_SELECTORS).items()}
+        self._lock = threading.Lock()
+        self.stats = self._load()
+
+    def _load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load selector stats {self.path}: {str(e)}")
+        return {}
+
+    def _action_stats(self, action):
+        return self.stats.setdefault(action, {"lookups": 0, "misses": 0, "fallbacks": 0, "last_hit": None, "candidates": {}})
+
+    def ordered(self, action):
+        """Candidates for action, best first"""
+        candidates = self.selectors[action]
+        stats = self._action_stats(action)
+        hits = {selector: data.get("hits", 0) for selector, data in stats["candidates"].items()}
+        ranked = sorted(candidates, key=lambda selector: (selector != stats["last_hit"], -hits.get(selector, 0)))
+        return ranked
+
+    def _record(self, action, selector, elapsed):
+        with self._lock:
+            stats = self._action_stats(action)
+            stats["lookups"] += 1
+            if selector is None:
+                stats["misses"] += 1
+                return
+            stats["last_hit"] = selector
+            candidate = stats["candidates"].setdefault(selector, {"hits": 0, "total_ms": 0.0})
+            candidate["hits"] += 1
+            candidate["total_ms"] = round(candidate["total_ms"] + elapsed * 1000, 1)
+
+    def record_fallback(self, action):
+        """Count a lookup that had to use the JavaScript fallback"""
+        with self._lock:
+            self._action_stats(action)["fallbacks"] += 1
+
+    def resolve(self, page, action, timeout=10, state="visible"):
+        """resolve_async() for sync Playwright pages"""
+        return run_sync(self.resolve_async(adapt(page), action, timeout=timeout, state=state))
+
+    async def resolve_async(self, page, action, timeout=10, state="visible"):
+        """Find the element for action. Returns (selector, element) or (None, None).
+
+        timeout is in seconds; with timeout <= 0 the page is only queried once.
+        """
+        start = time.monotonic()
+        candidates = self.ordered(action)
+        # Fast path: last winner is already on the page (and visible, like the waits below require)
+        element = await page.query_selector(_in_state(candidates[0], state))
+        selector = candidates[0] if element else None
+
+        if not element and len(candidates) > 1:
+            combined = ", ".join(candidates)
+            try:
+                if timeout > 0:
+                    await page.wait_for_selector(combined, state=state, timeout=timeout * 1000)
+                    found = True
+                else:
+                    found = await page.query_selector(_in_state(combined, state)) is not None
+            except Exception:
+                found = False
+            if found:
+                # Attribute the match to the best-ranked candidate with an element in that state,
+                # not one that only has a hidden match
+                for candidate in candidates:
+                    element = await page.query_selector(_in_state(candidate, state))
+                    if element:
+                        selector = candidate
+                        break
+        elif not element and timeout > 0:
+            try:
+                element = await page.wait_for_selector(candidates[0], state=state, timeout=timeout * 1000)
+                selector = candidates[0] if element else None
+            except Exception:
+                element = None
+
+        elapsed = time.monotonic() - start
+        self._record(action, selector, elapsed)
+        if selector:
+            logger.info(f"Resolved '{action}' with selector {selector} in {elapsed * 1000:.0f}ms")
+        else:
+            logger.info(f"No selector matched for '{action}' after {elapsed * 1000:.0f}ms")
+        return selector, element
+
+    def report(self, min_lookups=5):
+        """Per action: lookups, misses, JS fallbacks, hit share and mean latency per candidate,
+        and the candidates that never matched in at least min_lookups lookups (dead weight)."""
+        report = {}
+        for action, candidates in self.selectors.items():
+            stats = self._action_stats(action)
+            per_candidate = {}
+            for selector in candidates:
+                data = stats["candidates"].get(selector, {"hits": 0, "total_ms": 0.0})
+                per_candidate[selector] = {
+                    "hits": data["hits"],
+                    "mean_ms": round(data["total_ms"] / data["hits"], 1) if data["hits"] else None,
+                }
+            dead = [s for s, data in per_candidate.items() if not data["hits"]] if stats["lookups"] >= min_lookups else []
+            report[action] = {
+                "lookups": stats["lookups"],
+                "misses": stats["misses"],
+                "fallbacks": stats["fallbacks"],
+                "candidates": per_candidate,
+                "dead": dead,
+            }
+        return report
+
+    def save(self):
+        """Persist stats (temp file + rename so a crash never leaves a half-written file)"""
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with self._lock, open(tmp_path, 'w') as f:
+                json.dump(self.stats, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save selector stats: {str(e)}")
+
+
+if __name__ == "__main__":
+    # Show which selectors earn their place: python selector_registry.py [stats.json]
+    import sys
+
+    registry = SelectorRegistry(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_STATS_FILE)
+    for action, data in registry.report().items():
+        print(f"{action}: {data['lookups']} lookups, {data['misses']} misses, {data['fallbacks']} JS fallbacks")
+        for selector, candidate in data["candidates"].items():
+            marker = "  DEAD" if selector in data["dead"] else ""
+            print(f"    {candidate['hits']:>5} hits  {candidate['mean_ms'] or '-':>8} ms  {selector}{marker}")
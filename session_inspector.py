@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# auth_token is the login itself, ct0 the CSRF token every write request needs
+AUTH_COOKIES = ("auth_token", "ct0")
+AUTH_DOMAINS = ("x.com", "twitter.com")
+
+SessionCheck = namedtuple("SessionCheck", "status reason expires_at elapsed_ms")
+
+
+def _is_auth_domain(domain):
+    domain = (domain or "").lstrip(".")
+    return any(domain == auth or domain.endswith("." + auth) for auth in AUTH_DOMAINS)
+
+
+def inspect_cookies(cookies, now=None, margin=None):
+    """Offline verdict on a Playwright cookie list: 'valid', 'expired' or 'missing'.
+
+    A cookie expiring within `margin` seconds (SESSION_EXPIRY_MARGIN_HOURS,
+    default 1) counts as expired, so a run never starts on a session that
+    lapses halfway. Session cookies (expires -1) have no expiry to check.
+    """
+    started = time.monotonic()
+    now = now if now is not None else time.time()
+    if margin is None:
+        margin = float(os.getenv("SESSION_EXPIRY_MARGIN_HOURS", "1")) * 3600
+    expiries = {}
+    for cookie in cookies:
+        name = cookie.get("name")
+        if name in AUTH_COOKIES and _is_auth_domain(cookie.get("domain")) and cookie.get("value"):
+            expires = cookie.get("expires", -1)
+            expires = None if expires is None or expires < 0 else float(expires)
+            # Keep the longest-lived copy when both domains carry the cookie
+            if name not in expiries or expires is None or (expiries[name] is not None and expires > expiries[name]):
+                expiries[name] = expires
+
+    def verdict(status, reason, expires_at=None):
+        return SessionCheck(status, reason, expires_at, round((time.monotonic() - started) * 1000, 2))
+
+    missing = [name for name in AUTH_COOKIES if name not in expiries]
+    if missing:
+        return verdict("missing", f"no {', '.join(missing)} cookie")
+    known = [expires for expires in expiries.values() if expires is not None]
+    expires_at = min(known) if known else None
+    if expires_at is not None and expires_at - margin <= now:
+        name = min((name for name in expiries if expiries[name] is not None), key=lambda name: expiries[name])
+        return verdict("expired", f"{name} expires {time.strftime('%Y-%m-%d %H:%M', time.localtime(expires_at))}", expires_at)
+    return verdict("valid", "auth cookies present and not expiring", expires_at)
+
+
+def inspect_session_file(path, now=None, margin=None):
+    """inspect_cookies() on a storage_state JSON file; 'unreadable' when it is missing or corrupt"""
+    started = time.monotonic()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        cookies = state.get("cookies", [])
+    except (OSError, ValueError, AttributeError) as e:
+        return SessionCheck("unreadable", f"{type(e).__name__}: {str(e)}", None,
+                            round((time.monotonic() - started) * 1000, 2))
+    check = inspect_cookies(cookies, now=now, margin=margin)
+    return check._replace(elapsed_ms=round((time.monotonic() - started) * 1000, 2))
+
+
+def log_check(check, source):
+    expiry = time.strftime('%Y-%m-%d %H:%M', time.localtime(check.expires_at)) if check.expires_at else "n/a"
+    logger.info(f"Session pre-check ({source}): {check.status}, {check.reason}, expires {expiry}, "
+                f"took {check.elapsed_ms} ms")
+
+
+if __name__ == "__main__":
+    # Check a saved session without a browser: python session_inspector.py [twitter_session.json]
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "twitter_session.json")
+    check = inspect_session_file(path)
+    print(f"{path}: {check.status} ({check.reason})")
+    sys.exit(0 if check.status == "valid" else 1)
@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+from collections import Counter
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Cookies that make up the login; everything else in the storage state is cache
+SESSION_AUTH_COOKIES = ("auth_token", "ct0", "twid", "kdt")
+
+
+def auth_fingerprint(state):
+    """The parts of a storage state that matter for staying logged in, in comparable form"""
+    cookies = []
+    for cookie in state.get("cookies", []):
+        if cookie.get("name") in SESSION_AUTH_COOKIES:
+            expires = cookie.get("expires", -1)
+            # Whole hours, so an expiry that only drifts by seconds is not a change
+            expires = -1 if expires is None or expires < 0 else int(expires // 3600)
+            cookies.append((cookie["name"], cookie.get("domain", ""), cookie.get("value", ""), expires))
+    return sorted(cookies)
+
+
+class SessionStore:
+    """Writes twitter_session.json only when the auth cookies changed, atomically.
+
+    The storage state is compared with the last saved one (read from disk
+    once, then remembered) on auth_fingerprint(); an unchanged session is
+    not rewritten. Writes go to a temp file in the same directory that is
+    fsynced and renamed over the old file, so a crash mid-write leaves the
+    previous session intact. Written/skipped counts are kept in `stats` and
+    in the process metrics.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stats = Counter()
+        self._saved = None
+        self._lock = threading.Lock()
+
+    def _saved_fingerprint(self):
+        if self._saved is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._saved = auth_fingerprint(json.load(f))
+            except (OSError, ValueError, AttributeError):
+                self._saved = []
+        return self._saved
+
+    def save_state(self, state, force=False):
+        """Persist a storage_state() dict; returns True when the file was written"""
+        fingerprint = auth_fingerprint(state)
+        with self._lock:
+            if not force and fingerprint and fingerprint == self._saved_fingerprint():
+                self.stats["skipped"] += 1
+                get_metrics().inc("session_saves_total", result="skipped")
+                logger.info(f"Session unchanged, not rewriting {os.path.basename(self.path)} ({dict(self.stats)})")
+                return False
+            if not fingerprint and not force:
+                # A logged-out context must not overwrite a session that might still be good
+                self.stats["refused"] += 1
+                get_metrics().inc("session_saves_total", result="refused")
+                logger.warning("Storage state has no auth cookies, keeping the saved session")
+                return False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".session-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._saved = fingerprint
+            self.stats["written"] += 1
+            get_metrics().inc("session_saves_total", result="written")
+            logger.info(f"Session saved to {os.path.basename(self.path)} ({dict(self.stats)})")
+            return True
+
+    def save(self, context, force=False):
+        """Persist a sync Playwright context's storage state if its auth cookies changed"""
+        return self.save_state(context.storage_state(), force=force)
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+from dedup_store import DedupStore, DEFAULT_DB_FILE
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Pre-SQLite state files, resolved next to the module like the database itself
+LEGACY_STATE_FILE = os.path.join(_BASE_DIR, "bot_state.json")
+LEGACY_COMMENTED_FILE = os.path.join(_BASE_DIR, "commented_tweets.json")
+LEGACY_REGENERATED_FILE = os.path.join(_BASE_DIR, "regenerated_tweets.json")
+ROTATION_KEYS = ("project_index", "twitter_account_index")
+RUN_COUNTERS = ("projects_posted", "comments_posted", "tweets_regenerated")
+
+
+@dataclass
+class RotationState:
+    project_index: int = 0
+    twitter_account_index: int = 0
+
+
+@dataclass
+class RunRecord:
+    id: int
+    started_at: float
+    finished_at: Optional[float]
+    status: str
+    projects_posted: int
+    comments_posted: int
+    tweets_regenerated: int
+    error: Optional[str]
+
+
+class BotState:
+    """Single SQLite (WAL) database holding rotation indices, dedup sets and run records.
+
+    Every update is its own small transaction, so a crash or a restart in the
+    middle of a run never leaves the pieces out of sync. The object is safe to
+    share between the bot thread and the web thread.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_FILE, legacy_state_file=LEGACY_STATE_FILE):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across process crashes in WAL mode and avoids an fsync per commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS rotation (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, started_at REAL NOT NULL, finished_at REAL, "
+                "status TEXT NOT NULL, projects_posted INTEGER NOT NULL DEFAULT 0, "
+                "comments_posted INTEGER NOT NULL DEFAULT 0, tweets_regenerated INTEGER NOT NULL DEFAULT 0, "
+                "error TEXT)"
+            )
+            self._migrate_legacy_state(legacy_state_file)
+
+        self.commented = DedupStore("commented_tweets", legacy_file=LEGACY_COMMENTED_FILE,
+                                    conn=self._conn, lock=self._lock)
+        self.regenerated = DedupStore("regenerated_tweets", legacy_file=LEGACY_REGENERATED_FILE,
+                                      conn=self._conn, lock=self._lock)
+
+    def _migrate_legacy_state(self, legacy_state_file):
+        if self._conn.execute("SELECT COUNT(*) FROM rotation").fetchone()[0]:
+            return
+        state = asdict(RotationState())
+        if legacy_state_file and os.path.exists(legacy_state_file):
+            try:
+                with open(legacy_state_file, 'r') as f:
+                    state.update({k: int(v) for k, v in json.load(f).items() if k in ROTATION_KEYS})
+                logger.info(f"Imported rotation indices from {legacy_state_file}: {state}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read legacy state file {legacy_state_file}: {str(e)}")
+        with self._conn:
+            self._conn.executemany("INSERT INTO rotation VALUES (?, ?)", state.items())
+
+    # --- Rotation indices ---
+
+    def get_rotation(self) -> RotationState:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value FROM rotation").fetchall()
+        return RotationState(**{name: value for name, value in rows if name in ROTATION_KEYS})
+
+    def set_rotation_index(self, name: str, value: int) -> None:
+        if name not in ROTATION_KEYS:
+            raise ValueError(f"Unknown rotation index: {name}")
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO rotation VALUES (?, ?)", (name, int(value)))
+
+    # --- Run records ---
+
+    def start_run(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT INTO runs (started_at, status) VALUES (?, 'running')", (time.time(),))
+        return cursor.lastrowid
+
+    def increment_run(self, run_id: int, counter: str, amount: int = 1) -> None:
+        if counter not in RUN_COUNTERS:
+            raise ValueError(f"Unknown run counter: {counter}")
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE runs SET {counter} = {counter} + ? WHERE id = ?", (amount, run_id))
+
+    def finish_run(self, run_id: int, status: str = "success", error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, error = ? WHERE id = ?",
+                (time.time(), status, error, run_id)
+            )
+
+    def recent_runs(self, limit: int = 10) -> List[RunRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, started_at, finished_at, status, projects_posted, comments_posted, "
+                "tweets_regenerated, error FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [RunRecord(*row) for row in rows]
+
+    def snapshot(self, runs: int = 10) -> dict:
+        """JSON-serializable view of the current state"""
+        return {
+            "rotation": asdict(self.get_rotation()),
+            "commented_tweets": len(self.commented),
+            "regenerated_tweets": len(self.regenerated),
+            "runs": [asdict(run) for run in self.recent_runs(runs)],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_state() -> BotState:
+    """Process-wide BotState shared by main.py and web_main.py"""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = BotState()
+        return _state
@@ -0,0 +1,84 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from dedup_store import DedupStore
+
+
+class DedupStoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.db_path = os.path.join(self.dir, "state.db")
+
+    def open(self, **kwargs):
+        store = DedupStore("commented_tweets", db_path=self.db_path, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def stored_ids(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return {row[0] for row in conn.execute("SELECT tweet_id FROM commented_tweets")}
+
+    def test_ids_survive_a_reopen(self):
+        store = self.open()
+        store.add(1812000000000000001)
+        store.add_many(["1812000000000000002", None])
+        store.close()
+
+        reopened = self.open()
+        self.assertIn("1812000000000000001", reopened)
+        self.assertIn(1812000000000000002, reopened)
+        self.assertNotIn(None, reopened)
+        self.assertEqual(len(reopened), 2)
+
+    def test_size_cap_evicts_the_least_recently_touched(self):
+        store = self.open(max_entries=3)
+        store.add_many(["a", "b", "c"])
+        store.add("a")  # touched again, so "b" is now the oldest
+        store.add("d")
+
+        self.assertEqual(list(store), ["c", "a", "d"])
+        self.assertEqual(self.stored_ids(), {"a", "c", "d"})
+
+    def test_entries_older_than_max_age_are_dropped_on_load(self):
+        store = self.open()
+        store.add("fresh")
+        store.close()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO commented_tweets VALUES (?, ?)", ("stale", time.time() - 31 * 86400))
+
+        reopened = self.open(max_age_days=30)
+        self.assertEqual(list(reopened), ["fresh"])
+        self.assertEqual(self.stored_ids(), {"fresh"})
+
+    def test_legacy_json_list_is_imported_once_in_order(self):
+        legacy_file = os.path.join(self.dir, "commented_tweets.json")
+        with open(legacy_file, "w") as f:
+            json.dump([101, "102", "103"], f)
+
+        store = self.open(legacy_file=legacy_file)
+        self.assertEqual(list(store), ["101", "102", "103"])
+        store.add("104")
+        store.close()
+
+        # The table is no longer empty, so a changed legacy file is not read again
+        with open(legacy_file, "w") as f:
+            json.dump(["999"], f)
+        reopened = self.open(legacy_file=legacy_file)
+        self.assertEqual(list(reopened), ["101", "102", "103", "104"])
+
+    def test_unreadable_legacy_file_starts_empty(self):
+        legacy_file = os.path.join(self.dir, "commented_tweets.json")
+        with open(legacy_file, "w") as f:
+            f.write("[1, 2,")
+
+        self.assertEqual(len(self.open(legacy_file=legacy_file)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import unittest
+from unittest import mock
+
+from gemini_client import GeminiClient
+from metrics import MetricsRegistry
+from prompt_library import PromptLibrary, RenderedPrompt
+
+
+class FakeCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, template, text):
+        self.entries[key] = text
+
+
+class FakePrompts:
+    def version(self, template):
+        return "1"
+
+    def render(self, template, **inputs):
+        return mock.Mock(name=template, inputs=inputs)
+
+
+def make_client():
+    # Skips __init__, which needs GEMINI_API_KEY and configures the SDK
+    client = GeminiClient.__new__(GeminiClient)
+    client.model_name = "test-model"
+    client.prompts = FakePrompts()
+    client.cache = FakeCache()
+    client._cache_keys = {}
+    client.metrics = MetricsRegistry()
+    client._generate = mock.Mock()
+    client.generate_comment = mock.Mock(side_effect=lambda username, tweet_data: f"single {username}")
+    return client
+
+
+def batch(*entries):
+    return json.dumps([{"index": index, "comment": comment} for index, comment in entries])
+
+
+class ParseCommentBatchTest(unittest.TestCase):
+    def test_valid_entries_are_keyed_by_item_number(self):
+        text = batch((1, " second "), (0, "first"))
+
+        self.assertEqual(GeminiClient._parse_comment_batch(text, 2), {0: "first", 1: "second"})
+
+    def test_code_fences_are_stripped(self):
+        text = "```json\n" + batch((0, "fenced")) + "\n```"
+
+        self.assertEqual(GeminiClient._parse_comment_batch(text, 1), {0: "fenced"})
+
+    def test_invalid_entries_are_dropped(self):
+        text = json.dumps([
+            {"index": True, "comment": "bool index"},
+            {"index": 5, "comment": "out of range"},
+            {"index": "0", "comment": "string index"},
+            {"index": 0, "comment": "kept"},
+            {"index": 0, "comment": "duplicate"},
+            {"index": 1, "comment": "x" * 281},
+            {"index": 2, "comment": "Check out [project]"},
+            {"index": 3, "comment": "   "},
+            "not an object",
+        ])
+
+        self.assertEqual(GeminiClient._parse_comment_batch(text, 4), {0: "kept"})
+
+    def test_non_array_responses_yield_nothing(self):
+        self.assertEqual(GeminiClient._parse_comment_batch("not json", 1), {})
+        self.assertEqual(GeminiClient._parse_comment_batch('{"index": 0, "comment": "hi"}', 1), {})
+
+
+class CommentBatchFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.client = make_client()
+        self.items = [("alice", {"id": "1", "text": "a"}), ("bob", {"id": "2", "text": "b"}),
+                      ("carol", {"id": "3", "text": "c"})]
+
+    def test_requests_json_output(self):
+        self.client._generate.return_value = batch((0, "a"), (1, "b"), (2, "c"))
+
+        self.assertEqual(self.client.generate_comments_batch(self.items), ["a", "b", "c"])
+        self.assertEqual(self.client._generate.call_args.kwargs["generation_config"],
+                         {"response_mime_type": "application/json"})
+        self.client.generate_comment.assert_not_called()
+
+    def test_missing_items_are_generated_one_by_one(self):
+        self.client._generate.return_value = batch((0, "a"), (2, "x" * 281))
+
+        self.assertEqual(self.client.generate_comments_batch(self.items), ["a", "single bob", "single carol"])
+        self.assertEqual([call.args[0] for call in self.client.generate_comment.call_args_list], ["bob", "carol"])
+
+    def test_failed_batch_falls_back_for_every_item(self):
+        self.client._generate.side_effect = ValueError("unknown field")
+
+        self.assertEqual(self.client.generate_comments_batch(self.items),
+                         ["single alice", "single bob", "single carol"])
+        self.assertEqual(self.client.metrics.counters[("gemini_fallbacks_total", (("method", "comment_batch"),))], 3)
+
+    def test_cached_comments_skip_the_request(self):
+        self.client._generate.return_value = batch((0, "a"), (1, "b"), (2, "c"))
+        self.client.generate_comments_batch(self.items)
+        self.client._generate.reset_mock()
+
+        self.assertEqual(self.client.generate_comments_batch(self.items), ["a", "b", "c"])
+        self.client._generate.assert_not_called()
+
+
+class TokenAccountingTest(unittest.TestCase):
+    def setUp(self):
+        self.client = make_client()
+        del self.client._generate
+        self.client.prompts = PromptLibrary()
+        self.client.limiter = mock.Mock()
+        self.prompt = RenderedPrompt("comment", "1", "prompt text", 40)
+
+    def respond(self, **fields):
+        self.client.limiter.call.return_value = mock.Mock(spec=["text", "candidates", *fields], text=" hi ", **fields)
+
+    def test_api_token_counts_are_recorded(self):
+        usage = mock.Mock(prompt_token_count=52, candidates_token_count=7, total_token_count=59)
+        self.respond(usage_metadata=usage)
+
+        self.assertEqual(self.client._generate(self.prompt), "hi")
+        row = self.client.prompts.report()["comment"]
+        self.assertEqual((row["prompt_tokens"], row["response_tokens"], row["estimated_calls"]), (52, 7, 0))
+
+    def test_responses_without_usage_metadata_are_marked_as_estimates(self):
+        self.respond()
+
+        self.client._generate(self.prompt)
+        row = self.client.prompts.report()["comment"]
+        self.assertEqual((row["prompt_tokens"], row["estimated_calls"]), (40, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import re
+import select
+import socketserver
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.header import Header
+from email.utils import format_datetime
+from unittest import mock
+
+from gmail_reader import GmailReader
+
+_LITERAL = re.compile(rb"\{(\d+)\}$")
+
+
+class FakeImapHandler(socketserver.StreamRequestHandler):
+    """Just enough IMAP4rev1 for GmailReader: LOGIN, SELECT, UID SEARCH/FETCH/STORE, IDLE"""
+
+    def send(self, line):
+        self.wfile.write(line + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        self.send(b"* OK fake IMAP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            line = line.rstrip(b"\r\n")
+            literal = _LITERAL.search(line)
+            if literal:
+                self.send(b"+ go ahead")
+                line = line[:literal.start()] + self.rfile.read(int(literal.group(1)))
+                self.rfile.readline()
+            tag, command, *rest = line.split(b" ", 2)
+            args = rest[0] if rest else b""
+            command = command.upper()
+            server.commands.append(command + (b" " + args.split(b" ", 1)[0] if command == b"UID" else b""))
+            if command == b"CAPABILITY":
+                self.send(b"* CAPABILITY IMAP4rev1 IDLE")
+            elif command == b"SELECT":
+                self.send(f"* {len(server.mailbox)} EXISTS".encode())
+            elif command == b"UID":
+                self.uid(args)
+            elif command == b"IDLE":
+                self.idle()
+            elif command == b"LOGOUT":
+                self.send(b"* BYE logging out")
+            self.send(tag + b" OK " + command + b" completed")
+            if command == b"LOGOUT":
+                return
+
+    def uid(self, args):
+        server = self.server
+        command, args = args.split(b" ", 1)
+        command = command.upper()
+        if command == b"SEARCH":
+            subject = args.rsplit(b"SUBJECT ", 1)[1].decode("utf-8")
+            uids = [str(m["uid"]).encode() for m in server.mailbox if subject in m["subject"]]
+            self.send(b" ".join([b"* SEARCH"] + uids))
+        elif command == b"FETCH":
+            uid_set, items = args.split(b" ", 1)
+            server.fetched_items.append(items)
+            wanted = {int(uid) for uid in uid_set.split(b",")}
+            for number, message in enumerate(server.mailbox, 1):
+                if message["uid"] not in wanted:
+                    continue
+                headers = (
+                    f"Subject: {Header(message['subject'], 'utf-8').encode()}\r\n"
+                    f"Date: {format_datetime(message['date'])}\r\n\r\n"
+                ).encode()
+                self.wfile.write(
+                    f"* {number} FETCH (UID {message['uid']} BODY[HEADER.FIELDS (SUBJECT DATE)] "
+                    f"{{{len(headers)}}}\r\n".encode() + headers + b")\r\n"
+                )
+        elif command == b"STORE":
+            server.stored.append(int(args.split(b" ", 1)[0]))
+
+    def idle(self):
+        server = self.server
+        self.send(b"+ idling")
+        server.idling.set()
+        announced = len(server.mailbox)
+        while True:
+            if len(server.mailbox) > announced:
+                announced = len(server.mailbox)
+                self.send(f"* {announced} EXISTS".encode())
+            readable, _, _ = select.select([self.connection], [], [], 0.05)
+            if readable:
+                line = self.rfile.readline()
+                server.commands.append(line.strip())
+                return
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeImapHandler)
+        self.mailbox = []
+        self.commands = []
+        self.fetched_items = []
+        self.stored = []
+        self.idling = threading.Event()
+
+    def deliver(self, subject, date):
+        self.mailbox.append({"uid": 100 + len(self.mailbox), "subject": subject, "date": date})
+
+
+class GmailReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeImapServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        env = mock.patch.dict(os.environ, {"EMAIL_ADDRESS": "bot@example.com", "GMAIL_APP_PASSWORD": "secret"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.reader = GmailReader(host="127.0.0.1", port=self.server.server_address[1], use_ssl=False, timeout=5)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def test_newest_code_comes_from_headers_only(self):
+        self.server.deliver("X doğrulama kodun old111", self.now - timedelta(minutes=5))
+        self.server.deliver("Weekly digest", self.now)
+        self.server.deliver("X doğrulama kodun new222", self.now - timedelta(minutes=1))
+
+        self.assertEqual(self.reader.get_latest_twitter_code(), "new222")
+        self.assertIn(b"UID SEARCH", self.server.commands)
+        self.assertEqual(self.server.fetched_items, [b"(BODY.PEEK[HEADER.FIELDS (SUBJECT DATE)])"])
+        self.assertEqual(self.server.stored, [102])
+
+    def test_codes_older_than_newer_than_are_ignored(self):
+        self.server.deliver("X doğrulama kodun old111", self.now - timedelta(minutes=5))
+
+        self.assertIsNone(self.reader.get_latest_twitter_code(newer_than=self.now - timedelta(minutes=1)))
+        self.assertEqual(self.server.stored, [])
+
+    def test_idle_wakes_up_when_the_code_arrives(self):
+        def deliver_while_idling():
+            if self.server.idling.wait(5):
+                self.server.deliver("X doğrulama kodun 654321", self.now)
+        threading.Thread(target=deliver_while_idling, daemon=True).start()
+
+        started = time.monotonic()
+        code = self.reader.wait_for_twitter_code(timeout=10, newer_than=self.now - timedelta(minutes=1))
+
+        self.assertEqual(code, "654321")
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertIn(b"DONE", self.server.commands)
+        self.assertEqual(self.server.commands.count(b"UID SEARCH"), 2)
+
+    def test_idle_gives_up_at_the_deadline(self):
+        started = time.monotonic()
+
+        self.assertIsNone(self.reader.wait_for_twitter_code(timeout=1))
+        self.assertLess(time.monotonic() - started, 4)
+        self.assertIn(b"DONE", self.server.commands)
+        self.assertEqual(self.server.commands[-1], b"LOGOUT")
+
+
+if __name__ == "__main__":
+    unittest.main()
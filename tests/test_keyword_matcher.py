@@ -0,0 +1,56 @@
+import re
+import unittest
+
+from keyword_matcher import KeywordMatch, KeywordMatcher, _trie_regex
+
+KEYWORDS = ["Near", "NEAR", "IQ", "Monad", "Humanity Protocol", "Huma", "Sei", "Noya.ai", "zkSync", "Soon"]
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher(KEYWORDS)
+
+    def test_keywords_inside_longer_words_do_not_match(self):
+        for text in ("nearly there", "a unique setup", "seized the day", "soonish", "humans", "Monads"):
+            with self.subTest(text=text):
+                self.assertIsNone(self.matcher.search(text))
+
+    def test_ticker_and_hashtag_prefixes_and_punctuation_match(self):
+        self.assertEqual(self.matcher.matched_keywords("Loaded up on $NEAR."), ["Near"])
+        self.assertEqual(self.matcher.matched_keywords("gm #Monad fam"), ["Monad"])
+        self.assertEqual(self.matcher.matched_keywords("(iq), @sei!"), ["IQ", "Sei"])
+
+    def test_matching_ignores_case_and_keeps_the_first_spelling(self):
+        self.assertEqual(len(self.matcher), 9)
+        self.assertEqual(self.matcher.search("near intents"), KeywordMatch("Near", 0, 4))
+
+    def test_longest_keyword_wins_over_its_prefix(self):
+        text = "Humanity Protocol and Huma"
+        self.assertEqual(self.matcher.find_all(text), [
+            KeywordMatch("Humanity Protocol", 0, 17),
+            KeywordMatch("Huma", 22, 26),
+        ])
+
+    def test_regex_metacharacters_in_keywords_are_literal(self):
+        self.assertEqual(self.matcher.matched_keywords("Noya.ai launch"), ["Noya.ai"])
+        self.assertIsNone(self.matcher.search("Noyaxai launch"))
+
+    def test_positions_stay_right_when_lower_changes_the_length(self):
+        # "İ".lower() is two characters, so the matcher has to scan the original text
+        text = "İİ Monad"
+        match = self.matcher.search(text)
+        self.assertEqual(text[match.start:match.end], "Monad")
+
+    def test_empty_text(self):
+        self.assertIsNone(self.matcher.search(""))
+        self.assertEqual(self.matcher.find_all(None), [])
+
+    def test_trie_regex_factors_shared_prefixes(self):
+        pattern = _trie_regex(["sol", "solana", "solayer"])
+        self.assertEqual(pattern, "(?:sol(?:a(?:na|yer))?)")
+        self.assertEqual(re.fullmatch(pattern, "solayer").group(0), "solayer")
+        self.assertIsNone(re.fullmatch(pattern, "sola"))
+
+
+if __name__ == "__main__":
+    unittest.main()
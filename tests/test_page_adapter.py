@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+
+from page_adapter import SyncAdapter, adapt, adapt_like, run_sync
+
+
+class FakeSyncPage:
+    """Stands in for a sync Playwright page: every method returns at once"""
+
+    def __init__(self):
+        self.url = "https://x.com/home"
+        self.calls = []
+        self.listeners = []
+
+    def goto(self, url, **kwargs):
+        self.calls.append(("goto", url))
+        self.url = url
+
+    def query_selector(self, selector):
+        self.calls.append(("query_selector", selector))
+        return f"<{selector}>"
+
+    def on(self, event, handler):
+        self.listeners.append((event, handler))
+
+    def locator(self, selector):
+        return object()
+
+
+async def open_profile(page, username):
+    await page.goto(f"https://x.com/{username}")
+    return await page.query_selector('article[data-testid="tweet"]')
+
+
+async def nested_flow(page):
+    # Flows may await each other; only the awaits at the bottom have to be page calls
+    return await open_profile(page, "someone"), page.url
+
+
+class RunSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.page = FakeSyncPage()
+
+    def test_flow_runs_to_the_end_on_a_sync_page(self):
+        result = run_sync(open_profile(adapt(self.page), "someone"))
+
+        self.assertEqual(result, '<article[data-testid="tweet"]>')
+        self.assertEqual(self.page.calls[0], ("goto", "https://x.com/someone"))
+
+    def test_nested_flow_coroutines_do_not_suspend(self):
+        self.assertEqual(run_sync(nested_flow(adapt(self.page))),
+                         ('<article[data-testid="tweet"]>', "https://x.com/someone"))
+
+    def test_exceptions_from_the_page_propagate(self):
+        def goto(url, **kwargs):
+            raise TimeoutError("navigation timed out")
+        self.page.goto = goto
+
+        with self.assertRaises(TimeoutError):
+            run_sync(open_profile(adapt(self.page), "someone"))
+
+    def test_awaiting_a_real_coroutine_raises(self):
+        async def flow(page):
+            await page.goto("https://x.com/home")
+            await asyncio.sleep(0)
+
+        with self.assertRaises(RuntimeError):
+            run_sync(flow(adapt(self.page)))
+
+    def test_async_generators_work_under_run_sync(self):
+        async def profiles(page, usernames):
+            for username in usernames:
+                yield username, await open_profile(page, username)
+
+        async def collect(page):
+            return [username async for username, _ in profiles(page, ["a", "b"])]
+
+        self.assertEqual(run_sync(collect(adapt(self.page))), ["a", "b"])
+
+
+class SyncAdapterTest(unittest.TestCase):
+    def setUp(self):
+        self.page = FakeSyncPage()
+        self.adapted = adapt(self.page)
+
+    def test_properties_and_plain_methods_pass_through(self):
+        handler = object()
+        self.assertEqual(self.adapted.url, "https://x.com/home")
+        self.assertIsNone(self.adapted.on("response", handler))
+        self.assertEqual(self.page.listeners, [("response", handler)])
+
+    def test_methods_missing_from_plain_methods_become_awaitables(self):
+        # A sync-in-async-API method left out of PLAIN_METHODS would hand the flow an awaitable, not its result
+        self.assertNotIsInstance(self.adapted.query_selector("a"), str)
+
+    def test_locator_methods_are_refused(self):
+        with self.assertRaises(TypeError):
+            self.adapted.locator("a")
+
+    def test_adapt_is_idempotent_and_adapt_like_follows_the_page(self):
+        self.assertIs(adapt(self.adapted), self.adapted)
+        response = object()
+        self.assertIsInstance(adapt_like(self.adapted, response), SyncAdapter)
+        self.assertIs(adapt_like(self.page, response), response)
+
+
+if __name__ == "__main__":
+    unittest.main()
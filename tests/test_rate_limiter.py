@@ -0,0 +1,127 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from rate_limiter import GeminiRateLimiter, GeminiUnavailable, TokenBucket, retry_delay_from_error
+
+
+class FakeClock:
+    """monotonic() and sleep() over a clock that only moves when slept"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+class ServerError(Exception):
+    code = 503
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for name in ("monotonic", "sleep"):
+            patcher = mock.patch(f"rate_limiter.time.{name}", getattr(self.clock, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TokenBucketTest(ClockTestCase):
+    def test_burst_is_free_then_calls_wait_for_the_refill(self):
+        bucket = TokenBucket(rate_per_minute=6, burst=2)
+
+        self.assertEqual([bucket.acquire(), bucket.acquire()], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.acquire(), 10.0)
+        self.assertEqual(self.clock.sleeps, [10.0])
+
+    def test_refill_is_capped_at_the_burst(self):
+        bucket = TokenBucket(rate_per_minute=60, burst=3)
+        for _ in range(3):
+            bucket.acquire()
+
+        self.clock.now += 3600
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+
+class RetryDelayTest(unittest.TestCase):
+    def test_delay_from_structured_details(self):
+        error = QuotaError("quota")
+        error.details = [SimpleNamespace(retry_delay=SimpleNamespace(seconds=12, nanos=500_000_000))]
+
+        self.assertEqual(retry_delay_from_error(error), 12.5)
+
+    def test_delay_from_the_error_text(self):
+        self.assertEqual(retry_delay_from_error(QuotaError("429 quota exceeded retry_delay { seconds: 34 }")), 34.0)
+        self.assertEqual(retry_delay_from_error(QuotaError("Please retry in 7.2s.")), 7.2)
+        self.assertIsNone(retry_delay_from_error(QuotaError("quota exceeded")))
+
+
+class GeminiRateLimiterTest(ClockTestCase):
+    def limiter(self, **kwargs):
+        settings = dict(rpm=600, burst=100, max_attempts=3, error_budget=5, max_wait=60)
+        settings.update(kwargs)
+        return GeminiRateLimiter(**settings)
+
+    def test_429_waits_at_least_the_suggested_delay(self):
+        func = mock.Mock(side_effect=[QuotaError("Please retry in 30s."), "ok"])
+        limiter = self.limiter()
+
+        self.assertEqual(limiter.call(func), "ok")
+        self.assertEqual(self.clock.sleeps, [30.0])
+        self.assertEqual(limiter.summary()["rate_limited"], 1)
+        self.assertEqual(limiter.budget_left, 4)
+
+    def test_suggested_delay_over_max_wait_gives_up_without_sleeping(self):
+        func = mock.Mock(side_effect=QuotaError("Please retry in 300s."))
+
+        with self.assertRaises(GeminiUnavailable):
+            self.limiter().call(func)
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_retryable_errors_give_up_after_max_attempts(self):
+        func = mock.Mock(side_effect=ServerError("unavailable"))
+        limiter = self.limiter()
+
+        with self.assertRaises(GeminiUnavailable):
+            limiter.call(func)
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(limiter.summary()["server_errors"], 3)
+
+    def test_other_errors_propagate_and_spend_the_budget(self):
+        limiter = self.limiter()
+
+        with self.assertRaises(ValueError):
+            limiter.call(mock.Mock(side_effect=ValueError("bad request")))
+        self.assertEqual(limiter.summary()["failed"], 1)
+        self.assertEqual(limiter.budget_left, 4)
+
+    def test_spent_budget_skips_calls(self):
+        limiter = self.limiter(max_attempts=4, error_budget=2)
+        func = mock.Mock(side_effect=QuotaError("Please retry in 1s."))
+
+        with self.assertRaises(GeminiUnavailable):
+            limiter.call(func)
+        self.assertEqual(func.call_count, 2)
+
+        with self.assertRaises(GeminiUnavailable):
+            limiter.call(func)
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(limiter.summary()["skipped"], 2)
+        self.assertEqual(limiter.budget_left, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
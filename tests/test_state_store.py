@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import state_store
+from state_store import BotState, RotationState
+
+
+class BotStateMigrationTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.db_path = os.path.join(self.dir, "bot_state.db")
+        self.legacy_state = self.write("bot_state.json", {"project_index": 7, "twitter_account_index": 42,
+                                                          "unknown_key": 1})
+        legacy_lists = mock.patch.multiple(
+            state_store,
+            LEGACY_COMMENTED_FILE=self.write("commented_tweets.json", ["1", "2"]),
+            LEGACY_REGENERATED_FILE=self.write("regenerated_tweets.json", ["3"]),
+        )
+        legacy_lists.start()
+        self.addCleanup(legacy_lists.stop)
+
+    def write(self, name, data):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+    def open(self, **kwargs):
+        state = BotState(db_path=self.db_path, **kwargs)
+        self.addCleanup(state.close)
+        return state
+
+    def test_json_state_and_id_lists_are_migrated(self):
+        state = self.open(legacy_state_file=self.legacy_state)
+
+        self.assertEqual(state.get_rotation(), RotationState(project_index=7, twitter_account_index=42))
+        self.assertEqual(list(state.commented), ["1", "2"])
+        self.assertEqual(list(state.regenerated), ["3"])
+
+    def test_database_wins_over_the_json_files_after_the_first_start(self):
+        state = self.open(legacy_state_file=self.legacy_state)
+        state.set_rotation_index("project_index", 8)
+        state.commented.add("4")
+        state.close()
+
+        reopened = self.open(legacy_state_file=self.legacy_state)
+        self.assertEqual(reopened.get_rotation().project_index, 8)
+        self.assertEqual(list(reopened.commented), ["1", "2", "4"])
+
+    def test_missing_json_state_starts_at_zero(self):
+        state = self.open(legacy_state_file=os.path.join(self.dir, "missing.json"))
+
+        self.assertEqual(state.get_rotation(), RotationState())
+        with self.assertRaises(ValueError):
+            state.set_rotation_index("unknown_index", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import json
+import unittest
+from datetime import datetime, timezone
+
+from timeline_capture import parse_timeline_payload, filter_timeline_tweets, is_timeline_response
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ParseTimelinePayloadTest(unittest.TestCase):
+    """UserTweets payload in the shape TIMELINE_RECORD_DIR captures (user ids and texts anonymised)"""
+
+    def setUp(self):
+        self.records = parse_timeline_payload(load_fixture("user_tweets_sample_dev.json"))
+        self.by_id = {record["id"]: record for record in self.records}
+
+    def test_ids_in_timeline_order_pinned_first(self):
+        self.assertEqual([record["id"] for record in self.records], [
+            "1790000000000000001",  # TimelinePinEntry
+            "1812000000000000050",  # retweet, reported as the original post
+            "1812000000000000200",
+            "1812000000000000300",  # TweetWithVisibilityResults
+            "1811000000000000400",
+            "1810000000000000500",  # self-thread module
+            "1810000000000000501",
+        ])
+
+    def test_timestamps_are_utc_iso(self):
+        self.assertEqual(self.by_id["1790000000000000001"]["timestamp"], "2024-01-08T09:00:00+00:00")
+        self.assertEqual(self.by_id["1812000000000000200"]["timestamp"], "2024-07-01T10:15:00+00:00")
+        self.assertEqual(self.by_id["1810000000000000501"]["timestamp"], "2024-06-26T12:01:00+00:00")
+
+    def test_flags(self):
+        self.assertTrue(self.by_id["1790000000000000001"]["pinned"])
+        self.assertEqual([record["id"] for record in self.records if record["pinned"]], ["1790000000000000001"])
+        retweet = self.by_id["1812000000000000050"]
+        self.assertTrue(retweet["is_retweet"])
+        self.assertEqual(retweet["username"], "other_project")
+        self.assertEqual(retweet["url"], "https://twitter.com/other_project/status/1812000000000000050")
+        self.assertTrue(self.by_id["1812000000000000300"]["is_reply"])
+        self.assertFalse(self.by_id["1812000000000000200"]["is_reply"])
+
+    def test_note_tweet_text_and_legacy_screen_name(self):
+        long_post = self.by_id["1812000000000000200"]
+        self.assertTrue(long_post["text"].endswith("in full_text but not here."))
+        self.assertEqual(long_post["username"], "sample_dev")
+
+    def test_tombstones_and_cursors_are_skipped(self):
+        self.assertNotIn("1812000000000000350", self.by_id)
+        self.assertEqual(len(self.records), 7)
+
+    def test_payload_without_instructions(self):
+        self.assertEqual(parse_timeline_payload({"data": {"user": {}}}), [])
+        self.assertEqual(parse_timeline_payload({}), [])
+
+
+class FilterTimelineTweetsTest(unittest.TestCase):
+    cutoff = datetime(2024, 7, 1, tzinfo=timezone.utc)
+
+    def setUp(self):
+        self.records = parse_timeline_payload(load_fixture("user_tweets_sample_dev.json"))
+
+    def test_skip_counts(self):
+        tweets, skipped = filter_timeline_tweets(self.records, self.cutoff)
+        self.assertEqual([tweet["id"] for tweet in tweets],
+                         ["1812000000000000050", "1812000000000000200", "1812000000000000300"])
+        self.assertEqual(skipped, {"pinned": 1, "stale": 1, "known": 0})
+
+    def test_known_ids(self):
+        tweets, skipped = filter_timeline_tweets(self.records, self.cutoff, known_ids={"1812000000000000200"})
+        self.assertEqual([tweet["id"] for tweet in tweets], ["1812000000000000050", "1812000000000000300"])
+        self.assertEqual(skipped, {"pinned": 1, "stale": 1, "known": 1})
+
+    def test_max_tweets_bounds_the_scan(self):
+        tweets, skipped = filter_timeline_tweets(self.records, self.cutoff, max_tweets=10)
+        self.assertEqual(len(tweets), 3)
+        self.assertEqual(skipped, {"pinned": 1, "stale": 3, "known": 0})
+        tweets, skipped = filter_timeline_tweets(self.records, self.cutoff, max_tweets=2)
+        self.assertEqual([tweet["id"] for tweet in tweets], ["1812000000000000050"])
+        self.assertEqual(skipped, {"pinned": 1, "stale": 0, "known": 0})
+
+
+class IsTimelineResponseTest(unittest.TestCase):
+    def test_operations(self):
+        self.assertTrue(is_timeline_response("https://x.com/i/api/graphql/abc123/UserTweets?variables=%7B%7D"))
+        self.assertTrue(is_timeline_response("https://x.com/i/api/graphql/abc123/UserTweetsAndReplies"))
+        self.assertFalse(is_timeline_response("https://x.com/i/api/graphql/abc123/UserByScreenName?x=/UserTweets"))
+        self.assertFalse(is_timeline_response("https://x.com/sample_dev/UserTweets"))
+
+
+if __name__ == "__main__":
+    unittest.main()
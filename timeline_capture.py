@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import logging
+
+from tweet_time import parse_tweet_timestamp
+from page_adapter import adapt_like
+
+logger = logging.getLogger(__name__)
+
+# GraphQL operations that carry a profile timeline
+TIMELINE_OPERATIONS = ("/UserTweets", "/UserTweetsAndReplies")
+
+
+def is_timeline_response(url):
+    path = url.split("?", 1)[0]
+    return "/graphql/" in path and path.endswith(TIMELINE_OPERATIONS)
+
+
+def _find_instructions(node, depth=0):
+    """Locate the timeline "instructions" list (its nesting differs between API versions)"""
+    if depth > 8:
+        return None
+    if isinstance(node, dict):
+        instructions = node.get("instructions")
+        if isinstance(instructions, list):
+            return instructions
+        for value in node.values():
+            found = _find_instructions(value, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+
+def _entry_item_contents(entry):
+    content = entry.get("content") or {}
+    if content.get("itemContent"):
+        return [content["itemContent"]]
+    # Conversation modules (self-threads) wrap several tweets
+    return [
+        item.get("item", {}).get("itemContent") or {}
+        for item in content.get("items") or []
+    ]
+
+
+def _unwrap_tweet(result):
+    if not result:
+        return None
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        result = result.get("tweet")
+    if not result or "legacy" not in result:
+        return None  # Tombstone, TweetUnavailable...
+    return result
+
+
+def _screen_name(tweet):
+    user = (tweet.get("core") or {}).get("user_results", {}).get("result") or {}
+    return (user.get("core") or {}).get("screen_name") or (user.get("legacy") or {}).get("screen_name")
+
+
+def _parse_tweet(tweet, pinned):
+    legacy = tweet["legacy"]
+    # A retweet's own text is a truncated "RT @user: ..."; report the original post like the DOM does
+    original = _unwrap_tweet((legacy.get("retweeted_status_result") or {}).get("result"))
+    if original:
+        record = _parse_tweet(original, pinned)
+        if record:
+            record["is_retweet"] = True
+            return record
+    tweet_id = legacy.get("id_str") or tweet.get("rest_id")
+    if not tweet_id:
+        return None
+    # Long posts keep their full text in note_tweet, legacy.full_text is cut at 280 characters
+    note = (tweet.get("note_tweet") or {}).get("note_tweet_results", {}).get("result") or {}
+    screen_name = _screen_name(tweet)
+    created_at = parse_tweet_timestamp(legacy.get("created_at"))
+    return {
+        "id": tweet_id,
+        "url": f"https://twitter.com/{screen_name or 'i/web'}/status/{tweet_id}",
+        "text": note.get("text") or legacy.get("full_text", ""),
+        "username": screen_name,
+        "timestamp": created_at.isoformat() if created_at else None,
+        "pinned": pinned,
+        "is_retweet": "retweeted_status_result" in legacy,
+        "is_reply": bool(legacy.get("in_reply_to_status_id_str")),
+    }
+
+
+def parse_timeline_payload(payload):
+    """Turn a UserTweets GraphQL payload into tweet records, in timeline order.
+
+    Pure function of the JSON payload, so it can be exercised offline against
+    payloads recorded with TIMELINE_RECORD_DIR.
+    """
+    instructions = _find_instructions(payload) or []
+    pinned_entries, entries = [], []
+    for instruction in instructions:
+        if instruction.get("type") == "TimelinePinEntry" and instruction.get("entry"):
+            pinned_entries.append(instruction["entry"])
+        entries.extend(instruction.get("entries") or [])
+
+    records, seen = [], set()
+    for pinned, entry_list in ((True, pinned_entries), (False, entries)):
+        for entry in entry_list:
+            for item in _entry_item_contents(entry):
+                tweet = _unwrap_tweet((item.get("tweet_results") or {}).get("result"))
+                if not tweet:
+                    continue
+                record = _parse_tweet(tweet, pinned)
+                if record and record["id"] not in seen:
+                    seen.add(record["id"])
+                    records.append(record)
+    return records
+
+
+def filter_timeline_tweets(records, cutoff, known_ids=None, max_tweets=5):
+    """Apply the same pinned / already-known / stale filtering as the DOM extraction.
+
+    Returns (tweets, skipped) where skipped counts the dropped records per reason.
+    """
+    known_ids = known_ids or ()
+    skipped = {"pinned": 0, "stale": 0, "known": 0}
+    tweets = []
+    for record in records[:max_tweets]:
+        if record["pinned"]:
+            skipped["pinned"] += 1
+        elif record["id"] in known_ids:
+            skipped["known"] += 1
+        elif not record["timestamp"] or parse_tweet_timestamp(record["timestamp"]) <= cutoff:
+            skipped["stale"] += 1
+        else:
+            tweets.append(record)
+    return tweets, skipped
+
+
+class TimelineCapture:
+    """Collects timeline GraphQL responses of a page through page.on("response").
+
+    Use as a context manager around the navigation, then await wait() - it
+    returns as soon as the first timeline payload has arrived, without
+    waiting for the tweets to render. `page` is an async_playwright page or
+    a sync one wrapped in page_adapter.SyncAdapter (driven with run_sync).
+    """
+
+    def __init__(self, page, record_dir=None):
+        self.page = page
+        self.record_dir = record_dir or os.getenv("TIMELINE_RECORD_DIR")
+        self._responses = []
+
+    def _on_response(self, response):
+        # Only remember the response here; reading the body is done from wait()/poll()
+        if is_timeline_response(response.url) and response.ok:
+            self._responses.append(adapt_like(self.page, response))
+
+    def __enter__(self):
+        self.page.on("response", self._on_response)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.page.remove_listener("response", self._on_response)
+        return False
+
+    async def wait(self, timeout=15, label="timeline"):
+        """Return the first timeline payload (parsed JSON), or None after timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while not self._responses and time.monotonic() < deadline:
+            # Lets Playwright dispatch pending events while we wait
+            await self.page.wait_for_timeout(50)
+        return await self.poll(label)
+
+    async def poll(self, label="timeline"):
+        """Return the first timeline payload if it has arrived, without waiting"""
+        if not self._responses:
+            return None
+        payload = await self._responses[0].json()
+        if self.record_dir:
+            self._record(payload, label)
+        return payload
+
+    def _record(self, payload, label):
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            path = os.path.join(self.record_dir, f"{label}_{int(time.time())}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            logger.info(f"Recorded timeline payload to {path}")
+        except OSError as e:
+            logger.warning(f"Could not record timeline payload: {str(e)}")
+
+
+if __name__ == "__main__":
+    # Parse recorded payloads offline: python timeline_capture.py payload.json [...]
+    import sys
+
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            for record in parse_timeline_payload(json.load(f)):
+                print(json.dumps(record, ensure_ascii=False))
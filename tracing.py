@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import inspect
+import logging
+import functools
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+# Attributes that split a span name into separate rows in the summary
+GROUP_ATTRS = ("phase", "method", "kind")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed unit of work; written to the trace file when it ends"""
+
+    def __init__(self, tracer, name, parent_id, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.span_id = next(tracer._ids)
+        self.start = time.time()
+        self.outcome = "ok"
+        self.error = None
+        self._started = time.monotonic()
+        self._token = None
+        self._ended = False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    def fail(self, error):
+        self.outcome = "cancelled" if type(error).__name__ == "CancelledError" else "error"
+        self.error = f"{type(error).__name__}: {str(error)}"[:300]
+
+    def end(self, outcome=None):
+        if self._ended:
+            return
+        self._ended = True
+        if outcome:
+            self.outcome = outcome
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from another thread or task than the one that started it
+                pass
+        self.tracer._write(self, time.monotonic() - self._started)
+
+
+class _NullSpan:
+    """Stands in for a span when no trace is active"""
+
+    def set(self, **attrs):
+        return self
+
+    def fail(self, error):
+        pass
+
+    def end(self, outcome=None):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Writes the spans of one run as JSON lines to <TRACE_DIR>/run-<run_id>.jsonl.
+
+    Spans nest through a context variable, so the parent of a span is the
+    innermost span() block around it in the same thread or asyncio task
+    (asyncio.to_thread carries it into the worker). Spans started with no
+    active parent, e.g. in a ThreadPoolExecutor worker, hang off the run's
+    root span.
+    """
+
+    def __init__(self, run_id, directory=None):
+        self.run_id = run_id
+        directory = directory or os.getenv("TRACE_DIR", DEFAULT_TRACE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"run-{run_id}.jsonl")
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._open = {}
+        self.root = None
+
+    def start_span(self, name, activate=False, **attrs):
+        parent = _current_span.get()
+        if parent is None or parent.tracer is not self:
+            parent = self.root
+        span = Span(self, name, parent.span_id if parent else None, attrs)
+        with self._lock:
+            self._open[span.span_id] = span
+        if activate:
+            span._token = _current_span.set(span)
+        return span
+
+    def _write(self, span, duration):
+        record = {
+            "run_id": self.run_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start": round(span.start, 3),
+            "duration": round(duration, 4),
+            "outcome": span.outcome,
+            "attrs": span.attrs,
+        }
+        if span.error:
+            record["error"] = span.error
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._open.pop(span.span_id, None)
+            if not self._file.closed:
+                self._file.write(line + "\n")
+
+    def close(self, outcome="ok"):
+        """End spans left open (outcome 'unfinished'), then the root span, and close the file"""
+        with self._lock:
+            leftover = [span for span in self._open.values() if span is not self.root]
+        for span in sorted(leftover, key=lambda span: -span.span_id):
+            span.end("unfinished")
+        if self.root:
+            self.root.end(outcome)
+        with self._lock:
+            self._file.close()
+
+
+_tracer = None
+
+
+def start_trace(run_id):
+    """Start tracing a run (TRACING=0 turns it off); spans go to this run until finish_trace()"""
+    global _tracer
+    if os.getenv("TRACING", "1") == "0":
+        return None
+    try:
+        tracer = Tracer(run_id)
+    except OSError as e:
+        logger.warning(f"Tracing disabled for run {run_id}: {str(e)}")
+        return None
+    tracer.root = tracer.start_span("run", activate=True, run_id=run_id)
+    _tracer = tracer
+    return tracer
+
+
+def finish_trace(outcome="ok"):
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer:
+        tracer.close(outcome)
+        logger.info(f"Trace written to {tracer.path}")
+
+
+def start_span(name, activate=False, **attrs):
+    """Start a span that is ended explicitly with .end(); a no-op span when no trace is active.
+
+    With activate=True, spans started in this thread/task until end() are
+    its children; leave it off for spans that overlap their siblings.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.start_span(name, activate=activate, **attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Span around a with-block; an exception marks it as an error and propagates"""
+    current = start_span(name, activate=True, **attrs)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        current.end()
+
+
+def traced(name, args=(), falsy="failed", **attrs):
+    """Decorator: run the function (sync or async) in a span named `name`.
+
+    The arguments listed in `args` are recorded as attributes; a falsy
+    return value sets the outcome to `falsy`.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def attributes(call_args, call_kwargs):
+            bound = signature.bind_partial(*call_args, **call_kwargs).arguments
+            return dict(attrs, **{arg: bound.get(arg) for arg in args})
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*call_args, **call_kwargs):
+                with span(name, **attributes(call_args, call_kwargs)) as current:
+                    result = await func(*call_args, **call_kwargs)
+                    if not result:
+                        current.outcome = falsy
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*call_args, **call_kwargs):
+            with span(name, **attributes(call_args, call_kwargs)) as current:
+                result = func(*call_args, **call_kwargs)
+                if not result:
+                    current.outcome = falsy
+                return result
+        return wrapper
+    return decorator
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def load_spans(paths):
+    spans = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".jsonl"))
+        else:
+            files = [path]
+        for filename in files:
+            with open(filename, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        spans.append(json.loads(line))
+                    except ValueError:
+                        # A run killed mid-write leaves a truncated last line
+                        continue
+    return spans
+
+
+def summarize(spans, top=10):
+    """Per span kind: count, non-ok outcomes and duration percentiles; plus the `top` slowest spans"""
+    groups = {}
+    for record in spans:
+        attrs = record.get("attrs") or {}
+        key = ":".join([record["name"]] + [str(attrs[a]) for a in GROUP_ATTRS if a in attrs])
+        groups.setdefault(key, []).append(record)
+    rows = []
+    for key, records in groups.items():
+        durations = sorted(record["duration"] for record in records)
+        rows.append({
+            "span": key,
+            "count": len(records),
+            "not_ok": sum(1 for record in records if record["outcome"] != "ok"),
+            "total": round(sum(durations), 1),
+            "p50": _percentile(durations, 0.5),
+            "p90": _percentile(durations, 0.9),
+            "p99": _percentile(durations, 0.99),
+            "max": durations[-1],
+        })
+    rows.sort(key=lambda row: -row["total"])
+    slowest = sorted((record for record in spans if record["name"] != "run"), key=lambda record: -record["duration"])[:top]
+    return rows, slowest
+
+
+if __name__ == "__main__":
+    # Slowest spans and percentiles across runs: python tracing.py [--top N] [trace files or dirs]
+    import sys
+
+    argv = sys.argv[1:]
+    top = 10
+    if argv[:1] == ["--top"]:
+        top, argv = int(argv[1]), argv[2:]
+    spans = load_spans(argv or [os.getenv("TRACE_DIR", DEFAULT_TRACE_DIR)])
+    rows, slowest = summarize(spans, top)
+    print(f"{len(spans)} spans from {len({record['run_id'] for record in spans})} runs\n")
+    print(f"{'span':<32} {'count':>6} {'not ok':>6} {'total s':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for row in rows:
+        print(f"{row['span']:<32} {row['count']:>6} {row['not_ok']:>6} {row['total']:>9} "
+              f"{row['p50']:>8.2f} {row['p90']:>8.2f} {row['p99']:>8.2f} {row['max']:>8.2f}")
+    print(f"\nSlowest {len(slowest)} spans:")
+    for record in slowest:
+        print(f"  {record['duration']:>8.2f}s  run {record['run_id']}  {record['name']}  "
+              f"{record['outcome']}  {json.dumps(record.get('attrs') or {}, ensure_ascii=False)}")
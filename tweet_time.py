@@ -0,0 +1,57 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Twitter API / legacy format: "Mon Jan 01 00:00:00 +0000 2024"
+TWITTER_TIME_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+
+def parse_tweet_timestamp(value):
+    """Parse a tweet timestamp into a timezone-aware UTC datetime (None if unparseable).
+
+    The <time datetime="..."> attribute scraped from the profile is ISO 8601
+    ("2024-07-01T12:34:56.000Z"), which goes through datetime.fromisoformat;
+    strptime is only tried for the Twitter API format. Naive values are
+    treated as UTC, never as server-local time.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        try:
+            # Fast path: ISO 8601 (the trailing Z is spelled out for older Python versions)
+            parsed = datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith("Z") else text)
+        except ValueError:
+            try:
+                parsed = datetime.strptime(text, TWITTER_TIME_FORMAT)
+            except ValueError:
+                return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class RecencyFilter:
+    """Decides whether a tweet falls inside a fixed time window, compared in UTC"""
+
+    def __init__(self, hours):
+        self.hours = hours
+        self.window = timedelta(hours=hours)
+
+    def cutoff(self, now=None):
+        """Oldest UTC time that still counts as recent"""
+        return (now or utc_now()) - self.window
+
+    def is_recent(self, timestamp, now=None):
+        tweet_time = parse_tweet_timestamp(timestamp)
+        if tweet_time is None:
+            logger.warning(f"Could not parse timestamp: {timestamp}")
+            return False
+        return tweet_time > self.cutoff(now)
@@ -0,0 +1,642 @@
+import os
+import logging
+import platform
+from utils import get_random_user_agent, async_wait_for_condition
+from tweet_time import RecencyFilter
+from timeline_capture import TimelineCapture, parse_timeline_payload, filter_timeline_tweets
+
+logger = logging.getLogger(__name__)
+
+# Page-readiness conditions used instead of fixed sleeps
+LOGGED_IN_SELECTOR = '[data-testid="SideNav_AccountSwitcher_Button"], [data-testid="tweetTextarea_0"], a[aria-label*="Profile"]'
+TEXTAREA_SELECTOR = '[data-testid="tweetTextarea_0"]'
+POST_BUTTON_ENABLED_SELECTOR = '[data-testid="tweetButton"]:not([aria-disabled="true"]), [data-testid="tweetButtonInline"]:not([aria-disabled="true"])'
+POSTED_TOAST_SELECTOR = '[data-testid="toast"]'
+# The compose/reply dialog closes once X has accepted the post
+COMPOSER_DIALOG_SELECTOR = '[role="dialog"] [data-testid="tweetTextarea_0"]'
+TWEET_SELECTOR = 'article[data-testid="tweet"]'
+REPLY_BUTTON_SELECTOR = '[data-testid="reply"]'
+THREAD_POST_BUTTON_SELECTOR = '[data-testid="tweetButton"]'
+
+TWEET_LIMIT = 280
+# Parts of a thread stay under this, leaving a margin for URLs and emojis
+THREAD_PART_LIMIT = 260
+
+# Performans için geliştirilmiş tarayıcı argümanları
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--enable-gpu",  # GPU hızlandırmayı etkinleştir
+    "--disable-features=IsolateOrigins,site-per-process",  # İzolasyonu azaltarak hız kazanma
+    "--disable-site-isolation-trials",
+    "--enable-features=NetworkService,NetworkServiceInProcess",
+    "--force-gpu-rasterization",  # Grafik hızlandırma
+    "--disable-accelerated-video-decode=false",
+    "--window-size=1920,1080"  # Tam boyutlu pencere
+]
+
+# Extracts every tweet on a profile page in one round trip. Pinned, stale and
+# already-known tweets are filtered in the page; only the first maxTweets
+# articles are considered, like the old per-element loop did.
+EXTRACT_TWEETS_JS = '''({knownIds, cutoffMs, maxTweets}) => {
+    const known = new Set(knownIds);
+    const articles = Array.from(document.querySelectorAll('article[data-testid="tweet"]'));
+    const result = {total: articles.length, tweets: [], skipped: {pinned: 0, stale: 0, known: 0}};
+    articles.slice(0, maxTweets).forEach((article, i) => {
+        const context = article.querySelector('[data-testid="socialContext"]');
+        const contextText = context ? context.textContent : '';
+        const pinned = !!article.querySelector('[data-testid="pin"]') || /pinned|sabitlen/i.test(contextText);
+        if (pinned) { result.skipped.pinned++; return; }
+
+        const link = article.querySelector('a[href*="/status/"]');
+        if (!link) return;
+        const href = link.getAttribute('href');
+        const match = href.match(/\\/status\\/(\\d+)/);
+        if (!match) return;
+        const id = match[1];
+        if (known.has(id)) { result.skipped.known++; return; }
+
+        // Without a <time> element fall back to a rough "30 minutes per position" estimate
+        const time = article.querySelector('time');
+        let timestamp = time ? time.getAttribute('datetime') : null;
+        if (!timestamp) timestamp = new Date(Date.now() - i * 30 * 60000).toISOString();
+        const timeMs = Date.parse(timestamp);
+        if (isNaN(timeMs) || timeMs <= cutoffMs) { result.skipped.stale++; return; }
+
+        const body = article.querySelector('[data-testid="tweetText"]');
+        result.tweets.push({
+            id: id,
+            url: href.startsWith('http') ? href : 'https://twitter.com' + href,
+            text: (body || article).innerText,
+            timestamp: timestamp,
+            pinned: pinned,
+            isRetweet: /repost|retweet|yeniden/i.test(contextText),
+        });
+    });
+    return result;
+}'''
+
+COMPOSE_BUTTON_JS = '''() => {
+    // Try to find compose button by common characteristics
+    const composeSelectors = [
+        'a[href="/compose/tweet"]',
+        '[data-testid="SideNav_NewTweet_Button"]',
+        '[aria-label="Post"]',
+        '[aria-label="Tweet"]',
+        '[data-testid="FloatingActionButton_Tweet"]',
+        '[data-icon="feather"]'
+    ];
+
+    for (const selector of composeSelectors) {
+        const element = document.querySelector(selector);
+        if (element) {
+            element.click();
+            return `Clicked ${selector}`;
+        }
+    }
+
+    // Look for any likely compose buttons
+    const allLinks = Array.from(document.querySelectorAll('a, div, button'));
+    const likelyComposeButton = allLinks.find(el => {
+        const ariaLabel = el.getAttribute('aria-label');
+        const text = el.textContent;
+        return (ariaLabel &&
+               (ariaLabel.includes('Tweet') ||
+                ariaLabel.includes('Post'))) ||
+               (text &&
+               (text.includes('Tweet') ||
+                text.includes('Post')));
+    });
+
+    if (likelyComposeButton) {
+        likelyComposeButton.click();
+        return 'Clicked likely compose button';
+    }
+
+    return 'No compose button found';
+}'''
+
+POST_BUTTON_JS = '''() => {
+    const postButtonSelectors = [
+        '[data-testid="tweetButtonInline"]',
+        '[data-testid="tweetButton"]'
+    ];
+
+    for (const selector of postButtonSelectors) {
+        const button = document.querySelector(selector);
+        if (button) {
+            button.click();
+            return `Clicked ${selector}`;
+        }
+    }
+
+    // Look for buttons with "Tweet" or "Post" text
+    const allButtons = Array.from(document.querySelectorAll('div[role="button"]'));
+    const postButton = allButtons.find(btn =>
+        btn.textContent.includes('Tweet') ||
+        btn.textContent.includes('Post'));
+
+    if (postButton) {
+        postButton.click();
+        return 'Clicked button with Tweet/Post text';
+    }
+
+    return 'No post button found';
+}'''
+
+FILL_TEXTAREA_JS = '''(content) => {
+    // Try to find textareas by common characteristics
+    const textareas = Array.from(document.querySelectorAll('div[role="textbox"], div[contenteditable="true"]'));
+    if (textareas.length > 0) {
+        textareas[0].innerText = content;
+        return true;
+    }
+    return false;
+}'''
+
+ADD_BUTTON_JS = '''() => {
+    const selectors = [
+        '[data-testid="addButton"]',
+        '[aria-label="Add"]',
+        '[aria-label="Add post"]'
+    ];
+    for (const selector of selectors) {
+        const button = document.querySelector(selector);
+        if (button) {
+            button.click();
+            return true;
+        }
+    }
+    return false;
+}'''
+
+CHALLENGE_KEYWORDS = ["challenge", "verify", "unusual activity", "something went wrong", "robot", "suspended", "blocked", "error"]
+
+
+def is_headless():
+    """Ortama göre headless ayarı: Render veya X sunucusu yoksa headless=True"""
+    is_render = os.environ.get("RENDER", "0") == "1" or os.environ.get("RENDER") == "true"
+    # Windows'ta DISPLAY yok, localde GUI için headless=False, Render'da headless=True
+    if is_render:
+        return True
+    if platform.system() == "Windows":
+        return False
+    return not os.environ.get("DISPLAY")
+
+
+def launch_options(headless):
+    """Keyword arguments for chromium.launch(), the same for both clients"""
+    return {"headless": headless, "args": BROWSER_ARGS, "slow_mo": 50}
+
+
+def context_options(storage_state):
+    """Keyword arguments for browser.new_context(); storage_state is a session file path or None"""
+    return {
+        "user_agent": get_random_user_agent(),
+        "storage_state": storage_state,
+        "viewport": {"width": 1920, "height": 1080},
+        "device_scale_factor": 1.0,
+        "has_touch": False,
+        "ignore_https_errors": True,
+    }
+
+
+def split_into_tweets(content):
+    """Split content into tweets while preserving sentence integrity"""
+
+    def clean_and_trim(text):
+        return text.strip()
+
+    def find_sentence_boundary(text, max_length):
+        """Find the best place to split text without breaking sentences"""
+        if len(text) <= max_length:
+            return len(text)
+
+        # Try to find the last sentence ending before max_length
+        sentence_endings = ['. ', '! ', '? ', '.\n', '!\n', '?\n']
+        best_split = 0
+
+        # Start looking from earlier in the text to ensure we stay well within limits
+        safe_max = min(max_length - 20, len(text))  # Give 20 chars safety margin
+
+        for i in range(safe_max, -1, -1):
+            if i == 0:
+                break
+
+            # Check if we're at a sentence ending
+            for ending in sentence_endings:
+                if text[i-1:i+1] == ending:
+                    return i
+
+            # If we haven't found a sentence ending, look for the last complete word
+            if best_split == 0 and text[i] == ' ':
+                best_split = i
+
+        # If we couldn't find a good split point, use the last word boundary
+        return best_split if best_split > 0 else min(max_length - 20, len(text))
+
+    tweets = []
+    remaining = content
+
+    while remaining:
+        # Clean up the remaining text
+        remaining = clean_and_trim(remaining)
+        if not remaining:
+            break
+
+        # If remaining text fits in one tweet
+        if len(remaining) <= THREAD_PART_LIMIT:
+            tweets.append(remaining)
+            break
+
+        # Find the best place to split
+        split_index = find_sentence_boundary(remaining, THREAD_PART_LIMIT)
+
+        if split_index == 0:
+            logger.warning("Could not find a good split point")
+            # Emergency split at THREAD_PART_LIMIT - 20 if no good point found
+            split_index = min(THREAD_PART_LIMIT - 20, len(remaining))
+
+        # Add the split portion to tweets
+        tweets.append(clean_and_trim(remaining[:split_index]))
+        remaining = clean_and_trim(remaining[split_index:])
+
+    # Verify all tweets are within limit
+    for i, tweet in enumerate(tweets):
+        if len(tweet) > THREAD_PART_LIMIT:
+            logger.warning(f"Tweet {i+1} exceeds limit ({len(tweet)} chars), forcing split")
+            # Force split at THREAD_PART_LIMIT - 20 if somehow still too long
+            first_part = clean_and_trim(tweet[:THREAD_PART_LIMIT-20])
+            second_part = clean_and_trim(tweet[THREAD_PART_LIMIT-20:])
+            tweets[i] = first_part
+            tweets.insert(i + 1, second_part)
+
+    logger.info(f"Split content into {len(tweets)} tweets")
+    for i, tweet in enumerate(tweets, 1):
+        logger.info(f"Thread part {i}: {tweet[:30]}... ({len(tweet)} chars)")
+
+    return tweets
+
+
+def tweets_from_payload(payload, username, cutoff, hours, max_tweets, known_ids):
+    """Filter a captured timeline payload down to the recent, unhandled tweets"""
+    records = parse_timeline_payload(payload)
+    tweets, skipped = filter_timeline_tweets(records, cutoff, known_ids, max_tweets)
+    logger.info(
+        f"Captured {len(records)} tweets from timeline response, skipped {skipped['pinned']} pinned, "
+        f"{skipped['stale']} older than {hours} hours, {skipped['known']} already handled"
+    )
+    recent_tweets = [dict(tweet, username=username) for tweet in tweets]
+    logger.info(f"Retrieved {len(recent_tweets)} recent tweets for @{username}")
+    return recent_tweets
+
+
+class PageFlows:
+    """The browser flows of TwitterClient and AsyncTwitterClient, written once.
+
+    Every flow is a coroutine against the async_playwright API.
+    AsyncTwitterClient awaits them on its pages; TwitterClient passes its
+    sync page wrapped in page_adapter.SyncAdapter and runs them with
+    run_sync(), where they complete without ever suspending. `page` is the
+    page that writes (compose, reply); reads take the page to load on.
+    """
+
+    def __init__(self, page, selectors, diagnostics):
+        self.page = page
+        self.selectors = selectors
+        self.diagnostics = diagnostics
+
+    async def click(self, action, timeout=5):
+        """Click the element for a registry action; returns True if clicked"""
+        selector, _ = await self.selectors.resolve_async(self.page, action, timeout=timeout)
+        if not selector:
+            return False
+        try:
+            await self.page.click(selector)
+            logger.info(f"Clicked {action} using selector: {selector}")
+            return True
+        except Exception as e:
+            logger.info(f"{action} selector {selector} failed: {str(e)}")
+            return False
+
+    async def fill(self, action, text, timeout=5):
+        """Fill the element for a registry action; returns True if filled"""
+        selector, _ = await self.selectors.resolve_async(self.page, action, timeout=timeout)
+        if not selector:
+            return False
+        try:
+            await self.page.fill(selector, text)
+            logger.info(f"Filled {action} using selector: {selector}")
+            return True
+        except Exception as e:
+            logger.info(f"{action} selector {selector} failed: {str(e)}")
+            return False
+
+    async def logged_in_marker(self):
+        """Selector of a logged-in-only element on the current page, or None (no waiting)"""
+        selector, _ = await self.selectors.resolve_async(self.page, "logged_in_marker", timeout=0)
+        return selector
+
+    async def verify_session(self):
+        """Open the home page and return the logged-in marker found there, or None"""
+        await self.page.goto("https://x.com/home", wait_until="domcontentloaded", timeout=120000)
+        await async_wait_for_condition(self.page, "home_loaded", selector=LOGGED_IN_SELECTOR)
+        return await self.logged_in_marker()
+
+    async def confirm_posted(self, failure_name):
+        """True once the posted toast shows, or failing that the composer dialog has closed"""
+        if await async_wait_for_condition(self.page, "tweet_posted", selector=POSTED_TOAST_SELECTOR, timeout=15):
+            return True
+        # The toast is gone after a few seconds and can be missed; a closed composer also means it went out
+        if await async_wait_for_condition(self.page, "composer_closed", selector=COMPOSER_DIALOG_SELECTOR,
+                                          state="hidden", timeout=5):
+            logger.info("No posted toast seen, but the composer closed")
+            return True
+        logger.error("Post was not confirmed: no toast and the composer is still open")
+        await self.diagnostics.capture_failure_async(self.page, failure_name)
+        return False
+
+    async def post_tweet(self, content):
+        """Post a tweet or thread depending on content length"""
+        # Split content into tweets if necessary
+        if len(content) > TWEET_LIMIT:
+            logger.info(f"Content exceeds Twitter character limit ({len(content)} chars), creating thread")
+            return await self.post_thread(split_into_tweets(content))
+        return await self.post_single_tweet(content)
+
+    async def post_single_tweet(self, content):
+        """Post a single tweet from the home page's compose button"""
+        page = self.page
+        try:
+            logger.info("Posting single tweet")
+            # Navigate to home if not already there
+            if not page.url.startswith("https://twitter.com/home") and not page.url.startswith("https://x.com/home"):
+                logger.info(f"Navigating to home from {page.url}")
+                await page.goto("https://x.com/home", wait_until="domcontentloaded")
+                await async_wait_for_condition(page, "home_loaded", selector=LOGGED_IN_SELECTOR)
+
+            self.diagnostics.record("home_loaded", url=page.url)
+
+            # Approach 1: Registry selectors for the compose button (last successful one first)
+            compose_clicked = await self.click("compose_button")
+
+            # Approach 2: If selectors fail, try using JavaScript
+            if not compose_clicked:
+                logger.info("Trying JavaScript to find and click compose button")
+                self.selectors.record_fallback("compose_button")
+                js_result = await page.evaluate(COMPOSE_BUTTON_JS)
+                logger.info(f"JavaScript compose button result: {js_result}")
+                compose_clicked = "Clicked" in js_result
+
+            if not compose_clicked:
+                logger.error("Could not find compose button")
+                await self.diagnostics.capture_failure_async(page, "compose_button_not_found")
+                return False
+
+            # Wait for compose dialog
+            await async_wait_for_condition(page, "compose_opened", selector=TEXTAREA_SELECTOR)
+            self.diagnostics.record("compose_opened")
+
+            # Fill in tweet content
+            logger.info("Entering tweet content")
+            if not await self.fill("tweet_textarea", content):
+                logger.error("Could not enter tweet content")
+                await self.diagnostics.capture_failure_async(page, "tweet_content_not_entered")
+                return False
+
+            await async_wait_for_condition(page, "content_filled", selector=POST_BUTTON_ENABLED_SELECTOR, timeout=10)
+
+            # Click tweet/post button
+            logger.info("Clicking post button")
+            post_clicked = await self.click("post_button")
+
+            # Try JavaScript if regular selectors fail
+            if not post_clicked:
+                logger.info("Trying JavaScript to click post button")
+                self.selectors.record_fallback("post_button")
+                js_post_result = await page.evaluate(POST_BUTTON_JS)
+                logger.info(f"JavaScript post button result: {js_post_result}")
+                post_clicked = "Clicked" in js_post_result
+
+            if not post_clicked:
+                logger.error("Could not click post button")
+                await self.diagnostics.capture_failure_async(page, "post_button_not_found")
+                return False
+
+            # Wait for tweet to be posted
+            logger.info("Waiting for tweet to be posted")
+            if not await self.confirm_posted("tweet_not_confirmed"):
+                return False
+
+            self.diagnostics.record("tweet_posted", url=page.url)
+            logger.info("Tweet posted successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to post tweet: {str(e)}")
+            await self.diagnostics.capture_failure_async(page, "tweet_error", error=e)
+            return False
+
+    async def _report_compose_blocked(self):
+        """Log signs of a challenge/captcha/block screen on the compose page and capture it"""
+        page = self.page
+        # Compose sayfasında challenge/captcha/engelleme var mı kontrol et (sadece hata durumunda)
+        page_html = (await page.content()).lower()
+        for keyword in CHALLENGE_KEYWORDS:
+            if keyword in page_html:
+                logger.error(f"[COMPOSE] Sayfada '{keyword}' anahtarı tespit edildi! Muhtemelen bot engeli veya farklı bir ekran var.")
+        # Ayrıca challenge/captcha var mı diye logla
+        for selector in ("input[name='captcha']", "iframe[src*='captcha']", "text=challenge"):
+            if await page.query_selector(selector):
+                logger.error("Sayfada captcha veya challenge tespit edildi!")
+                break
+        await self.diagnostics.capture_failure_async(page, "textarea_not_found", html=True)
+        logger.error(f"Teşhis dosyalarını {self.diagnostics.run_dir} klasöründen inceleyin. Twitter botu engelliyor olabilir!")
+
+    async def _click_add_button(self):
+        selector, _ = await self.selectors.resolve_async(self.page, "add_button", timeout=20)  # 5s → 20s
+        if selector:
+            logger.info(f"Found Add button with selector: {selector}")
+            # Try multiple ways to click the button
+            for options in ({"delay": 100}, {"force": True}):
+                try:
+                    await self.page.click(selector, **options)
+                    return True
+                except Exception as e:
+                    logger.info(f"Add button click {options} failed: {str(e)}")
+        # Try JavaScript click as last resort
+        self.selectors.record_fallback("add_button")
+        return await self.page.evaluate(ADD_BUTTON_JS)
+
+    async def post_thread(self, content_list):
+        """Post a thread of tweets from the compose page"""
+        page = self.page
+        try:
+            logger.info(f"Posting a thread with {len(content_list)} tweets")
+
+            # Navigate to compose tweet page directly
+            compose_url = "https://twitter.com/compose/tweet"
+            logger.info(f"Navigating to {compose_url}")
+            await page.goto(compose_url, wait_until="domcontentloaded", timeout=120000)  # 60s → 120s
+            await async_wait_for_condition(page, "compose_opened", selector=TEXTAREA_SELECTOR, timeout=30)
+            self.diagnostics.record("compose_page_loaded", url=page.url)
+
+            # Enter the first tweet
+            logger.info(f"Entering content for tweet 1/{len(content_list)}")
+            # Wait for textarea with longer timeout; all candidates share one 60s window
+            textarea_found = await self.fill("thread_textarea", content_list[0], timeout=60)  # 30s → 60s
+            if textarea_found:
+                logger.info("Entered content for first tweet")
+                await async_wait_for_condition(page, "content_filled", selector=POST_BUTTON_ENABLED_SELECTOR, timeout=10)
+            else:
+                # Try JavaScript as last resort
+                logger.info("Using JavaScript to fill tweet content")
+                self.selectors.record_fallback("thread_textarea")
+                textarea_found = await page.evaluate(FILL_TEXTAREA_JS, content_list[0])
+                if textarea_found:
+                    logger.info("Filled textarea using JavaScript")
+            if not textarea_found:
+                logger.error("Tweet textarea bulunamadı! Sayfa HTML ve screenshot kaydediliyor.")
+                await self._report_compose_blocked()
+                return False
+
+            # Add remaining tweets to thread
+            for i, tweet_content in enumerate(content_list[1:], 2):
+                logger.info(f"Adding tweet {i}/{len(content_list)} to thread")
+                try:
+                    if not await self._click_add_button():
+                        raise Exception("Could not find or click Add button")
+
+                    # Wait for and fill the new tweet textarea
+                    next_textarea_selector = f'[data-testid="tweetTextarea_{i-1}"]'
+                    if not await async_wait_for_condition(page, "thread_tweet_added", selector=next_textarea_selector, timeout=20):  # 5s → 20s
+                        raise Exception(f"Textarea for tweet {i} did not appear")
+                    await page.fill(next_textarea_selector, tweet_content)
+                    logger.info(f"Entered content for tweet {i}")
+                    await async_wait_for_condition(page, "content_filled", selector=POST_BUTTON_ENABLED_SELECTOR, timeout=10)
+                except Exception as e:
+                    logger.error(f"Error adding tweet {i} to thread: {str(e)}")
+                    await self.diagnostics.capture_failure_async(page, f"thread_tweet_{i}_error", error=e)
+                    return False
+
+            # Post the complete thread
+            logger.info("Posting the complete thread")
+            await page.wait_for_selector(THREAD_POST_BUTTON_SELECTOR, state="visible", timeout=20000)  # 5s → 20s
+            await page.click(THREAD_POST_BUTTON_SELECTOR)
+            logger.info("Clicked post button")
+            if not await self.confirm_posted("thread_not_confirmed"):
+                return False
+            self.diagnostics.record("tweet_posted", url=page.url, parts=len(content_list))
+            return True
+
+        except Exception as e:
+            logger.error(f"Thread posting failed: {str(e)}")
+            await self.diagnostics.capture_failure_async(page, "thread_error", error=e)
+            return False
+
+    async def post_comment(self, tweet_url, comment):
+        """Post a comment on a tweet"""
+        page = self.page
+        try:
+            # Navigate to tweet
+            logger.info(f"Navigating to tweet: {tweet_url}")
+            await page.goto(tweet_url, wait_until="domcontentloaded")
+            self.diagnostics.record("tweet_opened", url=tweet_url)
+            await async_wait_for_condition(page, "tweet_loaded", selector=REPLY_BUTTON_SELECTOR)
+
+            # Find and click reply button
+            if not await self.click("reply_button"):
+                logger.error("Could not click reply button")
+                return False
+
+            await async_wait_for_condition(page, "reply_opened", selector=TEXTAREA_SELECTOR)
+
+            # Enter comment text
+            if not await self.fill("reply_textarea", comment):
+                logger.error("Could not enter comment text")
+                return False
+
+            await async_wait_for_condition(page, "content_filled", selector=POST_BUTTON_ENABLED_SELECTOR, timeout=10)
+
+            # Click reply/post button
+            if not await self.click("reply_post_button"):
+                logger.error("Could not click post button")
+                return False
+
+            return await self.confirm_posted("comment_not_confirmed")
+
+        except Exception as e:
+            logger.error(f"Error posting comment: {str(e)}")
+            return False
+
+    async def read_recent_tweets(self, page, username, hours, max_tweets, known_ids, mode, **details):
+        """Get tweets from a user newer than `hours` hours (avoiding pinned tweets), loading them on `page`.
+
+        In "network" mode the tweets come from the timeline GraphQL response,
+        with exact timestamps and retweet/reply flags. Otherwise (or if no
+        response is captured) all tweets on the profile are extracted with a
+        single page.evaluate; pinned, stale and already-known tweets
+        (known_ids) are dropped inside the page so only the remaining records
+        cross into Python.
+        """
+        try:
+            # Navigate to user's profile
+            profile_url = f"https://twitter.com/{username}"
+            logger.info(f"Getting recent tweets from {profile_url} (last {hours} hours)")
+            self.diagnostics.record("profile_visit", username=username, mode=mode, **details)
+            cutoff = RecencyFilter(hours).cutoff()
+
+            if mode == "network":
+                # Read the timeline JSON the page downloads; no need to wait for rendering
+                with TimelineCapture(page) as capture:
+                    await page.goto(profile_url, wait_until="commit")
+                    payload = await capture.wait(timeout=15, label=username)
+                if payload is not None:
+                    return tweets_from_payload(payload, username, cutoff, hours, max_tweets, known_ids)
+                logger.warning(f"No timeline response captured for @{username}, falling back to DOM extraction")
+                await page.wait_for_load_state("domcontentloaded")
+            else:
+                await page.goto(profile_url, wait_until="domcontentloaded")
+            await async_wait_for_condition(page, "profile_loaded", selector=TWEET_SELECTOR)
+
+            try:
+                # Wait for first tweet to load
+                await page.wait_for_selector(TWEET_SELECTOR, timeout=10000)
+                return await self.extract_dom_tweets(page, username, cutoff, hours, max_tweets, known_ids)
+            except Exception as e:
+                logger.error(f"Error finding tweets for @{username}: {str(e)}")
+                return []
+
+        except Exception as e:
+            logger.error(f"Error getting recent tweets from @{username}: {str(e)}")
+            return []
+
+    async def extract_dom_tweets(self, page, username, cutoff, hours, max_tweets, known_ids):
+        """Extract the recent, unhandled tweets rendered on a profile page in one evaluate"""
+        result = await page.evaluate(EXTRACT_TWEETS_JS, {
+            "knownIds": list(known_ids or []),
+            "cutoffMs": cutoff.timestamp() * 1000,
+            "maxTweets": max_tweets,
+        })
+        skipped = result["skipped"]
+        logger.info(
+            f"Found {result['total']} tweets on profile, skipped {skipped['pinned']} pinned, "
+            f"{skipped['stale']} older than {hours} hours, {skipped['known']} already handled"
+        )
+
+        recent_tweets = []
+        for record in result["tweets"]:
+            recent_tweets.append({
+                "id": record["id"],
+                "url": record["url"],
+                "text": record["text"],
+                "username": username,
+                "timestamp": record["timestamp"],
+                "pinned": record["pinned"],
+                "is_retweet": record["isRetweet"],
+            })
+            logger.info(f"Found tweet: {record['id']}")
+
+        logger.info(f"Retrieved {len(recent_tweets)} recent tweets for @{username}")
+        return recent_tweets
@@ -1,14 +1,97 @@
+import os
+import json
 import time
 import random
 import logging
+from collections import defaultdict
+from page_adapter import adapt, run_sync
 
 logger = logging.getLogger(__name__)
 
-def random_delay(min_seconds=2, max_seconds=15):
-    """Wait for a random amount of time to simulate human behavior"""
-    delay = random.uniform(min_seconds, max_seconds)
-    logger.info(f"Waiting for {delay:.2f} seconds")
-    time.sleep(delay)
+# Minimum human-like pause per action in seconds (min, max). It is applied after the
+# page condition resolves and only tops up whatever time the wait itself already took.
+# Override with PACING_FLOORS='{"tweet_posted": [3, 5]}' and/or scale all of them with PACING_SCALE.
+DEFAULT_PACING_FLOORS = {
+    "home_loaded": (1, 2),
+    "profile_loaded": (0.5, 1.5),
+    "tweet_loaded": (0.5, 1.5),
+    "compose_opened": (0.5, 1.5),
+    "reply_opened": (0.5, 1.5),
+    "thread_tweet_added": (0.5, 1),
+    "content_filled": (0.5, 1.5),
+    "tweet_posted": (1, 2),
+}
+
+# action -> list of seconds spent in wait_for_condition (condition + pacing floor)
+WAIT_STATS = defaultdict(list)
+
+def _load_pacing_floors():
+    floors = dict(DEFAULT_PACING_FLOORS)
+    try:
+        floors.update({k: tuple(v) for k, v in json.loads(os.getenv("PACING_FLOORS", "{}")).items()})
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Ignoring invalid PACING_FLOORS: {str(e)}")
+    scale = float(os.getenv("PACING_SCALE", "1"))
+    return {action: (low * scale, high * scale) for action, (low, high) in floors.items()}
+
+PACING_FLOORS = _load_pacing_floors()
+
+def wait_for_condition(page, action, selector=None, state="visible", url_contains=None, network_idle=False, timeout=15):
+    """async_wait_for_condition for sync Playwright pages"""
+    return run_sync(async_wait_for_condition(adapt(page), action, selector=selector, state=state,
+                                             url_contains=url_contains, network_idle=network_idle, timeout=timeout))
+
+async def async_wait_for_condition(page, action, selector=None, state="visible", url_contains=None, network_idle=False, timeout=15):
+    """Wait until the page is actually ready instead of sleeping a fixed random time.
+
+    Resolves as soon as the given conditions hold (selector in `state`, URL
+    containing `url_contains`, network quiet), all within one `timeout`
+    second window, then tops the elapsed time up to the action's pacing
+    floor. Returns True if the conditions were met. The time spent is
+    recorded in WAIT_STATS.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    remaining_ms = lambda: max(0, (deadline - time.monotonic()) * 1000)
+    met = True
+    try:
+        if selector:
+            await page.wait_for_selector(selector, state=state, timeout=remaining_ms())
+        if url_contains:
+            await page.wait_for_url(lambda url: url_contains in url, timeout=remaining_ms())
+        if network_idle:
+            await page.wait_for_load_state("networkidle", timeout=remaining_ms())
+    except Exception as e:
+        met = False
+        logger.info(f"Wait for '{action}' not met within {timeout}s: {str(e).splitlines()[0]}")
+    condition_time = time.monotonic() - start
+
+    low, high = PACING_FLOORS.get(action, (0, 0))
+    floor = random.uniform(low, high)
+    if floor > condition_time:
+        # page.wait_for_timeout keeps Playwright event/route handlers running, time.sleep would block them;
+        # on an async page only this task waits
+        await page.wait_for_timeout((floor - condition_time) * 1000)
+
+    total = time.monotonic() - start
+    WAIT_STATS[action].append(total)
+    logger.info(f"Waited {total:.2f}s for '{action}' (condition {'met' if met else 'timed out'} after {condition_time:.2f}s)")
+    return met
+
+def reset_wait_stats():
+    WAIT_STATS.clear()
+
+def wait_stats_summary():
+    """Per-action count / total / mean / max of recorded waits"""
+    return {
+        action: {
+            "count": len(times),
+            "total": round(sum(times), 2),
+            "mean": round(sum(times) / len(times), 2),
+            "max": round(max(times), 2),
+        }
+        for action, times in WAIT_STATS.items() if times
+    }
 
 def get_random_user_agent():
     """Return a random user agent string"""
@@ -32,12 +115,3 @@ def get_random_user_agent():
         "Mozilla/5.0 (iPhone; CPU iPhone OS 15_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/96.0.4664.116 Mobile/15E148 Safari/604.1"
     ]
     return random.choice(user_agents)
-
-def handle_rate_limiting(e):
-    """Handle rate limiting errors"""
-    if "rate limit" in str(e).lower() or "too many requests" in str(e).lower():
-        wait_time = 3600  # 1 hour in seconds
-        logger.warning(f"Rate limit detected, waiting for {wait_time} seconds")
-        time.sleep(wait_time)
-        return True
-    return False
\ No newline at end of file
@@ -1,8 +1,10 @@
-from flask import Flask
+from flask import Flask, Response, jsonify
 import os
 import threading
 import time
-from main import run_bot
+from state_store import get_state
+from response_cache import get_cache
+from metrics import get_metrics, render_prometheus, process_memory
 
 app = Flask(__name__)
 
@@ -14,15 +16,48 @@ def home():
 def healthz():
     return "ok", 200
 
+@app.route("/state")
+def state():
+    # Rotation indices, dedup set sizes and the last runs, read straight from the state database
+    snapshot = get_state().snapshot()
+    # Cache hits are Gemini calls this process did not have to make
+    snapshot["gemini_cache"] = get_cache().summary()
+    return jsonify(snapshot)
+
+@app.route("/metrics")
+def metrics():
+    # Run/phase/post counters, navigation and Gemini histograms of this process, plus memory read at scrape time
+    memory = process_memory()
+    gauges = [
+        ("process_resident_memory_bytes", memory["python"], {"process": "python"}),
+        ("process_resident_memory_bytes", memory["chromium"], {"process": "chromium"}),
+        ("process_resident_memory_bytes", memory["driver"], {"process": "playwright_driver"}),
+        ("chromium_processes", memory["chromium_processes"], {}),
+    ]
+    return Response(render_prometheus(get_metrics(), gauges), mimetype="text/plain; version=0.0.4")
+
 def bot_runner():
+    # Imported in the bot thread: main pulls in Playwright and the bot modules, and the port
+    # has to be bound before Render's health check gives up
+    from main import run_bot, run_bot_with_asyncio
+    from browser_service import BrowserService
+    # The browser stays warm between hourly runs; it is restarted on crash, high RSS or every N runs
+    browser = BrowserService()
     while True:
         try:
-            run_bot()
+            if os.getenv("BOT_ASYNC", "0") == "1":
+                run_bot_with_asyncio()
+            else:
+                try:
+                    run_bot(browser.acquire())
+                finally:
+                    browser.release()
         except Exception as e:
             print(f"Bot hatası: {e}")
         time.sleep(3600)
 
-if not hasattr(app, 'bot_thread_started'):
+# BOT_THREAD=0 serves the endpoints without running the bot (import_benchmark.py uses it)
+if os.getenv("BOT_THREAD", "1") != "0" and not hasattr(app, 'bot_thread_started'):
     t = threading.Thread(target=bot_runner)
     t.daemon = True
     t.start()